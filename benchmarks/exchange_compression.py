@@ -0,0 +1,88 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+"""
+Compares the compression codecs of the files exchanged between the Studio class and the batch launcher. Runs
+write_resource and read_resource against the stand-in launcher, with the scratch directory on every given path, and
+reports the median latency and the size of the exchanged files.
+
+Network storage can be measured by passing a directory on a network mount to --scratch-dirs. Without one, --disk-mbps
+estimates the latency on slow disks: the exchanged files are written by one side and read by the other, so the estimate
+adds twice their size at the given bandwidth to the latency measured locally.
+
+Usage: python benchmarks/exchange_compression.py [--rows 100000,1000000] [--columns 10] [--dtype mixed] [--repeat 5]
+                                                 [--scratch-dirs DIR,DIR] [--disk-mbps 50,200]
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "standins"))
+
+import rapidminer
+from run import make_dataframe, measure
+
+CODECS = (None, "gzip", "lz4", "zstd", "auto")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compares the compression codecs of the Studio exchange files.")
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--dtype", default="mixed")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scratch-dirs", default=tempfile.gettempdir())
+    parser.add_argument("--disk-mbps", default="50,200")
+    args = parser.parse_args(argv)
+
+    studio_home = os.path.join(BENCHMARK_DIR, "standins", "studio_home")
+    workdir = tempfile.mkdtemp(prefix="rapidminer-benchmark-")
+    os.environ["RAPIDMINER_FAKE_REPOSITORY"] = os.path.join(workdir, "repository")
+    os.environ["RAPIDMINER_FAKE_PYTHON"] = sys.executable
+    bandwidths = [float(b) for b in args.disk_mbps.split(",") if b != ""]
+    try:
+        for scratch_dir in args.scratch_dirs.split(","):
+            for rows in [int(r) for r in args.rows.split(",")]:
+                df = make_dataframe(rows, args.columns, args.dtype)
+                for codec in CODECS:
+                    stats = rapidminer.StatsInstrumentation()
+                    connector = rapidminer.Studio(studio_home, loglevel=logging.WARNING, scratch_dir=scratch_dir,
+                                                  small_scratch_dir=False, exchange_compression=codec, instrumentation=stats)
+                    # the first launch negotiates the codecs with the launcher
+                    connector.write_resource(df, "//Local Repository/benchmark/data")
+                    cases = [("write_resource", "studio.serialize",
+                              lambda: connector.write_resource(df, "//Local Repository/benchmark/data")),
+                             ("read_resource", "studio.deserialize",
+                              lambda: connector.read_resource("//Local Repository/benchmark/data"))]
+                    for name, phase, function in cases:
+                        before = stats.stats().get(phase, {"count": 0, "bytes": 0})
+                        result = measure(function, args.repeat)
+                        after = stats.stats()[phase]
+                        size = (after["bytes"] - before["bytes"]) / float(after["count"] - before["count"])
+                        estimates = "".join(" %g MB/s=%.4fs" % (b, result["median_seconds"] + 2 * size / (b * 1e6)) for b in bandwidths)
+                        print("%-24s rows=%-8d codec=%-5s %-15s median=%.4fs file=%.1f MB%s"
+                              % (scratch_dir[-24:], rows, codec or "none", name, result["median_seconds"], size / 1e6, estimates))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,73 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+"""
+Measures the time of 'import rapidminer' in fresh interpreters, and checks it against a budget. Also checks that no
+heavy dependency is imported eagerly. Exits with status 1 if the budget is exceeded, so it can be used as a CI gate.
+
+Usage: python benchmarks/import_time.py [--budget-ms 50] [--repeat 10] [--target rapidminer|rapidminer.Server]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("pandas", "numpy", "requests", "jwt", "pkg_resources")
+
+MEASURE_SCRIPT = """
+import json, sys
+from time import perf_counter
+start = perf_counter()
+import rapidminer
+TARGET
+elapsed = perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": [m for m in HEAVY if m in sys.modules]}))
+"""
+
+
+def measure(target):
+    statement = "" if target == "rapidminer" else "getattr(rapidminer, '" + target.split(".", 1)[1] + "')"
+    script = MEASURE_SCRIPT.replace("TARGET", statement).replace("HEAVY", repr(HEAVY_MODULES))
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=os.path.dirname(BENCHMARK_DIR))
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Checks the import time of the rapidminer package against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--target", default="rapidminer")
+    args = parser.parse_args(argv)
+
+    results = [measure(args.target) for _ in range(args.repeat)]
+    timings = sorted(r["seconds"] * 1000 for r in results)
+    median = timings[len(timings) // 2]
+    print("import %s: median %.2f ms, min %.2f ms, max %.2f ms (budget %.2f ms)"
+          % (args.target, median, timings[0], timings[-1], args.budget_ms))
+    failed = False
+    if median > args.budget_ms:
+        print("FAILED: import time is over budget")
+        failed = True
+    if args.target == "rapidminer" and len(results[0]["modules"]) > 0:
+        print("FAILED: heavy modules imported eagerly: " + ", ".join(results[0]["modules"]))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,164 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+"""
+Benchmark runner for the Studio, Server and Scoring connectors, using the local stand-ins in the standins folder.
+Measures latency and throughput of read_resource, write_resource, run_process and predict across data sizes, column
+counts and dtypes, and appends the results to a JSON history file.
+
+Usage: python benchmarks/run.py [--targets studio,server,scoring] [--rows 1000,100000] [--columns 10]
+                                [--dtypes float,int,str,datetime,mixed] [--repeat 5] [--history FILE]
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "standins"))
+
+import rapidminer
+import fake_server
+
+DTYPES = ("float", "int", "str", "datetime", "mixed")
+
+
+def make_dataframe(rows, columns, dtype, seed=0):
+    """
+    Generates a DataFrame with the given shape. The 'mixed' dtype cycles through the other dtypes column by column.
+    """
+    random = np.random.RandomState(seed)
+    data = {}
+    for i in range(columns):
+        kind = DTYPES[i % (len(DTYPES) - 1)] if dtype == "mixed" else dtype
+        if kind == "float":
+            data["c" + str(i)] = random.rand(rows)
+        elif kind == "int":
+            data["c" + str(i)] = random.randint(0, 1000000, rows)
+        elif kind == "str":
+            data["c" + str(i)] = np.array(["value" + str(v) for v in range(50)])[random.randint(0, 50, rows)]
+        elif kind == "datetime":
+            data["c" + str(i)] = pd.Timestamp("2019-01-01") + pd.to_timedelta(random.randint(0, 10 ** 8, rows), unit="s")
+    return pd.DataFrame(data)
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+    timings.sort()
+    return {"median_seconds": timings[len(timings) // 2],
+            "p95_seconds": timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+            "min_seconds": timings[0]}
+
+
+def studio_cases(df, workdir):
+    studio_home = os.path.join(BENCHMARK_DIR, "standins", "studio_home")
+    os.environ["RAPIDMINER_FAKE_REPOSITORY"] = os.path.join(workdir, "repository")
+    os.environ["RAPIDMINER_FAKE_PYTHON"] = sys.executable
+    connector = rapidminer.Studio(studio_home, loglevel=logging.WARNING)
+    connector.write_resource(df, "//Local Repository/benchmark/data")
+    return [("write_resource", lambda: connector.write_resource(df, "//Local Repository/benchmark/data")),
+            ("read_resource", lambda: connector.read_resource("//Local Repository/benchmark/data")),
+            ("run_process", lambda: connector.run_process("//Local Repository/benchmark/process", inputs=df))]
+
+
+def server_cases(df, url):
+    connector = rapidminer.Server(url, username="benchmark", password="benchmark", poll_interval=0.01, loglevel=logging.WARNING)
+    connector.write_resource(df, "/home/benchmark/data")
+    return [("write_resource", lambda: connector.write_resource(df, "/home/benchmark/data")),
+            ("read_resource", lambda: connector.read_resource("/home/benchmark/data")),
+            ("run_process", lambda: connector.run_process("/home/benchmark/process", inputs=df))]
+
+
+def scoring_cases(df, url):
+    connector = rapidminer.Scoring(url, "benchmark/score")
+    return [("predict", lambda: connector.predict(df))]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARK_DIR,
+                                       stderr=subprocess.STDOUT).decode("ascii").strip()
+    except Exception:
+        return None
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmarks the rapidminer connectors against local stand-ins.")
+    parser.add_argument("--targets", default="studio,server,scoring")
+    parser.add_argument("--rows", default="1000,100000")
+    parser.add_argument("--columns", default="10")
+    parser.add_argument("--dtypes", default=",".join(DTYPES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history", default=os.path.join(BENCHMARK_DIR, "history.json"))
+    args = parser.parse_args(argv)
+
+    targets = args.targets.split(",")
+    server, url = fake_server.start_server()
+    workdir = tempfile.mkdtemp(prefix="rapidminer-benchmark-")
+    results = []
+    try:
+        for rows in [int(r) for r in args.rows.split(",")]:
+            for columns in [int(c) for c in args.columns.split(",")]:
+                for dtype in args.dtypes.split(","):
+                    df = make_dataframe(rows, columns, dtype)
+                    cases = []
+                    if "studio" in targets:
+                        cases += [("studio", name, f) for name, f in studio_cases(df, workdir)]
+                    if "server" in targets:
+                        cases += [("server", name, f) for name, f in server_cases(df, url)]
+                    if "scoring" in targets:
+                        cases += [("scoring", name, f) for name, f in scoring_cases(df, url)]
+                    for target, name, function in cases:
+                        result = {"target": target, "operation": name, "rows": rows, "columns": columns, "dtype": dtype}
+                        result.update(measure(function, args.repeat))
+                        result["rows_per_second"] = rows / result["median_seconds"]
+                        results.append(result)
+                        print("%-8s %-15s rows=%-9d columns=%-4d dtype=%-9s median=%.4fs p95=%.4fs %.0f rows/s"
+                              % (target, name, rows, columns, dtype, result["median_seconds"], result["p95_seconds"],
+                                 result["rows_per_second"]))
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    run = {"timestamp": datetime.datetime.now().isoformat(), "revision": git_revision(),
+           "python": platform.python_version(), "pandas": pd.__version__, "results": results}
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history) as f:
+            history = json.load(f)
+    history.append(run)
+    with open(args.history, "w") as f:
+        json.dump(history, f, indent=1)
+    print("Results appended to " + args.history)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+"""
+Compares the request layouts and compression of the Scoring class. Calls predict against the local stand-in, and reports
+the encode and decode time per 1000 rows and the request size, as recorded by the scoring.encode and scoring.decode
+phases.
+
+Usage: python benchmarks/scoring_encoding.py [--rows 1000,100000] [--columns 10] [--dtype mixed] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "standins"))
+
+import rapidminer
+import fake_server
+from run import make_dataframe
+
+FORMATS = ("table", "records", "split")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compares the request layouts of the Scoring class.")
+    parser.add_argument("--rows", default="1000,100000")
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--dtype", default="mixed")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    server, url = fake_server.start_server()
+    try:
+        for rows in [int(r) for r in args.rows.split(",")]:
+            df = make_dataframe(rows, args.columns, args.dtype)
+            for request_format in FORMATS:
+                for compress in (False, True):
+                    stats = rapidminer.StatsInstrumentation()
+                    connector = rapidminer.Scoring(url, "benchmark/score", request_format=request_format,
+                                                   compress=compress, instrumentation=stats)
+                    for _ in range(args.repeat):
+                        connector.predict(df)
+                    result = stats.stats()
+                    encode = result["scoring.encode"]
+                    decode = result["scoring.decode"]
+                    print("rows=%-9d format=%-8s gzip=%-5s encode=%.3f ms/1k rows decode=%.3f ms/1k rows request=%d bytes"
+                          % (rows, request_format, compress, 1000 * encode["mean_seconds"] * 1000 / rows,
+                             1000 * decode["mean_seconds"] * 1000 / rows, encode["bytes"] / encode["count"]))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
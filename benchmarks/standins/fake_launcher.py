@@ -0,0 +1,181 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+"""
+Stand-in for the rapidminer-batch launcher of Studio, used by the benchmarks. It understands the arguments built by
+Studio.__run_rapidminer, and emulates them with plain file copies:
+
+- -I / -O pairs (read_resource, write_resource) copy the input file to the output location,
+- -P with -D (run_process) runs an identity process, every input is copied to the output directory,
+- -M macros and -N operator are accepted and logged, a 'delay' macro makes the process run for the given number of
+  seconds,
+- compressed exchange files are understood, the supported codecs are announced on startup, and -Z selects the codec of
+  the csv and file-like object files written to directories.
+
+Repository locations are mapped to files below the directory defined by the RAPIDMINER_FAKE_REPOSITORY environment
+variable (default: the 'repository' folder of the stand-in Studio home).
+"""
+import glob
+import gzip
+import os
+import shutil
+import sys
+import time
+
+SIDECAR_EXTENSIONS = (".pmd",)
+COMPRESSIBLE_EXTENSIONS = (".csv", ".fo")
+CODEC_SUFFIXES = {"gzip": ".gz", "lz4": ".lz4", "zstd": ".zst"}
+
+
+def codec_opener(codec):
+    if codec == "gzip":
+        return lambda filename, mode: gzip.open(filename, mode, compresslevel=1)
+    elif codec == "lz4":
+        import lz4.frame
+        return lz4.frame.open
+    elif codec == "zstd":
+        import zstandard
+        return zstandard.open
+    raise ValueError("Unknown codec " + str(codec))
+
+
+def available_codecs():
+    codecs = []
+    for codec in sorted(CODEC_SUFFIXES):
+        try:
+            codec_opener(codec)
+            codecs.append(codec)
+        except ImportError:
+            pass
+    return codecs
+
+
+def split_codec(filename):
+    for codec, suffix in CODEC_SUFFIXES.items():
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)], codec
+    return filename, None
+
+
+def open_file(filename, mode):
+    codec = split_codec(filename)[1]
+    return open(filename, mode) if codec is None else codec_opener(codec)(filename, mode)
+
+
+def unquote(arg):
+    if len(arg) >= 2 and arg.startswith('"') and arg.endswith('"'):
+        return arg[1:-1]
+    return arg
+
+
+def parse_args(argv):
+    options = {"I": [], "O": [], "M": []}
+    for arg in argv:
+        arg = unquote(arg)
+        if len(arg) < 2 or not arg.startswith("-"):
+            continue
+        key, value = arg[1], arg[2:]
+        if key in options and isinstance(options[key], list):
+            options[key].append(value)
+        else:
+            options[key] = value
+    return options
+
+
+def repository_root():
+    root = os.getenv("RAPIDMINER_FAKE_REPOSITORY")
+    if root is None or root == "":
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "studio_home", "repository")
+    return root
+
+
+def repository_path(location):
+    name = location[len("repositorylocation:"):].lstrip("/")
+    return os.path.join(repository_root(), *name.split("/"))
+
+
+def find_source(resource):
+    """
+    Returns the path of the data file behind a resource string (file:... or repositorylocation:...).
+    """
+    if resource.startswith("file:"):
+        return resource[len("file:"):]
+    candidates = [f for f in glob.glob(repository_path(resource) + ".*") if not f.endswith(SIDECAR_EXTENSIONS)]
+    if len(candidates) == 0:
+        raise IOError("Entry '" + resource + "' does not exist.")
+    return candidates[0]
+
+
+def copy_with_sidecars(source, target_base, codec=None):
+    base, extension = os.path.splitext(split_codec(source)[0])
+    target_dir = os.path.dirname(target_base)
+    if target_dir != "" and not os.path.isdir(target_dir):
+        os.makedirs(target_dir)
+    target = target_base + extension
+    if codec is not None and extension in COMPRESSIBLE_EXTENSIONS:
+        target += CODEC_SUFFIXES[codec]
+    if split_codec(source)[1] is None and split_codec(target)[1] is None:
+        shutil.copyfile(source, target)
+    else:
+        with open_file(source, "rb") as inf:
+            with open_file(target, "wb") as outf:
+                shutil.copyfileobj(inf, outf)
+    for sidecar in SIDECAR_EXTENSIONS:
+        if os.path.exists(base + sidecar):
+            shutil.copyfile(base + sidecar, target_base + sidecar)
+
+
+def target_base(resource, source):
+    if resource.startswith("file:"):
+        path = resource[len("file:"):]
+        if os.path.isdir(path):
+            return os.path.join(path, os.path.splitext(os.path.basename(split_codec(source)[0]))[0])
+        return os.path.splitext(path)[0]
+    return repository_path(resource)
+
+
+def main(argv):
+    options = parse_args(argv)
+    print("RAPIDMINER_COMPRESSION=" + ",".join(available_codecs()))
+    codec = options.get("Z")
+    for macro in options["M"]:
+        print("FINER: macro " + macro)
+        if macro.startswith("delay="):
+            sys.stdout.flush()
+            time.sleep(float(macro[len("delay="):]))
+    if "P" in options:
+        print("INFO: Running process " + options["P"] + (" up to operator " + options["N"] if "N" in options else ""))
+        for i, resource in enumerate(options["I"]):
+            copy_with_sidecars(find_source(resource), os.path.join(options["D"], "output" + str(i)), codec)
+    else:
+        if len(options["I"]) != len(options["O"]):
+            raise ValueError("Number of inputs and outputs differ.")
+        for source_resource, target_resource in zip(options["I"], options["O"]):
+            source = find_source(source_resource)
+            print("INFO: Copying " + source_resource + " to " + target_resource)
+            # the repository stores uncompressed entries, only files written to directories are compressed
+            copy_with_sidecars(source, target_base(target_resource, source),
+                               codec if target_resource.startswith("file:") and os.path.isdir(target_resource[len("file:"):]) else None)
+
+
+if __name__ == "__main__":
+    try:
+        main(sys.argv[1:])
+        print("EXIT_CODE=0")
+    except Exception as e:
+        print("RAPIDMINER_ERROR_MSG_FIRST_LINE=" + str(e))
+        print("EXIT_CODE=1")
+    sys.stdout.flush()
@@ -0,0 +1,229 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+"""
+Local HTTP stand-in for RapidMiner Server and the Real-Time Scoring agent, used by the benchmarks. It implements the
+endpoints used by the Server and Scoring classes:
+
+- GET  /internal/jaxrest/tokenservice   token service, returns an unsigned JWT
+- POST /api/rest/process/<webservice>   repository service webservice (test, load, save, del commands), loads
+                                        in table layout if requested, column oriented otherwise
+- GET  /api/rest/resources/<path>       process XML, an identity process with one input and one result port
+- POST /executions/jobs                 job submission, the job copies its inputs to its outputs
+- GET  /executions/jobs/<id>            job status
+- GET  /executions/queues               queue information
+- POST /services/<endpoint>             scoring, adds a prediction column to the data (table, records or split layout,
+                                        optionally gzip compressed)
+
+Run it standalone with 'python fake_server.py [port]', or start it in a background thread with start_server().
+"""
+import base64
+import gzip
+import io
+import json
+import sys
+import threading
+import time
+import uuid
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+import pandas as pd
+
+PROCESS_XML = """<?xml version="1.0" encoding="UTF-8"?><process version="9.3.000">
+  <context><input/><output/><macros/></context>
+  <operator activated="true" class="process" compatibility="9.3.000" expanded="true" name="Process">
+    <process expanded="true">
+      <connect from_port="input 1" to_port="result 1"/>
+      <portSpacing port="source_input 1" spacing="0"/>
+      <portSpacing port="sink_result 1" spacing="0"/>
+    </process>
+  </operator>
+</process>
+"""
+
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _token():
+    header = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode("utf-8"))
+    payload = _b64url(json.dumps({"sub": "benchmark", "iat": int(time.time())}).encode("utf-8"))
+    return header + "." + payload + "." + _b64url(b"signature")
+
+
+class FakeServerState(object):
+    def __init__(self, job_seconds=0.0, queues=("DEFAULT",), score_seconds=0.0):
+        self.lock = threading.Lock()
+        self.repository = {}
+        self.jobs = {}
+        self.job_seconds = job_seconds
+        self.queues = list(queues)
+        self.score_seconds = score_seconds
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length > 0 else b""
+
+    def do_GET(self):
+        state = self.server.state
+        path = self.path.split("?")[0]
+        if path == "/internal/jaxrest/tokenservice":
+            self._send(200, {"idToken": _token()})
+        elif path.startswith("/api/rest/resources/"):
+            self._send(200, PROCESS_XML.encode("utf-8"), content_type="application/xml")
+        elif path == "/executions/queues":
+            with state.lock:
+                running = [job for job in state.jobs.values() if job["finish"] > time.time()]
+            self._send(200, [{"name": queue, "running": len([j for j in running if j["queue"] == queue])} for queue in state.queues])
+        elif path.startswith("/executions/jobs/"):
+            jobid = path[len("/executions/jobs/"):]
+            with state.lock:
+                job = state.jobs.get(jobid)
+            if job is None:
+                self._send(404, {"error": {"type": "NotFound", "message": jobid}})
+            else:
+                self._send(200, {"id": jobid, "state": "FINISHED" if job["finish"] <= time.time() else "RUNNING"})
+        else:
+            self._send(404)
+
+    def do_POST(self):
+        state = self.server.state
+        path = self.path.split("?")[0]
+        body = self._body()
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        if path.startswith("/api/rest/process/"):
+            self._repository_service(state, json.loads(body.decode("utf-8")))
+        elif path.startswith("/api/rest/service/"):
+            self._send(200)
+        elif path.startswith("/api/rest/resources/"):
+            self._send(201)
+        elif path == "/executions/jobs":
+            self._submit(state, json.loads(body.decode("utf-8")))
+        elif path.startswith("/services/"):
+            time.sleep(state.score_seconds)
+            self._score(body)
+        else:
+            self._send(404)
+
+    def _repository_service(self, state, request):
+        command = request.get("command")
+        if command == "test":
+            self._send(200, {})
+        elif command == "save":
+            data = pd.read_json(io.StringIO(json.dumps(request["data"])), orient="table")
+            with state.lock:
+                state.repository[request["path"]] = data.to_json(orient="table", index=False).encode("utf-8")
+            self._send(200)
+        elif command == "load":
+            with state.lock:
+                data = state.repository.get(request["path"])
+            if data is None:
+                self._send(200, {"error": {"type": "NotFound", "message": "Entry " + request["path"] + " does not exist."}})
+            elif request.get("format") == "table":
+                self._send(200, data)
+            else:
+                self._send(200, pd.read_json(io.BytesIO(data), orient="table").to_json(orient="columns").encode("utf-8"))
+        elif command == "del":
+            with state.lock:
+                state.repository.pop(request["path"], None)
+            self._send(200)
+        else:
+            self._send(400, {"error": {"type": "BadRequest", "message": str(command)}})
+
+    def _submit(self, state, request):
+        context = request.get("context", {})
+        inputs = context.get("inputLocations", [])
+        outputs = context.get("outputLocations", [])
+        jobid = str(uuid.uuid4())
+        with state.lock:
+            for i, output in enumerate(outputs):
+                if len(inputs) > 0 and inputs[i % len(inputs)] in state.repository:
+                    state.repository[output] = state.repository[inputs[i % len(inputs)]]
+            state.jobs[jobid] = {"queue": request.get("queueName"), "finish": time.time() + state.job_seconds}
+        self._send(200, {"id": jobid})
+
+    def _score(self, body):
+        request = json.loads(body.decode("utf-8"))
+        if "schema" in request:
+            data = pd.read_json(io.BytesIO(body), orient="table")
+        elif isinstance(request["data"], dict):
+            data = pd.DataFrame(request["data"]["data"], columns=request["data"]["columns"])
+        else:
+            data = pd.DataFrame(request["data"])
+        data["prediction"] = 0
+        self._send(200, {"data": json.loads(data.to_json(orient="records"))})
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_server(port=0, job_seconds=0.0, score_seconds=0.0):
+    """
+    Starts the stand-in in a background thread.
+
+    :param port: port to listen on, 0 selects a free port.
+    :param job_seconds: time it takes for a submitted job to finish.
+    :param score_seconds: time it takes to answer a scoring request.
+    :return: tuple of the running server object and its base url.
+    """
+    server = _ThreadingServer(("127.0.0.1", port), _Handler)
+    server.state = FakeServerState(job_seconds=job_seconds, score_seconds=score_seconds)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, "http://127.0.0.1:" + str(server.server_address[1])
+
+
+if __name__ == "__main__":
+    server, url = start_server(int(sys.argv[1]) if len(sys.argv) > 1 else 8080)
+    print("Listening on " + url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,4 @@
+#!/bin/sh
+# Stand-in for the Studio batch launcher, see benchmarks/standins/fake_launcher.py
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+exec "${RAPIDMINER_FAKE_PYTHON:-python}" "$SCRIPT_DIR/../../fake_launcher.py" "$@"
@@ -14,8 +14,40 @@
 # You should have received a copy of the GNU Affero General Public License along with this program.
 # If not, see https://www.gnu.org/licenses/.
 # 
-from .core.studio import Studio
-from .core.server import Server
-from .core.scoring import Scoring
-from .core.resources import File
-from .core.resources import RepositoryLocation
\ No newline at end of file
+import sys
+import importlib
+
+# public names, and the modules defining them; modules are only imported when a name is first accessed, so that
+# importing the package stays cheap (pandas, requests, jwt etc. are loaded by the modules that need them)
+__LAZY_ATTRIBUTES = {
+    "Studio": ".core.studio",
+    "Server": ".core.server",
+    "ProcessResults": ".core.server",
+    "JobScheduler": ".core.scheduler",
+    "CircuitBreaker": ".core.resilience",
+    "Scoring": ".core.scoring",
+    "File": ".core.resources",
+    "RepositoryLocation": ".core.resources",
+    "SharedFrame": ".core.sharedframe",
+    "share_dataframe": ".core.sharedframe",
+    "Instrumentation": ".core.instrumentation",
+    "CallbackInstrumentation": ".core.instrumentation",
+    "StatsInstrumentation": ".core.instrumentation",
+}
+
+__all__ = list(__LAZY_ATTRIBUTES)
+
+def __getattr__(name):
+    if name in __LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(__LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+
+def __dir__():
+    return sorted(set(globals()) | set(__LAZY_ATTRIBUTES))
+
+if sys.version_info < (3, 7):
+    # module level __getattr__ is not supported, import everything
+    for __name in __LAZY_ATTRIBUTES:
+        globals()[__name] = __getattr__(__name)
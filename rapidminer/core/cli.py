@@ -0,0 +1,316 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+"""
+Command line interface of the rapidminer package.
+
+    rapidminer copy SOURCE... TARGET     copies data between local files, Studio and Server repositories
+    rapidminer run PROCESS               runs a process with Studio or Server
+    rapidminer score URL ENDPOINT SOURCE... TARGET
+                                         scores data with a Real-Time Scoring agent
+
+Sources and targets are given as specs: 'studio:<repository location>', 'server:<repository path>', or a local file
+path (optionally prefixed with 'file:'). Local file sources may contain glob patterns. If there are multiple sources or
+the target ends with '/', the target is a folder, and the name of each source is appended to it. Local process files
+are run with Studio.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+__STUDIO_PREFIX = "studio:"
+__SERVER_PREFIX = "server:"
+__FILE_PREFIX = "file:"
+__GLOB_CHARS = ("*", "?", "[")
+
+
+def _parse_spec(spec):
+    """
+    Splits a source or target spec into its kind (file, studio or server) and path.
+    """
+    for kind, prefix in (("studio", __STUDIO_PREFIX), ("server", __SERVER_PREFIX), ("file", __FILE_PREFIX)):
+        if spec.startswith(prefix):
+            return (kind, spec[len(prefix):])
+    return ("file", spec)
+
+
+def _expand_sources(specs):
+    sources = []
+    for spec in specs:
+        kind, path = _parse_spec(spec)
+        if kind == "file" and any(c in path for c in __GLOB_CHARS):
+            sources += [(kind, p) for p in sorted(glob.glob(path))]
+        else:
+            sources.append((kind, path))
+    return sources
+
+
+def _name(path):
+    return os.path.splitext(os.path.basename(path.rstrip("/")))[0]
+
+
+def _targets(sources, target_spec, file_format):
+    kind, path = _parse_spec(target_spec)
+    if len(sources) == 1 and not path.endswith("/") and not (kind == "file" and os.path.isdir(path)):
+        return [(kind, path)]
+    if kind == "file":
+        return [(kind, os.path.join(path, _name(source) + "." + file_format)) for (_, source) in sources]
+    return [(kind, path.rstrip("/") + "/" + _name(source)) for (_, source) in sources]
+
+
+def _read_file(path, columns=None):
+    import pandas
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        return pandas.read_parquet(path, columns=columns)
+    elif extension in (".feather", ".arrow"):
+        return pandas.read_feather(path, columns=columns)
+    return pandas.read_csv(path, usecols=columns)
+
+
+def _write_file(df, path):
+    directory = os.path.dirname(path)
+    if directory != "" and not os.path.isdir(directory):
+        os.makedirs(directory)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        df.to_parquet(path, index=False)
+    elif extension in (".feather", ".arrow"):
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+
+
+class _Connectors(object):
+    """
+    Creates the Studio and Server connectors on first use, and shares them between the worker threads.
+    """
+    def __init__(self, args):
+        self.args = args
+        self.__lock = threading.Lock()
+        self.__connectors = {}
+
+    def get(self, kind):
+        with self.__lock:
+            if kind not in self.__connectors:
+                loglevel = logging.WARNING if not self.args.verbose else logging.INFO
+                if kind == "studio":
+                    from .studio import Studio
+                    self.__connectors[kind] = Studio(self.args.studio_home, loglevel=loglevel)
+                elif kind == "server":
+                    from .server import Server
+                    if self.args.server_url is None:
+                        raise ValueError("--server-url is required for server specs.")
+                    password = self.args.password if self.args.password is not None else os.getenv("RAPIDMINER_PASSWORD")
+                    kwargs = {"password": password} if password is not None else {}
+                    self.__connectors[kind] = Server(self.args.server_url, username=self.args.username, loglevel=loglevel, **kwargs)
+            return self.__connectors[kind]
+
+    def read(self, kind, path):
+        if kind == "file":
+            return _read_file(path)
+        return self.get(kind).read_resource(path)
+
+    def write(self, df, kind, path):
+        if kind == "file":
+            _write_file(df, path)
+        else:
+            self.get(kind).write_resource(df, path)
+
+
+class _ResumeState(object):
+    """
+    Keeps the keys of the completed transfers in a JSON file, so that an interrupted batch can be resumed.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.__lock = threading.Lock()
+        self.completed = set()
+        if filename is not None and os.path.exists(filename):
+            with open(filename) as f:
+                self.completed = set(json.load(f))
+
+    def done(self, key):
+        with self.__lock:
+            self.completed.add(key)
+            if self.filename is not None:
+                with open(self.filename + ".tmp", "w") as f:
+                    json.dump(sorted(self.completed), f)
+                os.replace(self.filename + ".tmp", self.filename)
+
+
+def _run_batch(tasks, workers, state):
+    """
+    Runs (key, function) tasks in a bounded worker pool, skipping the ones completed earlier. Every function returns
+    a (rows, bytes) tuple, any of them may be None. Prints the throughput of every task and a summary.
+
+    :return: the exit status, 1 if any task failed, 0 otherwise.
+    """
+    pending = [(key, f) for (key, f) in tasks if key not in state.completed]
+    if len(pending) < len(tasks):
+        print("Skipping " + str(len(tasks) - len(pending)) + " completed transfer(s).")
+    totals = {"rows": 0, "bytes": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def run(key, f):
+        start = perf_counter()
+        try:
+            rows, size = f()
+        except Exception as e:
+            with lock:
+                totals["failed"] += 1
+            print("FAILED " + key + ": " + str(e))
+            return
+        elapsed = perf_counter() - start
+        state.done(key)
+        with lock:
+            totals["rows"] += rows or 0
+            totals["bytes"] += size or 0
+        details = (str(rows) + " rows, " + "%.0f rows/s" % (rows / elapsed if elapsed > 0 else 0)) if rows is not None else (str(size) + " bytes")
+        print(key + ": " + details + " in " + "%.2fs" % elapsed)
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for (key, f) in pending:
+            executor.submit(run, key, f)
+    elapsed = perf_counter() - start
+    print("Done: " + str(len(pending) - totals["failed"]) + " succeeded, " + str(totals["failed"]) + " failed, "
+          + str(totals["rows"]) + " rows" + (" and " + str(totals["bytes"]) + " bytes" if totals["bytes"] > 0 else "")
+          + " in " + "%.2fs" % elapsed
+          + (" (%.0f rows/s)" % (totals["rows"] / elapsed) if elapsed > 0 else ""))
+    # not the number of failures, exit statuses wrap around at 256
+    return 1 if totals["failed"] > 0 else 0
+
+
+def _copy(args):
+    connectors = _Connectors(args)
+    sources = _expand_sources(args.sources)
+    if len(sources) == 0:
+        print("No sources found.")
+        return 1
+    targets = _targets(sources, args.target, args.format)
+
+    def transfer(source, target):
+        (source_kind, source_path), (target_kind, target_path) = source, target
+        if source_kind == "file" and target_kind == "file" \
+                and os.path.splitext(source_path)[1].lower() == os.path.splitext(target_path)[1].lower():
+            # same format, stream the file instead of parsing it
+            directory = os.path.dirname(target_path)
+            if directory != "" and not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            return (None, os.path.getsize(target_path))
+        df = connectors.read(source_kind, source_path)
+        connectors.write(df, target_kind, target_path)
+        return (len(df), None)
+
+    tasks = [(s[0] + ":" + s[1] + " -> " + t[0] + ":" + t[1], (lambda s=s, t=t: transfer(s, t)))
+             for (s, t) in zip(sources, targets)]
+    return _run_batch(tasks, args.workers, _ResumeState(args.resume))
+
+
+def _run(args):
+    connectors = _Connectors(args)
+    kind, process = _parse_spec(args.process)
+    if kind == "file":
+        # Server only runs processes from its repository, local process files are run with Studio
+        if args.server_url is not None and args.studio_home is None and "RAPIDMINER_HOME" not in os.environ:
+            raise ValueError("Local process files can only be run with Studio, use a 'server:' spec for Server processes.")
+        from .resources import File
+        kind, process = "studio", File(process)
+    inputs = [connectors.read(*_parse_spec(spec)) for spec in args.input]
+    macros = dict(macro.split("=", 1) for macro in args.macro)
+    kwargs = {"macros": macros}
+    if kind == "server" and args.queue is not None:
+        kwargs["queue"] = args.queue
+    start = perf_counter()
+    results = connectors.get(kind).run_process(process, inputs=inputs, **kwargs)
+    print("Process finished in " + "%.2fs" % (perf_counter() - start) + " with " + str(len(results)) + " result(s).")
+    for spec, result in zip(args.output, results):
+        target_kind, target_path = _parse_spec(spec)
+        connectors.write(result, target_kind, target_path)
+        print("Result written to " + spec)
+    return 0
+
+
+def _score(args):
+    from .scoring import Scoring
+    connectors = _Connectors(args)
+    scoring = Scoring(args.url, args.endpoint)
+    sources = _expand_sources(args.sources)
+    targets = _targets(sources, args.target, args.format)
+
+    def score(source, target):
+        df = connectors.read(*source)
+        connectors.write(scoring.predict(df), *target)
+        return (len(df), None)
+
+    tasks = [(s[0] + ":" + s[1] + " -> " + t[0] + ":" + t[1], (lambda s=s, t=t: score(s, t)))
+             for (s, t) in zip(sources, targets)]
+    return _run_batch(tasks, args.workers, _ResumeState(args.resume))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="rapidminer", description="Bulk data transfer, process execution and scoring with RapidMiner.")
+    parser.add_argument("--studio-home", default=None, help="Studio installation directory, default is RAPIDMINER_HOME.")
+    parser.add_argument("--server-url", default=None, help="RapidMiner Server url.")
+    parser.add_argument("--username", default=None, help="RapidMiner Server username.")
+    parser.add_argument("--password", default=None, help="RapidMiner Server password, default is RAPIDMINER_PASSWORD.")
+    parser.add_argument("--verbose", action="store_true", help="log the output of Studio and Server.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    copy = subparsers.add_parser("copy", help="copy data between local files, Studio and Server repositories.")
+    copy.add_argument("sources", nargs="+", help="source specs, local file specs may contain glob patterns.")
+    copy.add_argument("target", help="target spec, a folder if there are multiple sources.")
+    run = subparsers.add_parser("run", help="run a process with Studio or Server.")
+    run.add_argument("process", help="process spec, e.g. studio://Local Repository/processes/p1")
+    run.add_argument("--input", action="append", default=[], help="input spec, can be used multiple times.")
+    run.add_argument("--output", action="append", default=[], help="target spec for the results, in order.")
+    run.add_argument("--macro", action="append", default=[], help="macro as name=value, can be used multiple times.")
+    run.add_argument("--queue", default=None, help="Server queue to use.")
+    score = subparsers.add_parser("score", help="score data with a Real-Time Scoring agent.")
+    score.add_argument("url", help="url of the scoring agent.")
+    score.add_argument("endpoint", help="scoring service endpoint.")
+    score.add_argument("sources", nargs="+", help="source specs, local file specs may contain glob patterns.")
+    score.add_argument("target", help="target spec, a folder if there are multiple sources.")
+    for subparser in (copy, score):
+        subparser.add_argument("--workers", type=int, default=4, help="number of parallel transfers, default is 4.")
+        subparser.add_argument("--resume", default=None, metavar="STATEFILE",
+                               help="file recording the completed transfers, these are skipped when the command is repeated.")
+        subparser.add_argument("--format", default="csv", choices=("csv", "parquet", "feather"),
+                               help="file format of local targets in a folder, default is csv.")
+    args = parser.parse_args(argv)
+
+    if args.command == "copy":
+        return _copy(args)
+    elif args.command == "run":
+        return _run(args)
+    elif args.command == "score":
+        return _score(args)
+    parser.print_help()
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
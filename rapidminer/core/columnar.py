@@ -0,0 +1,110 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import json
+import os
+from .utilities import GeneralException
+
+COLUMNAR_SUFFIXES = (".parquet", ".feather", ".arrow")
+_RM_METADATA_KEY = b"rapidminer.rm_metadata"
+
+def is_columnar_file(filename):
+    """
+    Tests, if the given file is a Parquet, Feather or Arrow IPC file, based on its extension.
+
+    :param filename: name of the file.
+    :return: True, if the file has one of the .parquet, .feather or .arrow extensions.
+    """
+    return os.path.splitext(filename)[1].lower() in COLUMNAR_SUFFIXES
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        return pyarrow
+    except ImportError:
+        raise GeneralException("Reading and writing Parquet, Feather and Arrow files requires the pyarrow package.")
+
+def _filter_expression(pyarrow, filters):
+    """
+    Converts filters in the DNF form used by pandas.read_parquet (e.g. [("year", ">=", 2019)]) to a dataset expression.
+    """
+    if filters is None or not isinstance(filters, (list, tuple)):
+        return filters
+    import pyarrow.parquet
+    if hasattr(pyarrow.parquet, "filters_to_expression"):
+        return pyarrow.parquet.filters_to_expression(filters)
+    return pyarrow.parquet._filters_to_expression(filters)
+
+def read_columnar(filename, columns=None, filters=None):
+    """
+    Reads a Parquet, Feather or Arrow IPC file. Column projection and filters are pushed down to the reader, so that
+    only the selected columns, and for Parquet, only the matching row groups are read.
+
+    :param filename: name of the file.
+    :param columns: optional list of column names to read.
+    :param filters: optional row filter, either in the DNF form of pandas.read_parquet (list of (column, op, value)
+                    tuples, or list of such lists), or a pyarrow.dataset.Expression.
+    :return: tuple of the pandas DataFrame and the rm_metadata stored in the file (None, if not present).
+    """
+    pyarrow = _import_pyarrow()
+    file_format = "parquet" if filename.lower().endswith(".parquet") else "ipc"
+    dataset = pyarrow.dataset.dataset(filename, format=file_format)
+    table = dataset.to_table(columns=columns, filter=_filter_expression(pyarrow, filters))
+    metadata = None
+    if dataset.schema.metadata is not None and _RM_METADATA_KEY in dataset.schema.metadata:
+        metadata = dict((key, tuple(value)) for key, value in json.loads(dataset.schema.metadata[_RM_METADATA_KEY].decode("utf-8")).items()
+                        if columns is None or key in columns)
+    return (table.to_pandas(), metadata)
+
+def read_columnar_schema(filename):
+    """
+    Reads the schema and the number of rows of a Parquet, Feather or Arrow IPC file, without reading the data. For
+    Parquet files, the number of rows is taken from the file footer.
+
+    :param filename: name of the file.
+    :return: tuple of an empty pandas DataFrame with the columns of the file, the rm_metadata stored in the file (None, if not present) and the number of rows.
+    """
+    pyarrow = _import_pyarrow()
+    file_format = "parquet" if filename.lower().endswith(".parquet") else "ipc"
+    dataset = pyarrow.dataset.dataset(filename, format=file_format)
+    metadata = None
+    if dataset.schema.metadata is not None and _RM_METADATA_KEY in dataset.schema.metadata:
+        metadata = dict((key, tuple(value)) for key, value in json.loads(dataset.schema.metadata[_RM_METADATA_KEY].decode("utf-8")).items())
+    return (dataset.schema.empty_table().to_pandas(), metadata, dataset.count_rows())
+
+def write_columnar(df, filename, metadata=None):
+    """
+    Writes a pandas DataFrame to a Parquet, Feather or Arrow IPC file, based on the extension of the file.
+
+    :param df: the pandas DataFrame.
+    :param filename: name of the file.
+    :param metadata: optional rm_metadata dict, stored in the schema of the file.
+    :return: the size of the written file in bytes.
+    """
+    pyarrow = _import_pyarrow()
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    if metadata is not None:
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[_RM_METADATA_KEY] = json.dumps(metadata).encode("utf-8")
+        table = table.replace_schema_metadata(schema_metadata)
+    if filename.lower().endswith(".parquet"):
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(table, filename)
+    else:
+        import pyarrow.feather
+        pyarrow.feather.write_feather(table, filename)
+    return os.path.getsize(filename)
@@ -17,7 +17,18 @@
 import json
 import logging
 import sys
+import os
 import threading
+import itertools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+try:
+    import cPickle as pickle
+except:
+    import pickle
+from .instrumentation import Instrumentation
+from .schemacache import SchemaCache
+from .schemacache import describe_dataframe
 
 class Connector(object):
     """
@@ -25,6 +36,7 @@ class Connector(object):
     """
     __id_counter__ = 0
     __lock__ = threading.Lock()
+    __NOOP_INSTRUMENTATION = Instrumentation()
 
 
     def __init__(self, **kwargs):
@@ -34,6 +46,13 @@ class Connector(object):
                         stdout.
         :param loglevel: the loglevel, as an int value. Common values are defined in the standard logging module. Only
                         used, if logger is not defined.
+        :param instrumentation: an Instrumentation object that records the phases of the calls (e.g. a
+                        StatsInstrumentation). By default nothing is recorded.
+        :param schema_cache: path of a local directory, where the schema of the resources read is cached, so that it
+                        is shared by processes and kept across sessions. By default the schema is only cached in memory.
+                        Set to False to disable the cache.
+        :param schema_cache_ttl: number of seconds a cached schema is valid for, if the modification time of the
+                        resource can not be determined. Default value is 60.
         """
         Connector.__lock__.acquire()
         try:
@@ -54,6 +73,15 @@ class Connector(object):
             self.logger = logging.getLogger(self.__class__.__name__ + "@" + str(self.__id__))
             self.logger.setLevel(lglvl)
             self.logger.addHandler(syslog)
+        if "instrumentation" in kwargs and kwargs["instrumentation"] is not None:
+            self._instrumentation = kwargs["instrumentation"]
+        else:
+            self._instrumentation = Connector.__NOOP_INSTRUMENTATION
+        if "schema_cache" in kwargs and kwargs["schema_cache"] is False:
+            self._schema_cache = None
+        else:
+            self._schema_cache = SchemaCache(directory=kwargs["schema_cache"] if "schema_cache" in kwargs else None,
+                                             ttl=kwargs["schema_cache_ttl"] if "schema_cache_ttl" in kwargs else 60)
 
     def log(self, msg, level=logging.INFO, source="python"):
         """
@@ -66,11 +94,13 @@ class Connector(object):
         """
         self.logger.log(msg=msg.strip(), level=level, extra={"source": source})
 
-    def read_resource(self, input):
+    def read_resource(self, input, columns=None, filter=None):
         """
         Reads the resource from the given repository location/file
 
         :param input: the path(s) to the resource(s). If no extension is specified, the path is treated as a repository location. If file extension is specified, it is treated as a file.
+        :param columns: optional list of columns to read. Other columns are dropped as early as possible.
+        :param filter: optional row filter, a list of (column, operator, value) tuples that must all hold, or a list of such lists, any of which must hold. Supported operators are ==, !=, <, <=, >, >=, in and not in. A function that takes a DataFrame and returns a boolean mask is accepted as well.
         :return: the resource(s) as a pandas DataFrame(s). If multiple inputs are specified, the same number of inputs will be returned, as tuple of DataFrame objects.
         """
         raise NotImplementedError("Method not implemented in base class.")
@@ -85,6 +115,16 @@ class Connector(object):
         raise NotImplementedError("Method not implemented in base class.")
 
 
+    def describe_resource(self, path):
+        """
+        Describes a data table resource, without reading its data, if its schema is cached and the resource has not
+        changed since. Otherwise the resource is read, and its schema is cached.
+
+        :param path: the path to the resource.
+        :return: dict with the column names ('columns'), the pandas dtype of every column as a string ('dtypes'), the rm_metadata of the columns ('rm_metadata', None if not known) and the number of rows ('rows').
+        """
+        raise NotImplementedError("Method not implemented in base class.")
+
     def run_process(self, path, inputs=None, **kwargs):
         """
         Runs a RapidMiner process.
@@ -99,6 +139,115 @@ class Connector(object):
         """
         raise NotImplementedError("Method not implemented in base class.")
 
+    def run_process_grid(self, path, inputs=None, macro_grid=None, **kwargs):
+        """
+        Runs a RapidMiner process for every combination of macro values. The inputs are prepared only once, and shared by the runs, which are executed in parallel.
+
+        Arguments:
+        :param path: path to the RapidMiner process.
+        :param inputs: inputs used by the RapidMiner process, as a list of pandas DataFrame objects or a single pandas DataFrame.
+        :param macro_grid: dict of macro name to the list of its values, or a list of dicts, each defining the macros of one run.
+
+        Possible kwargs arguments:
+        :param workers: the number of runs executed in parallel. Default is 4.
+        :param resume: path of a local directory, where the results of the finished runs are stored. If the grid is run again with the same directory, the same process and the same inputs, the stored results are reused, and only the missing runs are executed.
+        :return: dict of the tuple of macro values (in the order of the macro names in macro_grid) to the results of the run, as returned by run_process.
+        """
+        raise NotImplementedError("Method not implemented in base class.")
+
+    def _describe_data(self, key, stamp, data):
+        """
+        Returns the schema of a resource read by describe_resource, and caches it.
+
+        :param key: the schema cache key of the resource.
+        :param stamp: the modification stamp of the resource, taken before it was read, or None.
+        :param data: the resource, as a pandas DataFrame or a SharedFrame.
+        :return: the schema, see describe_resource.
+        """
+        if hasattr(data, "to_dataframe"):
+            data = data.to_dataframe()
+        if not hasattr(data, "dtypes"):
+            raise ValueError("Resource '" + str(key) + "' is not a data table.")
+        if self._schema_cache is None:
+            return describe_dataframe(data)
+        return self._schema_cache.store(key, stamp, data)
+
+    def _grid_points(self, macro_grid):
+        """
+        Expands a macro grid to the list of macro combinations.
+
+        :param macro_grid: dict of macro name to the list of its values, or a list of dicts, each defining the macros of one run.
+        :return: tuple of the list of macro names, and the list of macro dicts.
+        """
+        if isinstance(macro_grid, dict):
+            for name, values in macro_grid.items():
+                if isinstance(values, str) or not hasattr(values, "__iter__"):
+                    raise ValueError("The values of macro '" + str(name) + "' must be a list. (now: " + str(type(values)) + ")")
+            names = list(macro_grid)
+            points = [dict(zip(names, values)) for values in itertools.product(*[macro_grid[name] for name in names])]
+        else:
+            if not isinstance(macro_grid, (list, tuple)) or not all(isinstance(point, dict) for point in macro_grid):
+                raise ValueError("'macro_grid' must be a dict of macro name to a list of values, or a list of dicts. (now: " + str(type(macro_grid)) + ")")
+            points = [dict(point) for point in macro_grid]
+            names = list(points[0]) if len(points) > 0 else []
+            if any(set(point) != set(names) for point in points):
+                raise ValueError("All macro dicts of the grid must define the same macros.")
+        return (names, points)
+
+    def _run_grid(self, names, points, run_point, workers=4, resume=None, context=None):
+        """
+        Calls run_point for every macro combination in parallel. Results are stored in the resume directory as soon as they are available. If a run fails, the remaining runs are still finished, then the first error is raised.
+
+        :param names: the list of macro names.
+        :param points: the list of macro dicts.
+        :param run_point: function that takes a macro dict and returns the results of the run.
+        :param workers: the number of runs executed in parallel.
+        :param resume: path of a local directory for storing the results, or None.
+        :param context: JSON serializable value identifying the process and its inputs (e.g. the process path and the content hashes of the inputs). Stored results are only reused for the same context.
+        :return: dict of the tuple of macro values to the results.
+        """
+        results = {}
+        missing = {}
+        for point in points:
+            key = tuple(point[name] for name in names)
+            stored_file = self.__grid_point_file(resume, context, point)
+            if stored_file is not None and os.path.exists(stored_file):
+                with open(stored_file, "rb") as f:
+                    results[key] = pickle.load(f)
+            else:
+                missing[key] = point
+        if resume is not None and not os.path.isdir(resume):
+            os.makedirs(resume)
+        error = None
+        if len(missing) > 0:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = dict((executor.submit(run_point, point), (key, point)) for (key, point) in missing.items())
+                while len(pending) > 0:
+                    (done, _) = wait(list(pending), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        (key, point) = pending.pop(future)
+                        if future.exception() is not None:
+                            error = future.exception() if error is None else error
+                            continue
+                        results[key] = future.result()
+                        if resume is not None:
+                            self.__store_grid_point(self.__grid_point_file(resume, context, point), results[key])
+        if error is not None:
+            raise error
+        return dict((key, results[key]) for key in [tuple(point[name] for name in names) for point in points])
+
+    def __grid_point_file(self, resume, context, point):
+        if resume is None:
+            return None
+        key = json.dumps([context, point], sort_keys=True, default=str).encode("utf-8")
+        return os.path.join(resume, hashlib.sha1(key).hexdigest() + ".pkl")
+
+    def __store_grid_point(self, filename, result):
+        # write to a temporary file first, so that an interrupted write does not leave a partial result behind
+        with open(filename + ".tmp", "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(filename + ".tmp", filename)
+
     def _suppress_pandas_warning(self, f):
         try:
             import warnings
@@ -198,6 +347,8 @@ class Connector(object):
                     meta_type = 'date_time'
                 elif kind_char in ('b'):
                     meta_type = 'binominal'
+                elif str(data.dtypes[name]) == 'category' and len(data.dtypes[name].categories) == 2:
+                    meta_type = 'binominal'
                 else:
                     meta_type = 'polynomial'
             metadata[name] = [meta_type, meta_role]
@@ -207,6 +358,82 @@ class Connector(object):
         except Exception as e:
             self.log("Failed to send meta data from Python script to RapidMiner (reason: " + str(e) + ").", level=logging.WARNING)
 
+    def _shape_attributes(self, data):
+        """
+        Returns the row and column counts of a DataFrame as instrumentation attributes.
+
+        :param data: a pandas DataFrame or any other object.
+        :return: dict with rows and columns values, or an empty dict if data is not two-dimensional.
+        """
+        shape = getattr(data, "shape", None)
+        if isinstance(shape, tuple) and len(shape) == 2:
+            return {"rows": shape[0], "columns": shape[1]}
+        return {}
+
+    __FILTER_OPERATORS = {
+        "==": lambda column, value: column == value,
+        "=": lambda column, value: column == value,
+        "!=": lambda column, value: column != value,
+        "<": lambda column, value: column < value,
+        "<=": lambda column, value: column <= value,
+        ">": lambda column, value: column > value,
+        ">=": lambda column, value: column >= value,
+        "in": lambda column, value: column.isin(value),
+        "not in": lambda column, value: ~column.isin(value),
+    }
+
+    def _normalize_filter(self, filter):
+        """
+        Converts a row filter to disjunctive normal form: a list of lists of (column, operator, value) tuples.
+
+        :param filter: None, a function, a list of tuples or a list of lists of tuples.
+        :return: the filter in normal form, or the filter itself if it is None or a function.
+        """
+        if filter is None or callable(filter):
+            return filter
+        if len(filter) > 0 and isinstance(filter[0], tuple):
+            filter = [filter]
+        for conjunction in filter:
+            for (_, operator, _) in conjunction:
+                if operator not in self.__FILTER_OPERATORS:
+                    raise ValueError("Unsupported filter operator: '" + str(operator) + "'.")
+        return [list(conjunction) for conjunction in filter]
+
+    def _filter_columns(self, filter):
+        """
+        Returns the names of the columns used by a row filter.
+
+        :param filter: the row filter, see read_resource.
+        :return: list of column names, empty for functions.
+        """
+        filter = self._normalize_filter(filter)
+        if filter is None or callable(filter):
+            return []
+        return [name for conjunction in filter for (name, _, _) in conjunction]
+
+    def _apply_filter(self, df, filter):
+        """
+        Returns the rows of a DataFrame matching a row filter.
+
+        :param df: a pandas DataFrame.
+        :param filter: the row filter, see read_resource.
+        :return: the filtered DataFrame.
+        """
+        filter = self._normalize_filter(filter)
+        if filter is None:
+            return df
+        if callable(filter):
+            return df[filter(df)]
+        mask = None
+        for conjunction in filter:
+            conjunction_mask = None
+            for (name, operator, value) in conjunction:
+                condition = self.__FILTER_OPERATORS[operator](df[name], value)
+                conjunction_mask = condition if conjunction_mask is None else conjunction_mask & condition
+            if conjunction_mask is not None:
+                mask = conjunction_mask if mask is None else mask | conjunction_mask
+        return df if mask is None else df[mask]
+
     def _set_metadata(self, df, metadata):
         df.rm_metadata = metadata
 
@@ -0,0 +1,113 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import gzip
+import io
+import os
+from .utilities import GeneralException
+
+# codecs for the files exchanged with the Studio launcher, and the suffixes of the compressed files
+CODEC_SUFFIXES = {"gzip": ".gz", "lz4": ".lz4", "zstd": ".zst"}
+# payloads below this size are not compressed, and below the second one the faster codec is preferred
+_UNCOMPRESSED_LIMIT = 1024 * 1024
+_FAST_CODEC_LIMIT = 64 * 1024 * 1024
+_FAST_CODECS = ("lz4", "zstd", "gzip")
+_COMPACT_CODECS = ("zstd", "lz4", "gzip")
+
+def _codec_module(codec):
+    try:
+        if codec == "lz4":
+            import lz4.frame
+            return lz4.frame
+        elif codec == "zstd":
+            import zstandard
+            return zstandard
+        elif codec == "gzip":
+            return gzip
+    except ImportError:
+        raise GeneralException("Codec '" + codec + "' requires the " + ("lz4" if codec == "lz4" else "zstandard") + " package.")
+    raise ValueError("Unknown codec '" + str(codec) + "', use one of " + ", ".join(sorted(CODEC_SUFFIXES)) + ".")
+
+def available_codecs():
+    """
+    Returns the set of codecs, that can be used in this Python environment.
+    """
+    codecs = set()
+    for codec in CODEC_SUFFIXES:
+        try:
+            _codec_module(codec)
+            codecs.add(codec)
+        except GeneralException:
+            pass
+    return codecs
+
+def codec_of(filename):
+    """
+    Returns the codec of a compressed exchange file, based on its suffix, or None, if the file is not compressed.
+    """
+    for codec, suffix in CODEC_SUFFIXES.items():
+        if filename.endswith(suffix):
+            return codec
+    return None
+
+def strip_codec(filename):
+    """
+    Returns the filename without the suffix of the codec, e.g. 'input0.csv' for 'input0.csv.zst'.
+    """
+    codec = codec_of(filename)
+    return filename[:-len(CODEC_SUFFIXES[codec])] if codec is not None else filename
+
+def choose_codec(size, codecs, preferred=None):
+    """
+    Chooses the codec for a payload.
+
+    :param size: the estimated size of the payload in bytes, None if unknown.
+    :param codecs: the set of codecs supported by both sides.
+    :param preferred: a codec name, to use that one if supported, or None to choose by the size: small payloads are not compressed, medium ones with the fastest codec, large ones with the most compact codec.
+    :return: the codec name, or None for no compression.
+    """
+    if preferred is not None:
+        return preferred if preferred in codecs else None
+    if size is not None and size < _UNCOMPRESSED_LIMIT:
+        return None
+    order = _FAST_CODECS if size is None or size < _FAST_CODEC_LIMIT else _COMPACT_CODECS
+    for codec in order:
+        if codec in codecs:
+            return codec
+    return None
+
+def open_exchange_file(filename, mode="rb", encoding=None):
+    """
+    Opens an exchange file, compressed or not, based on its suffix.
+
+    :param filename: name of the file.
+    :param mode: 'rb', 'wb', 'r' or 'w'. Text modes require the encoding.
+    :param encoding: encoding of text modes.
+    :return: a file object.
+    """
+    codec = codec_of(filename)
+    binary_mode = mode[0] + "b"
+    if codec is None:
+        stream = open(filename, binary_mode)
+    elif codec == "gzip":
+        # compression level 1, the exchange files are written once and read once; no timestamp in the header, so that
+        # the same content gives the same file (inputs are identified by their file hash)
+        stream = gzip.GzipFile(filename, binary_mode, compresslevel=1, mtime=0)
+    else:
+        stream = _codec_module(codec).open(filename, binary_mode)
+    if "b" in mode:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding)
@@ -0,0 +1,164 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import threading
+from time import perf_counter
+
+class Span(object):
+    """
+    A timed phase of a connector call. Used as a context manager, the elapsed time is recorded when the block exits.
+    Attributes like byte, row and column counts can be attached with the set method.
+    """
+    enabled = True
+
+    def __init__(self, instrumentation, phase, attributes):
+        self.instrumentation = instrumentation
+        self.phase = phase
+        self.attributes = attributes
+        self.__start = None
+
+    def set(self, **attributes):
+        """
+        Attaches attributes to the span, e.g. bytes=1024, rows=10, columns=2.
+        """
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.__start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.instrumentation.record(self.phase, perf_counter() - self.__start, self.attributes)
+
+
+class _NoopSpan(object):
+    enabled = False
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Instrumentation(object):
+    """
+    Base class for recording the phases of connector calls. This default implementation does nothing, and adds no
+    measurable overhead. Subclasses should override the record method.
+
+    Phases recorded by the connectors:
+    - Studio: studio.serialize, studio.spawn, studio.run, studio.deserialize
+    - Server: server.upload, server.submit, server.queue_wait, server.execution, server.download, server.retry
+    - Scoring: scoring.encode, scoring.request, scoring.decode
+    """
+    enabled = False
+
+    def span(self, phase, **attributes):
+        """
+        Returns a context manager that measures the time of a phase.
+
+        :param phase: name of the phase.
+        :param attributes: initial attributes of the span.
+        :return: a Span object.
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, phase, attributes)
+
+    def record(self, phase, seconds, attributes):
+        """
+        Records a finished phase.
+
+        :param phase: name of the phase.
+        :param seconds: elapsed time in seconds.
+        :param attributes: dict of attributes of the phase, e.g. bytes, rows, columns.
+        """
+        pass
+
+
+class CallbackInstrumentation(Instrumentation):
+    """
+    Calls a function for every finished phase, with the phase name, the elapsed seconds and the attributes dict as arguments.
+    """
+    enabled = True
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def record(self, phase, seconds, attributes):
+        self.callback(phase, seconds, attributes)
+
+
+class StatsInstrumentation(Instrumentation):
+    """
+    Aggregates the phases of connector calls: number of calls, total, minimum and maximum time, and the sum of the
+    byte, row and column counts per phase. Can be shared by multiple connectors, and is safe to use from multiple threads.
+    """
+    enabled = True
+    __COUNTERS = ("bytes", "rows", "columns")
+
+    def __init__(self, callback=None):
+        """
+        :param callback: optional function, that is called for every finished phase as well (see CallbackInstrumentation).
+        """
+        self.callback = callback
+        self.__lock = threading.Lock()
+        self.__stats = {}
+
+    def record(self, phase, seconds, attributes):
+        with self.__lock:
+            if phase not in self.__stats:
+                self.__stats[phase] = {"count": 0, "errors": 0, "total_seconds": 0.0, "min_seconds": seconds, "max_seconds": seconds,
+                                       "bytes": 0, "rows": 0, "columns": 0}
+            stats = self.__stats[phase]
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+            stats["min_seconds"] = min(stats["min_seconds"], seconds)
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            if "error" in attributes:
+                stats["errors"] += 1
+            for counter in self.__COUNTERS:
+                if counter in attributes:
+                    stats[counter] += attributes[counter]
+        if self.callback is not None:
+            self.callback(phase, seconds, attributes)
+
+    def stats(self):
+        """
+        Returns the aggregated statistics.
+
+        :return: dict of phase name to a dict with count, errors, total_seconds, mean_seconds, min_seconds, max_seconds, bytes, rows and columns values.
+        """
+        with self.__lock:
+            result = {}
+            for phase, stats in self.__stats.items():
+                result[phase] = dict(stats)
+                result[phase]["mean_seconds"] = stats["total_seconds"] / stats["count"]
+            return result
+
+    def reset(self):
+        """
+        Clears the aggregated statistics.
+        """
+        with self.__lock:
+            self.__stats = {}
@@ -0,0 +1,205 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import collections
+import os
+import threading
+
+try:
+    import selectors
+except ImportError:
+    selectors = None
+
+_READ_CHUNK_SIZE = 65536
+
+class OutputBuffer(object):
+    """
+    Bounded buffer of the output lines of one child process, filled by the multiplexer thread and emptied by the thread
+    that launched the process. The multiplexer stops reading the pipe while the buffer is full, so a slow consumer
+    blocks the child process instead of growing the buffer.
+    """
+
+    def __init__(self, multiplexer, fd, limit):
+        """
+        :param multiplexer: the OutputMultiplexer reading the pipe.
+        :param fd: the file descriptor of the pipe.
+        :param limit: the maximum number of bytes buffered.
+        """
+        self.fd = fd
+        self.limit = limit
+        self.pending = b"" # incomplete last line, only used by the multiplexer thread
+        self.__multiplexer = multiplexer
+        self.__lines = collections.deque()
+        self.__size = 0
+        self.__closed = False
+        self.__paused = False
+        self.__condition = threading.Condition()
+
+    @property
+    def closed(self):
+        return self.__closed
+
+    def put(self, lines, size):
+        """
+        Appends lines. Called by the multiplexer thread.
+
+        :param lines: list of lines as bytes, without line separators.
+        :param size: the number of bytes read.
+        :return: True, if the buffer can take more lines, False, if the pipe should not be read until the consumer empties the buffer.
+        """
+        with self.__condition:
+            self.__lines.extend(lines)
+            self.__size += size
+            self.__condition.notify_all()
+            if self.__size >= self.limit:
+                self.__paused = True
+                return False
+            return True
+
+    def close(self, lines=()):
+        """
+        Appends the last lines, and marks the end of the output. Called by the multiplexer thread.
+        """
+        with self.__condition:
+            self.__lines.extend(lines)
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def get(self):
+        """
+        Waits for lines, and returns all lines buffered.
+
+        :return: list of lines as bytes, or None, if the output has ended and every line has been returned.
+        """
+        with self.__condition:
+            while len(self.__lines) == 0 and not self.__closed:
+                self.__condition.wait()
+            if len(self.__lines) == 0:
+                return None
+            lines = list(self.__lines)
+            self.__lines.clear()
+            self.__size = 0
+            resume = self.__paused and not self.__closed
+            self.__paused = False
+        if resume:
+            self.__multiplexer._submit(self)
+        return lines
+
+    def discard(self):
+        """
+        Stops reading the pipe, e.g. if the consumer fails. Returns, when the multiplexer does not use the file
+        descriptor anymore, so that the pipe can be closed.
+        """
+        if self.__closed:
+            return
+        self.__multiplexer._submit(self, discard=True)
+        with self.__condition:
+            while not self.__closed:
+                self.__condition.wait()
+
+class OutputMultiplexer(object):
+    """
+    Reads the output pipes of many child processes with a single thread, and splits the output into lines, that are
+    put to the bounded buffer of every process. The thread is started when the first pipe is registered.
+    """
+
+    def __init__(self):
+        self.__selector = selectors.DefaultSelector()
+        (self.__wakeup_read, self.__wakeup_write) = os.pipe()
+        self.__selector.register(self.__wakeup_read, selectors.EVENT_READ, None)
+        self.__lock = threading.Lock()
+        self.__requests = []
+        self.__thread = None
+
+    def register(self, stream, limit):
+        """
+        Starts reading a pipe. The pipe must not be closed, before its buffer has returned None, or has been discarded.
+
+        :param stream: the pipe, e.g. the stdout attribute of a subprocess.Popen object.
+        :param limit: the maximum number of bytes buffered for the pipe.
+        :return: the OutputBuffer of the pipe.
+        """
+        buffer = OutputBuffer(self, stream.fileno(), limit)
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name="rapidminer-output")
+                self.__thread.daemon = True
+                self.__thread.start()
+        self._submit(buffer)
+        return buffer
+
+    def _submit(self, buffer, discard=False):
+        # the selector is only changed by the multiplexer thread, other threads submit requests and wake it up
+        with self.__lock:
+            self.__requests.append((buffer, discard))
+        os.write(self.__wakeup_write, b"x")
+
+    def __run(self):
+        while True:
+            for (key, _) in self.__selector.select():
+                if key.data is None:
+                    self.__handle_requests()
+                else:
+                    self.__read(key.data)
+
+    def __handle_requests(self):
+        os.read(self.__wakeup_read, _READ_CHUNK_SIZE)
+        with self.__lock:
+            requests = self.__requests
+            self.__requests = []
+        for (buffer, discard) in requests:
+            key = self.__selector.get_map().get(buffer.fd)
+            registered = key is not None and key.data is buffer
+            if discard:
+                if registered:
+                    self.__selector.unregister(buffer.fd)
+                buffer.close()
+            elif not registered and not buffer.closed:
+                self.__selector.register(buffer.fd, selectors.EVENT_READ, buffer)
+
+    def __read(self, buffer):
+        try:
+            chunk = os.read(buffer.fd, _READ_CHUNK_SIZE)
+        except OSError:
+            chunk = b""
+        if len(chunk) == 0:
+            self.__selector.unregister(buffer.fd)
+            buffer.close([buffer.pending] if len(buffer.pending) > 0 else [])
+            return
+        lines = (buffer.pending + chunk).split(b"\n")
+        buffer.pending = lines.pop()
+        if not buffer.put(lines, len(chunk)):
+            # registered again by the consumer, see OutputBuffer.get
+            self.__selector.unregister(buffer.fd)
+
+_multiplexer = None
+_multiplexer_pid = None
+_multiplexer_lock = threading.Lock()
+
+def default_multiplexer():
+    """
+    Returns the multiplexer shared by all connectors of this process, or None, if pipes can not be multiplexed on this
+    platform (Windows).
+    """
+    global _multiplexer, _multiplexer_pid
+    if selectors is None or os.name != "posix":
+        return None
+    with _multiplexer_lock:
+        # a forked child does not inherit the thread of the multiplexer
+        if _multiplexer is None or _multiplexer_pid != os.getpid():
+            _multiplexer = OutputMultiplexer()
+            _multiplexer_pid = os.getpid()
+        return _multiplexer
@@ -0,0 +1,275 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import copy
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import xml.etree.ElementTree as et
+from .exchange import strip_codec
+
+# layout attributes, that do not change the result of an operator
+_LAYOUT_ATTRIBUTES = ("x", "y", "width", "height", "expanded")
+_CACHEABLE_EXTENSIONS = (".csv", ".bin", ".fo")
+_SIDECAR_EXTENSIONS = (".pmd",)
+_MULTIPLY_PREFIX = "rapidminer_cache_multiply_"
+
+class _Wire(object):
+    """
+    A connection of the top level process: from_op is None for process input ports, to_op is None for process result ports.
+    """
+    def __init__(self, element):
+        self.from_op = element.attrib.get("from_op")
+        self.from_port = element.attrib["from_port"]
+        self.to_op = element.attrib.get("to_op")
+        self.to_port = element.attrib["to_port"]
+
+class CachePlan(object):
+    """
+    Result of OperatorCache.plan: how a process run is executed, reusing the cached port outputs.
+
+    - process_xml: the rewritten process to run, or None, if every result is cached,
+    - cached_inputs: files of cached port outputs, passed to the rewritten process after the original inputs,
+    - captures: dict of result index of the rewritten process to the cache key of the port output it delivers,
+    - results: list with an entry for every requested result, either the result index of the rewritten process, or the cached file.
+    """
+    def __init__(self):
+        self.process_xml = None
+        self.cached_inputs = []
+        self.captures = {}
+        self.results = []
+
+class OperatorCache(object):
+    """
+    Cache of the port outputs of the top level operators of a process. Every output is keyed by a hash of the XML of its
+    operator and of all operators upstream, the process inputs they use and the macros, so that an entry is only reused, if
+    it would be computed the same way again.
+
+    A run is planned by walking the process backwards from the requested results, and stopping at every port output that is
+    cached. Only the operators reached this way are executed, in a rewritten process, that gets the cached outputs as
+    additional inputs, and delivers every port output it computes as an additional result (through Multiply operators), so
+    that they are cached for later runs.
+    """
+    def __init__(self, directory):
+        """
+        :param directory: the directory of the cache. It is created if it does not exist, and can be deleted any time.
+        """
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def plan(self, process_xml, input_hashes, macros=None, operator=None):
+        """
+        Plans a run of the process.
+
+        :param process_xml: the XML of the process as a string.
+        :param input_hashes: list of content hashes of the process inputs.
+        :param macros: dict of the macros set for the run.
+        :param operator: name of a top level operator. If set, the results are the outputs of this operator, otherwise the results of the process.
+        :return: a CachePlan object.
+        """
+        root = et.fromstring(process_xml)
+        process = root.find("operator").find("process")
+        operators = dict((op.attrib["name"], op) for op in process.findall("operator"))
+        wires = [_Wire(element) for element in process.findall("connect")]
+        if operator is not None and operator not in operators:
+            raise ValueError("Operator '" + operator + "' is not a top level operator of the process.")
+        keys = self.__operator_keys(operators, wires, input_hashes, macros)
+        if operator is not None:
+            targets = [wire for wire in wires if wire.from_op == operator]
+        else:
+            targets = sorted([wire for wire in wires if wire.to_op is None and wire.to_port.startswith("result ")],
+                             key=lambda wire: int(wire.to_port.split(" ")[1]))
+
+        plan = CachePlan()
+        needed = set()
+        cached_wires = {}
+        stack = []
+        for wire in targets:
+            self.__visit(wire, keys, needed, cached_wires, stack)
+        while len(stack) > 0:
+            name = stack.pop()
+            for wire in wires:
+                if wire.to_op == name:
+                    self.__visit(wire, keys, needed, cached_wires, stack)
+        if all(id(wire) in cached_wires for wire in targets):
+            plan.results = [cached_wires[id(wire)] for wire in targets]
+            return plan
+
+        # rewrite the process: keep the needed operators, feed cached outputs as inputs, deliver every port output as result
+        for element in list(process):
+            if element.tag == "connect" or (element.tag == "operator" and element.attrib["name"] not in needed):
+                process.remove(element)
+        target_ids = set(id(wire) for wire in targets)
+        result_indices = {}
+        cached_input_ports = {}
+        next_input = len(input_hashes) + 1
+        next_result = 0
+        for wire in wires:
+            target = id(wire) in target_ids
+            if not target and (wire.to_op is None or wire.to_op not in needed):
+                continue
+            if id(wire) in cached_wires:
+                if target:
+                    continue
+                cached = cached_wires[id(wire)]
+                if cached not in cached_input_ports:
+                    cached_input_ports[cached] = "input " + str(next_input)
+                    plan.cached_inputs.append(cached)
+                    next_input += 1
+                self.__connect(process, None, cached_input_ports[cached], wire.to_op, wire.to_port)
+                continue
+            if not target and wire.from_op is None:
+                self.__connect(process, None, wire.from_port, wire.to_op, wire.to_port)
+                continue
+            index = next_result
+            next_result += 1
+            result_port = "result " + str(index + 1)
+            if wire.from_op is not None:
+                plan.captures[index] = self.__port_key(keys[wire.from_op], wire.from_port)
+            if target:
+                # a requested result, it is delivered as it is
+                result_indices[id(wire)] = index
+                self.__connect(process, wire.from_op, wire.from_port, None, result_port)
+            else:
+                multiply = _MULTIPLY_PREFIX + str(index + 1)
+                # operators are executed in the order of the XML, so the Multiply follows its source operator
+                process.insert(list(process).index(operators[wire.from_op]) + 1,
+                               et.Element("operator", {"activated": "true", "class": "multiply", "compatibility": "9.3.000", "expanded": "true", "name": multiply}))
+                self.__connect(process, wire.from_op, wire.from_port, multiply, "input")
+                self.__connect(process, multiply, "output 1", wire.to_op, wire.to_port)
+                self.__connect(process, multiply, "output 2", None, result_port)
+        plan.results = [cached_wires[id(wire)] if id(wire) in cached_wires else result_indices[id(wire)] for wire in targets]
+        plan.process_xml = et.tostring(root, encoding="unicode")
+        return plan
+
+    def store(self, key, filename):
+        """
+        Stores a port output in the cache. Only data, that can be passed to a process as input again (csv, pickled python
+        objects and files), is stored.
+
+        :param key: the cache key of the port output, from CachePlan.captures.
+        :param filename: the file of the port output, written by Studio.
+        :return: the cached file, or None, if the output is not cacheable.
+        """
+        (base, extension) = os.path.splitext(strip_codec(filename))
+        if extension not in _CACHEABLE_EXTENSIONS:
+            return None
+        # compressed exchange files are stored as they are
+        extension = filename[len(base):]
+        entry = os.path.join(self.directory, key)
+        # write to a temporary directory first, so that an interrupted store does not leave a partial entry behind
+        temp = entry + ".tmp" + str(os.getpid())
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        shutil.copyfile(filename, os.path.join(temp, "output" + extension))
+        for sidecar in _SIDECAR_EXTENSIONS:
+            if os.path.exists(base + sidecar):
+                shutil.copyfile(base + sidecar, os.path.join(temp, "output" + sidecar))
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.rename(temp, entry)
+        except OSError:
+            # stored by a concurrent run
+            shutil.rmtree(temp, ignore_errors=True)
+        return self.lookup(key)
+
+    def lookup(self, key):
+        """
+        :param key: the cache key of a port output.
+        :return: the cached file, or None, if the output is not cached.
+        """
+        for filename in glob.glob(os.path.join(self.directory, key, "output.*")):
+            if os.path.splitext(strip_codec(filename))[1] in _CACHEABLE_EXTENSIONS:
+                return filename
+        return None
+
+    def __visit(self, wire, keys, needed, cached_wires, stack):
+        if wire.from_op is None:
+            return
+        cached = self.lookup(self.__port_key(keys[wire.from_op], wire.from_port))
+        if cached is not None:
+            cached_wires[id(wire)] = cached
+        elif wire.from_op not in needed:
+            needed.add(wire.from_op)
+            stack.append(wire.from_op)
+
+    def __operator_keys(self, operators, wires, input_hashes, macros):
+        """
+        Computes the key of every operator: the hash of its XML (without layout attributes), the keys of the operators
+        connected to its input ports, the hashes of the process inputs connected to its input ports, and the macros.
+        """
+        macros_hash = json.dumps(macros if macros is not None else {}, sort_keys=True, default=str)
+        keys = {}
+        def key(name, path):
+            if name in keys:
+                return keys[name]
+            if name in path:
+                raise ValueError("The process contains a cycle at operator '" + name + "'.")
+            sources = []
+            for wire in wires:
+                if wire.to_op == name:
+                    if wire.from_op is None:
+                        index = int(wire.from_port.split(" ")[1]) - 1
+                        source = "input:" + (input_hashes[index] if index < len(input_hashes) else "")
+                    else:
+                        source = "op:" + key(wire.from_op, path + [name]) + ":" + wire.from_port
+                    sources.append(wire.to_port + "=" + source)
+            digest = hashlib.sha1()
+            digest.update(OperatorCache.__canonical_xml(operators[name]))
+            digest.update(macros_hash.encode("utf-8"))
+            for source in sorted(sources):
+                digest.update(source.encode("utf-8"))
+            keys[name] = digest.hexdigest()
+            return keys[name]
+        for name in operators:
+            key(name, [])
+        return keys
+
+    def __canonical_xml(element):
+        element = copy.deepcopy(element)
+        for child in element.iter():
+            for attribute in _LAYOUT_ATTRIBUTES:
+                child.attrib.pop(attribute, None)
+            if child.tag == "portSpacing":
+                child.attrib.clear()
+        return et.tostring(element, encoding="utf-8")
+
+    def __port_key(self, operator_key, port):
+        return hashlib.sha1((operator_key + ":" + port).encode("utf-8")).hexdigest()
+
+    def __connect(self, process, from_op, from_port, to_op, to_port):
+        attributes = {}
+        if from_op is not None:
+            attributes["from_op"] = from_op
+        attributes["from_port"] = from_port
+        if to_op is not None:
+            attributes["to_op"] = to_op
+        attributes["to_port"] = to_port
+        process.append(et.Element("connect", attributes))
+
+def result_files(output_dir):
+    """
+    Returns the result files written by Studio to the output directory, ordered by the number in their names.
+    """
+    files = [f for f in glob.glob(os.path.join(output_dir, "*.*")) if not f.endswith(_SIDECAR_EXTENSIONS)]
+    def number(filename):
+        match = re.search(r"\d+", os.path.basename(filename))
+        return int(match.group(0)) if match is not None else -1
+    return sorted(files, key=lambda f: (number(f), f))
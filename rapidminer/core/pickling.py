@@ -0,0 +1,145 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import json
+import mmap
+import os
+import struct
+try:
+    import cPickle as pickle
+except:
+    import pickle
+from .utilities import GeneralException
+
+# files starting with this marker hold a pickle stream and its out-of-band buffers, other files are plain pickles
+_MAGIC = b"RMPICKLE"
+_HEADER_LENGTH = struct.Struct("<Q")
+_ALIGNMENT = 64
+_COMPRESSIONS = ("lz4", "zstd")
+
+def supports_out_of_band():
+    """
+    Tests, if the running Python supports pickle protocol 5 with out-of-band buffers (Python 3.8+).
+    """
+    return pickle.HIGHEST_PROTOCOL >= 5
+
+def _import_compression(compression):
+    try:
+        if compression == "lz4":
+            import lz4.frame
+            return lz4.frame
+        elif compression == "zstd":
+            import zstandard
+            return zstandard
+    except ImportError:
+        raise GeneralException("Compression '" + compression + "' requires the " + ("lz4" if compression == "lz4" else "zstandard") + " package.")
+    raise ValueError("Unknown compression '" + str(compression) + "', use one of " + ", ".join(_COMPRESSIONS) + " or 'auto'.")
+
+def resolve_compression(compression):
+    """
+    Resolves the compression setting. 'auto' selects lz4 or zstd, whichever is installed, or no compression, if neither is.
+
+    :param compression: None, 'lz4', 'zstd' or 'auto'.
+    :return: None, 'lz4' or 'zstd'.
+    """
+    if compression != "auto":
+        if compression is not None:
+            _import_compression(compression)
+        return compression
+    for candidate in _COMPRESSIONS:
+        try:
+            _import_compression(candidate)
+            return candidate
+        except GeneralException:
+            pass
+    return None
+
+def _compress(compression, data):
+    module = _import_compression(compression)
+    if compression == "lz4":
+        return module.compress(data)
+    return module.ZstdCompressor().compress(data)
+
+def _decompress(compression, data):
+    module = _import_compression(compression)
+    if compression == "lz4":
+        return module.decompress(data, return_bytearray=True)
+    return bytearray(module.ZstdDecompressor().decompress(data))
+
+def dump_object(object, filename, protocol=None, compression=None):
+    """
+    Pickles a python object to a file. With protocol 5 or higher, large buffers (e.g. NumPy arrays) are taken out of the
+    pickle stream and written to the file as they are, without copying them to the stream first. These files can only be
+    read by load_object.
+
+    :param object: a pickle-able python object.
+    :param filename: name of the file.
+    :param protocol: the pickle protocol, None for the default protocol of pickle. The plain pickle format is used
+                     below protocol 5, or if the running Python does not support it.
+    :param compression: None, 'lz4' or 'zstd', only used with protocol 5 or higher.
+    """
+    if protocol is None or protocol < 5 or not supports_out_of_band():
+        with open(filename, "wb") as dump_file:
+            pickle.dump(object, dump_file, protocol=protocol)
+        return
+    buffers = []
+    stream = pickle.dumps(object, protocol=protocol, buffer_callback=buffers.append)
+    raw = [stream] + [buffer.raw() for buffer in buffers]
+    parts = raw if compression is None else [_compress(compression, part) for part in raw]
+    entries = []
+    offset = 0
+    for part, raw_part in zip(parts, raw):
+        entries.append([offset, len(part), len(raw_part)])
+        offset += len(part) + (-len(part) % _ALIGNMENT)
+    header = json.dumps({"compression": compression, "parts": entries}).encode("utf-8")
+    start = len(_MAGIC) + _HEADER_LENGTH.size + len(header)
+    start += -start % _ALIGNMENT
+    with open(filename, "wb") as dump_file:
+        dump_file.write(_MAGIC)
+        dump_file.write(_HEADER_LENGTH.pack(len(header)))
+        dump_file.write(header)
+        dump_file.write(b"\0" * (start - dump_file.tell()))
+        for part in parts:
+            dump_file.write(part)
+            dump_file.write(b"\0" * (-len(part) % _ALIGNMENT))
+
+def load_object(filename):
+    """
+    Unpickles a python object from a file written by dump_object or by plain pickle. Uncompressed out-of-band buffers
+    are memory-mapped (copy-on-write), so large arrays are paged in on access instead of being copied on load.
+
+    :param filename: name of the file.
+    :return: the python object.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            f.seek(0)
+            return pickle.load(f)
+        (header_length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+        start = len(_MAGIC) + _HEADER_LENGTH.size + header_length
+        start += -start % _ALIGNMENT
+        compression = header["compression"]
+        if compression is None and os.name != "nt":
+            # on Windows, mapped files could not be removed together with the temporary directory
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        else:
+            f.seek(0)
+            data = memoryview(f.read())
+    parts = [data[start + offset:start + offset + length] for (offset, length, _) in header["parts"]]
+    if compression is not None:
+        parts = [_decompress(compression, part) for part in parts]
+    return pickle.loads(parts[0], buffers=parts[1:])
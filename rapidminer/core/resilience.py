@@ -0,0 +1,117 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import random
+import threading
+from time import perf_counter
+from .utilities import ServerException
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker for the requests of Server connectors. After failure_threshold consecutive failed requests
+    (connection errors, timeouts, 5xx server errors and 429 responses), the circuit opens, and requests fail
+    immediately with a ServerException, instead of waiting for a degraded Server. After reset_timeout seconds, a single
+    trial request is let through: if it succeeds, the circuit closes, otherwise it opens again. Can be shared by
+    multiple connectors of the same Server, and is safe to use from multiple threads.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        Arguments:
+        :param failure_threshold: number of consecutive failed requests, that open the circuit. Default is 5.
+        :param reset_timeout: number of seconds the circuit stays open, before a trial request is let through. Default is 30.
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1.")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.__lock = threading.Lock()
+        self.__failures = 0
+        self.__opened = None
+        self.__trial_started = None
+
+    @property
+    def state(self):
+        """
+        The state of the circuit: CLOSED, OPEN or HALF_OPEN (the reset timeout has elapsed, the next request is a trial).
+        """
+        with self.__lock:
+            if self.__opened is None:
+                return self.CLOSED
+            if perf_counter() - self.__opened < self.reset_timeout:
+                return self.OPEN
+            return self.HALF_OPEN
+
+    def before_request(self, operation=None):
+        """
+        Checks, if a request can be sent. Raises a ServerException, if the circuit is open, or a trial request is
+        already running. A trial that has not finished within reset_timeout seconds is replaced by a new one.
+
+        :param operation: name of the operation, used in the error message.
+        """
+        with self.__lock:
+            if self.__opened is None:
+                return
+            now = perf_counter()
+            remaining = self.reset_timeout - (now - self.__opened)
+            if remaining <= 0 and (self.__trial_started is None or now - self.__trial_started >= self.reset_timeout):
+                self.__trial_started = now
+                return
+            failures = self.__failures
+        raise ServerException("Server is unavailable after " + str(failures) + " failed requests, "
+                              + (operation + " request " if operation is not None else "request ") + "not sent"
+                              + (", retry in " + str(int(remaining + 1)) + " seconds." if remaining > 0 else ", a trial request is running."))
+
+    def record_success(self):
+        """
+        Records a request answered by the Server, and closes the circuit.
+        """
+        with self.__lock:
+            self.__failures = 0
+            self.__opened = None
+            self.__trial_started = None
+
+    def record_failure(self):
+        """
+        Records a failed request. Opens the circuit, if the failure threshold is reached, or a trial request failed.
+        """
+        with self.__lock:
+            self.__failures += 1
+            if self.__trial_started is not None or self.__failures >= self.failure_threshold:
+                self.__opened = perf_counter()
+                self.__trial_started = None
+
+    def reset(self):
+        """
+        Closes the circuit, and clears the failure count.
+        """
+        self.record_success()
+
+
+def backoff_delay(attempt, base, cap):
+    """
+    Returns the delay before a retry, exponential in the number of attempts, with full jitter: a random value between
+    0 and min(cap, base * 2 ** attempt), so that clients failing at the same time do not retry at the same time.
+
+    :param attempt: the number of the failed attempt, starting with 0.
+    :param base: the base delay in seconds.
+    :param cap: the maximum delay in seconds.
+    :return: the delay in seconds.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
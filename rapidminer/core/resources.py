@@ -25,10 +25,19 @@ class Resource(object):
 
 
 class File(Resource):
-    def __init__(self, filename):
+    def __init__(self, filename, columns=None, filters=None):
+        """
+        Creates a new file representation.
+
+        :param filename: the name of the file.
+        :param columns: list of columns to read. Only used for Parquet, Feather and Arrow files, which are read directly by Python.
+        :param filters: row filter to apply while reading, in the form accepted by pandas.read_parquet (e.g. [("year", ">=", 2019)]) or a pyarrow.dataset.Expression. Only used for Parquet, Feather and Arrow files. For Parquet files, row groups not matching the filter are skipped.
+        """
         if not isinstance(filename, str):
             raise ValueError("'filename' must be a string. (now: " + str(type(filename)) +")")
         self.filename = filename
+        self.columns = columns
+        self.filters = filters
 
     def to_string(self):
         return "file:" + self.filename
@@ -0,0 +1,198 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import collections
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from time import perf_counter
+from time import time
+
+class JobScheduler(object):
+    """
+    Client-side scheduler, that runs a backlog of process submissions on a Server instance, spread across multiple
+    queues. The number of running jobs per queue is capped, and every free slot is given to the queue with the lowest
+    expected completion time, based on the load reported by the Server and the job latencies observed so far.
+    """
+    __LATENCY_WINDOW = 100
+
+    def __init__(self, server, queues=None, max_concurrent=2, refresh_interval=30):
+        """
+        Arguments:
+        :param server: a Server object.
+        :param queues: dict of queue name to the maximum number of concurrently running jobs on that queue, or a list of queue names. If None, all queues returned by Server.getQueues are used.
+        :param max_concurrent: the maximum number of concurrently running jobs per queue, for queues without an explicit limit. Default is 2. All limits must be at least 1.
+        :param refresh_interval: number of seconds between two Server.getQueues calls, that refresh the reported load of the queues. Default is 30.
+        """
+        self.server = server
+        if queues is None:
+            queues = [queue["name"] for queue in server.getQueues()]
+        if not isinstance(queues, dict):
+            queues = dict((queue, max_concurrent) for queue in queues)
+        if len(queues) == 0:
+            raise ValueError("At least one queue must be specified.")
+        if max_concurrent < 1 or any(limit < 1 for limit in queues.values()):
+            raise ValueError("The maximum number of concurrently running jobs must be at least 1 for every queue.")
+        self.__limits = dict(queues)
+        self.__max_concurrent = max_concurrent
+        self.__refresh_interval = refresh_interval
+        self.__lock = threading.Lock()
+        self.__running = dict((queue, 0) for queue in self.__limits)
+        self.__reported_load = dict((queue, 0) for queue in self.__limits)
+        self.__last_refresh = None
+        self.__latencies = dict((queue, collections.deque(maxlen=self.__LATENCY_WINDOW)) for queue in self.__limits)
+        self.__counts = dict((queue, [0, 0]) for queue in self.__limits)
+
+    def run(self, submissions, return_exceptions=False):
+        """
+        Runs the process submissions, and waits for all of them to finish.
+
+        :param submissions: list of submissions. A submission is either a process path, or a dict with a "path" key, an optional "inputs" key and other run_process kwargs (e.g. "macros"). If the dict contains a "queue" key, the submission is only dispatched to that queue.
+        :param return_exceptions: if True, the exception of a failed submission is returned in its place. If False (default), the first exception is raised when all dispatched submissions have finished; submissions not yet dispatched are not run.
+        :return: list of the results of run_process, in the order of the submissions.
+        """
+        submissions = [self.__normalize(submission) for submission in submissions]
+        results = [None] * len(submissions)
+        backlog = collections.deque(range(len(submissions)))
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=sum(self.__limits.values()) + 1) as executor:
+            while len(running) > 0 or (len(backlog) > 0 and error is None):
+                if error is None:
+                    self.__refresh_load()
+                    self.__dispatch(executor, submissions, backlog, running)
+                (done, _) = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    (index, queue, start) = running.pop(future)
+                    failed = future.exception() is not None
+                    self.__finished(queue, perf_counter() - start, failed)
+                    if not failed:
+                        results[index] = future.result()
+                    elif return_exceptions:
+                        results[index] = future.exception()
+                    elif error is None:
+                        error = future.exception()
+        if error is not None:
+            raise error
+        return results
+
+    def stats(self):
+        """
+        Returns the statistics of the queues.
+
+        :return: dict of queue name to a dict with limit, running, reported_load, count, errors, mean_seconds and p95_seconds values. The latencies cover the time from the submission until the results are read, over the last 100 jobs of the queue.
+        """
+        with self.__lock:
+            result = {}
+            for queue in self.__limits:
+                latencies = sorted(self.__latencies[queue])
+                result[queue] = {"limit": self.__limits[queue],
+                                 "running": self.__running[queue],
+                                 "reported_load": self.__reported_load[queue],
+                                 "count": self.__counts[queue][0],
+                                 "errors": self.__counts[queue][1],
+                                 "mean_seconds": sum(latencies) / len(latencies) if len(latencies) > 0 else None,
+                                 "p95_seconds": latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)] if len(latencies) > 0 else None}
+            return result
+
+    def __normalize(self, submission):
+        if not isinstance(submission, dict):
+            submission = {"path": submission}
+        if "path" not in submission:
+            raise ValueError("Submissions must contain a 'path' key.")
+        submission = dict(submission)
+        queue = submission.get("queue")
+        if queue is not None and queue not in self.__limits:
+            self.__limits[queue] = self.__max_concurrent
+            self.__running[queue] = 0
+            self.__reported_load[queue] = 0
+            self.__latencies[queue] = collections.deque(maxlen=self.__LATENCY_WINDOW)
+            self.__counts[queue] = [0, 0]
+        return submission
+
+    def __dispatch(self, executor, submissions, backlog, running):
+        """
+        Assigns free queue slots to the submissions of the backlog, in backlog order. A submission bound to a queue without
+        a free slot waits, and does not block the submissions behind it.
+        """
+        waiting = []
+        while len(backlog) > 0:
+            index = backlog.popleft()
+            submission = submissions[index]
+            queue = self.__select_queue(submission.get("queue"))
+            if queue is None:
+                waiting.append(index)
+                if submission.get("queue") is None:
+                    # no free slot on any queue
+                    break
+                continue
+            kwargs = dict(submission)
+            path = kwargs.pop("path")
+            inputs = kwargs.pop("inputs", None)
+            kwargs["queue"] = queue
+            with self.__lock:
+                self.__running[queue] += 1
+            running[executor.submit(self.server.run_process, path, inputs, **kwargs)] = (index, queue, perf_counter())
+        backlog.extendleft(reversed(waiting))
+
+    def __select_queue(self, queue=None):
+        """
+        Selects the queue with a free slot, that is expected to finish a new job first: its load (the jobs reported by the
+        Server and the ones running from this scheduler) per slot, weighted by its mean latency.
+
+        :param queue: if set, only this queue is considered.
+        :return: the queue name, or None if there is no free slot.
+        """
+        with self.__lock:
+            candidates = [queue] if queue is not None else list(self.__limits)
+            candidates = [q for q in candidates if self.__running[q] < self.__limits[q]]
+            if len(candidates) == 0:
+                return None
+            all_latencies = [latency for latencies in self.__latencies.values() for latency in latencies]
+            default_latency = sum(all_latencies) / len(all_latencies) if len(all_latencies) > 0 else 1.0
+            def expected(q):
+                latencies = self.__latencies[q]
+                latency = sum(latencies) / len(latencies) if len(latencies) > 0 else default_latency
+                load = max(self.__reported_load[q], self.__running[q])
+                return (load + 1) * latency / self.__limits[q]
+            return min(candidates, key=expected)
+
+    def __refresh_load(self):
+        if self.__last_refresh is not None and time() - self.__last_refresh < self.__refresh_interval:
+            return
+        self.__last_refresh = time()
+        try:
+            queues = self.server.getQueues()
+        except Exception:
+            # keep the last known load
+            return
+        with self.__lock:
+            for queue in queues:
+                if isinstance(queue, dict) and queue.get("name") in self.__reported_load:
+                    self.__reported_load[queue["name"]] = JobScheduler.__queue_load(queue)
+
+    @staticmethod
+    def __queue_load(queue):
+        # number of running and waiting jobs, as far as reported by the Server
+        return sum(queue[key] for key in ("running", "pending", "queued") if isinstance(queue.get(key), int))
+
+    def __finished(self, queue, seconds, failed):
+        with self.__lock:
+            self.__running[queue] -= 1
+            self.__latencies[queue].append(seconds)
+            self.__counts[queue][0] += 1
+            if failed:
+                self.__counts[queue][1] += 1
@@ -0,0 +1,115 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import copy
+import hashlib
+import json
+import os
+import threading
+from time import time
+
+def describe_dataframe(df):
+    """
+    Describes the schema of a DataFrame.
+
+    :param df: the pandas DataFrame.
+    :return: dict with the column names ('columns'), the pandas dtype of every column as a string ('dtypes'), the rm_metadata attribute ('rm_metadata', None if not present) and the number of rows ('rows').
+    """
+    metadata = getattr(df, "rm_metadata", None)
+    return {"columns": [str(name) for name in df.columns],
+            "dtypes": dict((str(name), str(dtype)) for name, dtype in df.dtypes.items()),
+            "rm_metadata": dict((key, list(value) if isinstance(value, tuple) else value) for key, value in metadata.items()) if isinstance(metadata, dict) else None,
+            "rows": len(df)}
+
+class SchemaCache(object):
+    """
+    Cache of the schema (see describe_dataframe) of repository entries and files, keyed by their location. An entry is
+    valid as long as the modification stamp of the location is unchanged. For locations without a stamp (e.g. remote
+    repositories), entries expire after ttl seconds. Safe to use from multiple threads.
+    """
+
+    def __init__(self, directory=None, ttl=60):
+        """
+        :param directory: optional local directory, where the entries are stored as JSON files, so that they are shared by processes and kept across sessions. If None, the entries are only kept in memory.
+        :param ttl: number of seconds entries without a modification stamp are valid for.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.__entries = {}
+        self.__lock = threading.Lock()
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def lookup(self, key, stamp):
+        """
+        :param key: the location, e.g. the repository path prefixed by the connector identity.
+        :param stamp: the current modification stamp of the location (a JSON serializable value), or None, if not known.
+        :return: the schema of the location, or None, if it is not cached, or the entry is out of date.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+        if entry is None and self.directory is not None:
+            try:
+                with open(self.__filename(key), "r") as f:
+                    entry = json.load(f)
+            except (IOError, OSError, ValueError):
+                entry = None
+        if entry is None or entry["key"] != key:
+            return None
+        if stamp is not None:
+            valid = entry["stamp"] == json.loads(json.dumps(stamp))
+        else:
+            valid = entry["stamp"] is None and time() - entry["time"] < self.ttl
+        if not valid:
+            return None
+        with self.__lock:
+            self.__entries[key] = entry
+        return copy.deepcopy(entry["schema"])
+
+    def store(self, key, stamp, df):
+        """
+        Stores the schema of a DataFrame read from a location.
+
+        :param key: the location.
+        :param stamp: the modification stamp of the location, taken before the DataFrame was read, or None.
+        :param df: the pandas DataFrame.
+        :return: the schema.
+        """
+        entry = {"key": key, "stamp": json.loads(json.dumps(stamp)), "time": time(), "schema": describe_dataframe(df)}
+        with self.__lock:
+            self.__entries[key] = entry
+        if self.directory is not None:
+            filename = self.__filename(key)
+            temp = filename + ".tmp" + str(os.getpid()) + "-" + str(threading.current_thread().ident)
+            with open(temp, "w") as f:
+                json.dump(entry, f)
+            os.replace(temp, filename)
+        return copy.deepcopy(entry["schema"])
+
+    def invalidate(self, key):
+        """
+        Removes the entry of a location, e.g. after it has been written.
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+        if self.directory is not None:
+            try:
+                os.remove(self.__filename(key))
+            except OSError:
+                pass
+
+    def __filename(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
@@ -15,18 +15,113 @@
 # If not, see https://www.gnu.org/licenses/.
 # 
 import pandas as pd
-import requests
 import json
+import gzip
+import collections
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from time import perf_counter
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 from .utilities import ServerException
 from .utilities import check_for_error
+from .instrumentation import Instrumentation
 
-class Scoring:
+def _date_like(column):
     """
-    Class that allows you to use the Real-Time Scoring agent directly on a dataset.
+    Checks if a column name is one, that pandas.read_json converts to dates by default.
     """
+    if not isinstance(column, str):
+        return False
+    name = column.lower()
+    return name.endswith("_at") or name.endswith("_time") or name.startswith("timestamp") or name in ("modified", "date", "datetime")
 
+class _ScoringHost(object):
+    """
+    State of one Real-Time Scoring agent: its url, the number of outstanding requests, the smoothed latency and whether it is healthy.
+    """
     def __init__(self, hostname, endpoint):
+        self.hostname = hostname
         self.url = hostname + "/services/" + endpoint
+        self.outstanding = 0
+        self.latency = None
+        self.healthy = True
+
+class Scoring:
+    """
+    Class that allows you to use the Real-Time Scoring agent directly on a dataset.
+    """
+    __REQUEST_FORMATS=("table", "records", "split")
+    __GZIP_LEVEL=1
+    __BALANCING=("least_outstanding", "latency")
+    __LATENCY_SMOOTHING=0.2
+    __LATENCY_WINDOW=200
+    __MIN_HEDGE_SAMPLES=20
+    __PROBE_TIMEOUT_SECONDS=5
+
+    def __init__(self, hostname, endpoint, **kwargs):
+        """
+        Arguments:
+        :param hostname: Server url (together with the port), or a list of urls of agents serving the same endpoint. Calls are spread across the agents.
+        :param endpoint: scoring service endpoint to use
+
+        Possible kwargs arguments:
+        :param instrumentation: an Instrumentation object that records the phases of the calls (e.g. a StatsInstrumentation). By default nothing is recorded.
+        :param request_format: the layout of the data sent to the agent. "table" (default) sends the data as records together with a table schema, "records" sends the records only, "split" sends the column names once and the rows as arrays. Use the compact layouts only with agents that accept them.
+        :param compress: if True, the request body is gzip compressed. Default is False. Compressed responses are always accepted.
+        :param balancing: how an agent is selected for a call, if multiple are specified. "least_outstanding" (default) selects the agent with the fewest running calls, "latency" weights that number with the smoothed latency of the agent.
+        :param hedge: if True, and multiple agents are specified, a second request is sent to another agent, when a call takes longer than the 95th percentile of recent calls. The first response is used. Default is False.
+        :param health_check_interval: seconds between two probes of an agent that failed. Failed agents are only used when no healthy agent is left, until a probe succeeds. Default is 10.
+        :param timeout: timeout of the requests in seconds. Default is None, no timeout.
+        """
+        if not isinstance(hostname, (list, tuple)):
+            hostname = [hostname]
+        if len(hostname) == 0:
+            raise ValueError("At least one hostname must be specified.")
+        self.__hosts = [_ScoringHost(host, endpoint) for host in hostname]
+        self.url = self.__hosts[0].url
+        if "balancing" in kwargs:
+            if kwargs["balancing"] not in self.__BALANCING:
+                raise ValueError("Unknown balancing '" + str(kwargs["balancing"]) + "', use one of " + ", ".join(self.__BALANCING) + ".")
+            self.__balancing = kwargs["balancing"]
+        else:
+            self.__balancing = "least_outstanding"
+        if "hedge" in kwargs:
+            self.__hedge = kwargs["hedge"]
+        else:
+            self.__hedge = False
+        if "health_check_interval" in kwargs:
+            self.__health_check_interval = kwargs["health_check_interval"]
+        else:
+            self.__health_check_interval = 10
+        if "timeout" in kwargs:
+            self.__timeout = kwargs["timeout"]
+        else:
+            self.__timeout = None
+        self.__lock = threading.Lock()
+        self.__latencies = collections.deque(maxlen=self.__LATENCY_WINDOW)
+        self.__rotation = itertools.count()
+        self.__prober = None
+        self.__executor = None
+        self.__closed = threading.Event()
+        if "request_format" in kwargs:
+            if kwargs["request_format"] not in self.__REQUEST_FORMATS:
+                raise ValueError("Unknown request_format '" + str(kwargs["request_format"]) + "', use one of " + ", ".join(self.__REQUEST_FORMATS) + ".")
+            self.__request_format = kwargs["request_format"]
+        else:
+            self.__request_format = "table"
+        if "compress" in kwargs:
+            self.__compress = kwargs["compress"]
+        else:
+            self.__compress = False
+        if "instrumentation" in kwargs and kwargs["instrumentation"] is not None:
+            self._instrumentation = kwargs["instrumentation"]
+        else:
+            self._instrumentation = Instrumentation()
 
     def predict(self, dataframe):
         """
@@ -35,16 +130,232 @@ class Scoring:
         :param dataframe: the pandas DataFrame.
         :return: the result as a pandas DataFrame.
         """
-        df_json = dataframe.to_json(orient="table")
+        with self._instrumentation.span("scoring.encode", rows=dataframe.shape[0], columns=dataframe.shape[1]) as span:
+            body = self.__encode(dataframe)
+            span.set(bytes=len(body))
 
         headers = { 'Content-type': 'application/json' }
-        r = requests.post(self.url, data=df_json, headers=headers)
-        if r.status_code != 200:
-            raise ServerException("Could not score data, status:", r.status_code)
+        if self.__compress:
+            headers['Content-Encoding'] = 'gzip'
+        with self._instrumentation.span("scoring.request") as span:
+            (host, r) = self.__post(body, headers)
+            if r.status_code != 200:
+                raise ServerException("Could not score data, status:", r.status_code)
+            span.set(bytes=len(r.content), host=host.hostname)
         
-        response = r.json()
-        check_for_error(response)
-        json_string = json.dumps(response["data"])
-        df_out = pd.read_json(json_string)
+        with self._instrumentation.span("scoring.decode", bytes=len(r.content)) as span:
+            date_columns = [column for column in dataframe.columns if dataframe[column].dtype.kind == "M"]
+            df_out = self.__decode(r.content, date_columns)
+            span.set(rows=df_out.shape[0], columns=df_out.shape[1])
 
         return df_out
+
+    def close(self):
+        """
+        Stops the threads of the connector: the threads sending hedged requests, and the thread probing failed agents.
+        Later calls of predict are neither hedged, nor are failed agents probed.
+        """
+        self.__closed.set()
+        with self.__lock:
+            executor = self.__executor
+            self.__executor = None
+        if executor is not None:
+            # idle threads exit right away, the ones sending a request that lost the race exit when it finishes
+            executor.shutdown(wait=False)
+        prober = self.__prober
+        if prober is not None and prober is not threading.current_thread():
+            prober.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __post(self, body, headers):
+        """
+        Sends the request to an agent. If the agent can not be reached or fails with a server error, it is marked as
+        unhealthy, and the request is sent to the next agent.
+
+        :return: tuple of the agent and the response.
+        """
+        tried = []
+        result = None
+        while True:
+            host = self.__select_host(tried)
+            if host is None:
+                if isinstance(result, Exception):
+                    raise result
+                return result
+            tried.append(host)
+            result = self.__hedged_send(host, body, headers, tried)
+            if not self.__failed(result):
+                return result
+
+    def __failed(self, result):
+        return isinstance(result, Exception) or result[1].status_code >= 500
+
+    def __select_host(self, exclude):
+        with self.__lock:
+            candidates = [host for host in self.__hosts if host not in exclude]
+            healthy = [host for host in candidates if host.healthy]
+            if len(healthy) > 0:
+                candidates = healthy
+            if len(candidates) == 0:
+                return None
+            # rotate, so that ties are broken round robin
+            start = next(self.__rotation) % len(candidates)
+            candidates = candidates[start:] + candidates[:start]
+            if self.__balancing == "latency":
+                return min(candidates, key=lambda host: (host.outstanding + 1) * (host.latency if host.latency is not None else 0))
+            return min(candidates, key=lambda host: host.outstanding)
+
+    def __hedged_send(self, host, body, headers, tried):
+        """
+        Sends the request to the agent. With hedging enabled, a second request is sent to another agent, if there is no
+        response within the 95th percentile latency. The first successful response is returned.
+
+        :return: tuple of the agent and the response, or the exception raised by the request.
+        """
+        threshold = self.__hedge_threshold() if self.__hedge and len(self.__hosts) > 1 else None
+        if threshold is None or self.__closed.is_set():
+            return self.__send(host, body, headers)
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=4 * len(self.__hosts))
+            executor = self.__executor
+        pending = set([executor.submit(self.__send, host, body, headers)])
+        (done, _) = wait(pending, timeout=threshold)
+        if len(done) == 0:
+            second = self.__select_host(tried)
+            if second is not None:
+                tried.append(second)
+                pending.add(executor.submit(self.__send, second, body, headers))
+        result = None
+        while len(pending) > 0:
+            (done, pending) = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if not self.__failed(result):
+                    return result
+        return result
+
+    def __hedge_threshold(self):
+        with self.__lock:
+            if len(self.__latencies) < self.__MIN_HEDGE_SAMPLES:
+                return None
+            latencies = sorted(self.__latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def __send(self, host, body, headers):
+        """
+        Sends the request to the agent, and updates its state.
+
+        :return: tuple of the agent and the response, or the exception raised by the request.
+        """
+        import requests # deferred to keep importing the package cheap
+        with self.__lock:
+            host.outstanding += 1
+        start = perf_counter()
+        try:
+            r = requests.post(host.url, data=body, headers=headers, timeout=self.__timeout)
+        except requests.RequestException as e:
+            self.__mark_unhealthy(host)
+            return e
+        finally:
+            with self.__lock:
+                host.outstanding -= 1
+        if r.status_code >= 500:
+            self.__mark_unhealthy(host)
+        else:
+            elapsed = perf_counter() - start
+            with self.__lock:
+                host.healthy = True
+                self.__latencies.append(elapsed)
+                host.latency = elapsed if host.latency is None else \
+                    self.__LATENCY_SMOOTHING * elapsed + (1 - self.__LATENCY_SMOOTHING) * host.latency
+        return (host, r)
+
+    def __mark_unhealthy(self, host):
+        with self.__lock:
+            host.healthy = False
+            if len(self.__hosts) > 1 and self.__prober is None and not self.__closed.is_set():
+                self.__prober = threading.Thread(target=self.__probe_unhealthy_hosts, name="rapidminer-scoring-prober")
+                self.__prober.daemon = True
+                self.__prober.start()
+
+    def __probe_unhealthy_hosts(self):
+        """
+        Probes the unhealthy agents periodically, until all of them are healthy again. Any response, that is not a server error, marks the agent as healthy.
+        """
+        import requests # deferred to keep importing the package cheap
+        while True:
+            if self.__closed.wait(self.__health_check_interval):
+                with self.__lock:
+                    self.__prober = None
+                return
+            with self.__lock:
+                unhealthy = [host for host in self.__hosts if not host.healthy]
+            for host in unhealthy:
+                try:
+                    healthy = requests.get(host.hostname, timeout=self.__PROBE_TIMEOUT_SECONDS).status_code < 500
+                except requests.RequestException:
+                    healthy = False
+                if healthy:
+                    with self.__lock:
+                        host.healthy = True
+            with self.__lock:
+                if all(host.healthy for host in self.__hosts):
+                    self.__prober = None
+                    return
+
+    def __encode(self, dataframe):
+        """
+        Encodes the dataset to the request body sent by predict.
+
+        :param dataframe: the pandas DataFrame.
+        :return: the request body as bytes.
+        """
+        if self.__request_format == "table":
+            body = dataframe.to_json(orient="table")
+        elif self.__request_format == "records":
+            body = '{"data":' + dataframe.to_json(orient="records", date_format="iso") + '}'
+        else:
+            # orient="values" is considerably faster than orient="split" for mixed dtypes
+            body = ('{"data":{"columns":' + json.dumps([str(column) for column in dataframe.columns]) + ',"data":'
+                    + dataframe.to_json(orient="values", date_format="iso") + '}}')
+        body = body.encode("utf-8")
+        if self.__compress:
+            body = gzip.compress(body, compresslevel=self.__GZIP_LEVEL)
+        return body
+
+    def __decode(self, content, date_columns=()):
+        """
+        Decodes the (already decompressed) response body of the agent to a DataFrame. The DataFrame is built directly
+        from the parsed data, orjson is used for parsing, if installed. Date columns are converted as pandas.read_json
+        does, and so are the columns of the request declared as datetime.
+
+        :param content: the response body as bytes.
+        :param date_columns: the datetime columns of the request.
+        :return: the result as a pandas DataFrame.
+        """
+        response = _json_loads(content)
+        check_for_error(response)
+        data = response["data"]
+        if isinstance(data, dict) and "columns" in data and "data" in data:
+            df = pd.DataFrame(data["data"], columns=data["columns"])
+        else:
+            df = pd.DataFrame(data)
+        for column in df.columns:
+            if column not in date_columns and not _date_like(column):
+                continue
+            try:
+                if pd.api.types.is_string_dtype(df[column]):
+                    df[column] = pd.to_datetime(df[column])
+                elif df[column].dtype.kind == "i":
+                    # epoch milliseconds, the default date format of JSON written by pandas
+                    df[column] = pd.to_datetime(df[column], unit="ms")
+            except (ValueError, TypeError, OverflowError):
+                # kept as it is, like pandas.read_json does
+                pass
+        return df
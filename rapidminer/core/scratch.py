@@ -0,0 +1,246 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import atexit
+import errno
+import itertools
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import weakref
+
+_PREFIX = "rapidminer-scratch-"
+_SMALL_SCRATCH_CANDIDATES = ("/dev/shm",)
+_INSTANCE_COUNTER = itertools.count()
+_JANITOR_LOCK = threading.Lock()
+_JANITOR_ROOTS = set()
+_janitor_thread = None
+# worker directories of the live ScratchSpace instances, removed at exit, if they were not removed before
+_WORKER_DIRS = set()
+_WORKER_DIRS_LOCK = threading.Lock()
+
+def _hostname():
+    return socket.gethostname().replace("-", "_")
+
+def default_small_root():
+    """
+    Returns a memory backed scratch root (/dev/shm), if there is a writable one on this system, None otherwise.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    for candidate in _SMALL_SCRATCH_CANDIDATES:
+        if os.path.isdir(candidate) and os.access(candidate, os.W_OK | os.X_OK):
+            return candidate
+    return None
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+def _clean_root(root, max_age):
+    """
+    Removes the worker directories of this host under the root, that were left behind by processes that no longer run.
+    On Windows, where liveness can not be checked cheaply, directories are removed if they were not modified for max_age
+    seconds.
+    """
+    host_prefix = _PREFIX + _hostname() + "-"
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith(host_prefix):
+            continue
+        try:
+            pid = int(name[len(host_prefix):].split("-")[0])
+        except ValueError:
+            continue
+        path = os.path.join(root, name)
+        if pid == os.getpid():
+            continue
+        if os.name == "nt":
+            try:
+                stale = time.time() - os.path.getmtime(path) > max_age
+            except OSError:
+                continue
+        else:
+            stale = not _process_alive(pid)
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+def _start_janitor(roots, interval, max_age):
+    """
+    Registers the roots with the janitor, a daemon thread of this process, that cleans them right away, and then every
+    interval seconds.
+    """
+    global _janitor_thread
+    with _JANITOR_LOCK:
+        _JANITOR_ROOTS.update(roots)
+        if _janitor_thread is not None:
+            return
+        def run():
+            while True:
+                with _JANITOR_LOCK:
+                    current_roots = list(_JANITOR_ROOTS)
+                for root in current_roots:
+                    _clean_root(root, max_age)
+                time.sleep(interval)
+        _janitor_thread = threading.Thread(target=run, name="rapidminer-scratch-janitor")
+        _janitor_thread.daemon = True
+        _janitor_thread.start()
+
+def _remove_worker_dirs(worker_dirs=None):
+    """
+    Removes worker directories, by default all of them, that are still there.
+    """
+    with _WORKER_DIRS_LOCK:
+        if worker_dirs is None:
+            worker_dirs = list(_WORKER_DIRS)
+        _WORKER_DIRS.difference_update(worker_dirs)
+    for worker_dir in list(worker_dirs):
+        shutil.rmtree(worker_dir, True)
+
+atexit.register(_remove_worker_dirs)
+
+class ScratchSpace(object):
+    """
+    Manages the temporary directories used to exchange data with Studio. Every instance gets its own directory under
+    the scratch root, named after the host and the process, and keeps a pool of slot directories in it, shared by all
+    threads. Slots are emptied after use and reused by the next operation, instead of creating and removing a directory
+    every time. Small payloads go to a separate, faster root (by default /dev/shm, if available), as long as it has
+    enough free space. The directories of an instance are removed by close(), when the instance is garbage collected,
+    or at exit. Directories left behind by killed processes are removed by a background janitor.
+    """
+    def __init__(self, root=None, small_root=None, small_limit=None, janitor_interval=600, janitor_max_age=86400):
+        """
+        :param root: the scratch root, defaults to the system temporary directory.
+        :param small_root: the scratch root for payloads of at most small_limit bytes, defaults to the value of default_small_root(). Set to False to use root for all payloads. Payloads that do not fit into the free space of small_root, minus the payloads of the slots in use there, go to root.
+        :param small_limit: payloads up to this size in bytes use small_root, default is 64 MB.
+        :param janitor_interval: seconds between two runs of the janitor, None disables the janitor.
+        :param janitor_max_age: on Windows, leftover directories older than this many seconds are removed by the janitor.
+        """
+        self.root = root if root is not None else tempfile.gettempdir()
+        if small_root is None:
+            small_root = default_small_root()
+        self.small_root = small_root if small_root else None
+        self.small_limit = small_limit if small_limit is not None else 64 * 1024 * 1024
+        self.__instance = next(_INSTANCE_COUNTER)
+        self.__lock = threading.Lock()
+        # root -> (worker directory, list of free slots, slot counter)
+        self.__pools = {}
+        # slot in small_root -> payload size reserved for it
+        self.__reserved = {}
+        self.__janitor_interval = janitor_interval
+        self.__janitor_max_age = janitor_max_age
+        self.__janitor_started = False
+        # the worker directories created, shared with the finalizer, that must not refer to the instance
+        self.__worker_dirs = []
+        self.__finalizer = weakref.finalize(self, _remove_worker_dirs, self.__worker_dirs)
+        self.__finalizer.atexit = False
+
+    def acquire(self, size=None):
+        """
+        Returns an empty directory. Release it with release() after use.
+
+        :param size: the expected size of the payload in bytes. If None or larger than small_limit, or if small_root does not have enough free space, the directory is created under root, otherwise under small_root.
+        :return: path of the directory.
+        """
+        with self.__lock:
+            if not self.__janitor_started and self.__janitor_interval is not None:
+                self.__janitor_started = True
+                _start_janitor([r for r in (self.root, self.small_root) if r is not None], self.__janitor_interval, self.__janitor_max_age)
+            small = self.small_root is not None and size is not None and size <= self.small_limit and self.__small_root_fits(size)
+            root = self.small_root if small else self.root
+            if not self.__finalizer.alive:
+                raise ValueError("The scratch space is closed.")
+            if root not in self.__pools:
+                worker_dir = os.path.join(root, _PREFIX + _hostname() + "-" + str(os.getpid()) + "-" + str(self.__instance))
+                if not os.path.isdir(worker_dir):
+                    os.makedirs(worker_dir)
+                self.__worker_dirs.append(worker_dir)
+                with _WORKER_DIRS_LOCK:
+                    _WORKER_DIRS.add(worker_dir)
+                self.__pools[root] = (worker_dir, [], itertools.count())
+            (worker_dir, free, counter) = self.__pools[root]
+            slot = None
+            while len(free) > 0 and slot is None:
+                slot = free.pop()
+                if not os.path.isdir(slot):
+                    slot = None
+            if slot is None:
+                slot = os.path.join(worker_dir, str(next(counter)))
+                while os.path.exists(slot):
+                    # left by an earlier process with the same id
+                    slot = os.path.join(worker_dir, str(next(counter)))
+                os.makedirs(slot)
+            if small:
+                self.__reserved[slot] = size
+            return slot
+
+    def release(self, path):
+        """
+        Empties a directory returned by acquire(), and makes it available for reuse. If the content can not be removed
+        (e.g. a file is still open on Windows), the directory is not reused.
+
+        :param path: path of the directory.
+        """
+        try:
+            for name in os.listdir(path):
+                entry = os.path.join(path, name)
+                if os.path.isdir(entry) and not os.path.islink(entry):
+                    shutil.rmtree(entry)
+                else:
+                    os.remove(entry)
+            reusable = True
+        except OSError:
+            shutil.rmtree(path, ignore_errors=True)
+            reusable = False
+        with self.__lock:
+            self.__reserved.pop(path, None)
+            for (worker_dir, free, _) in self.__pools.values():
+                if os.path.dirname(path) == worker_dir:
+                    if reusable:
+                        free.append(path)
+                    return
+        shutil.rmtree(path, ignore_errors=True)
+
+    def __small_root_fits(self, size):
+        """
+        Checks, if a payload of the given size fits into the free space of small_root, next to the payloads of the slots
+        in use there. Called with the lock held.
+        """
+        try:
+            stat = os.statvfs(self.small_root)
+        except (OSError, AttributeError):
+            return False
+        return stat.f_bavail * stat.f_frsize - sum(self.__reserved.values()) >= size
+
+    def close(self):
+        """
+        Removes the directories of this instance. Slots still in use are removed as well, so only call it after all
+        operations have finished.
+        """
+        with self.__lock:
+            self.__pools.clear()
+            self.__reserved.clear()
+        self.__finalizer()
@@ -14,30 +14,44 @@
 # You should have received a copy of the GNU Affero General Public License along with this program.
 # If not, see https://www.gnu.org/licenses/.
 # 
-import requests
-import numpy as np
 import base64
+import io
 import tempfile
-import jwt
 import json
 import xml.etree.ElementTree as et
-import pkg_resources
-pkg_resources.require("pandas>=0.23.0")
 import pandas as pd
-import pickle
-import os
 import getpass
+import hashlib
+import threading
+import logging
 from time import sleep
+from time import time
+from time import perf_counter
 from .connector import Connector
 from .utilities import ServerException
 from .utilities import check_for_error
-import uuid
+from .utilities import check_version
+from .resilience import CircuitBreaker
+from .resilience import backoff_delay
+
+check_version(pd, "0.23.0")
 
 class Server(Connector):
     """
     Class for using a local or remote RapidMiner Server instance directly. You can read from and write to the Server repository and you can execute processes using the scalable Job Agent architecture.
     """
     __POLL_INTERVAL_SECONDS = 6
+    __UPLOAD_CHUNK_ROWS = 100000
+    # timeouts of the requests in seconds per operation, a (connect, read) tuple sets them separately
+    __TIMEOUTS = {"token": 30, "test": 30, "install": 60, "load": 600, "save": 600, "delete": 60, "process": 60,
+                  "submit": 60, "status": 30, "queues": 30}
+    # operations, whose requests can be repeated without side effects, and are retried
+    __IDEMPOTENT_OPERATIONS = ("token", "test", "load", "delete", "process", "status", "queues")
+    # responses of an overloaded or unreachable Server, that are retried, and counted as failures by the circuit breaker
+    __TRANSIENT_STATUS = (429, 502, 503, 504)
+    __RETRIES = 3
+    __RETRY_BACKOFF_SECONDS = 0.5
+    __MAX_RETRY_DELAY_SECONDS = 30
     __WEBSERVICE_PROCESS_XML = \
         """<?xml version="1.0" encoding="UTF-8"?><process version="9.3.000">
           <context>
@@ -89,6 +103,14 @@ class Server(Connector):
         :param processpath: path in the repository where the process behind the webservice will be saved. If not specified, a user prompt asks for the path, but proposes a default value.
         :param tempfolder: repository folder on Server that can be used for storing temporary objects by run_process method. Default value is "tmp" inside the user home folder. Note that in case of certain failures, you may need to delete remaining temporary objects from this folder manually.
         :param install: boolean. If set to false, webservice installation step is completely skipped.
+        :param poll_interval: number of seconds to wait between two job status requests while waiting for a process to finish. Default value is 6.
+        :param upload_chunk_rows: number of rows encoded at once by write_resource. DataFrames with more rows are streamed to the Server in a chunked request, so only one chunk is held in memory as JSON. Default value is 100000.
+        :param upload_progress: a function called by write_resource after every chunk sent, with the repository path, the number of rows sent, the total number of rows, the number of bytes sent and the elapsed seconds.
+        :param input_cache_ttl: number of seconds an input DataFrame uploaded by run_process is kept in the temporary folder for reuse. Subsequent run_process calls with an identical DataFrame (same content, columns and dtypes) reference the already uploaded repository location instead of uploading it again. The time is counted from the last run_process call that used the input, and inputs are not deleted while a process using them is running. Default value is None, which disables the reuse of inputs. Call clear_input_cache to delete the kept inputs.
+        :param timeout: timeout of the requests in seconds. A number (or a (connect, read) tuple) applies to all requests, a dict sets the timeout per operation: 'token', 'test', 'install', 'load' (read_resource), 'save' (write_resource), 'delete', 'process' (reading the process), 'submit', 'status' (job status) and 'queues'. None disables the timeout. By default load and save time out after 600 seconds without data, job status and queue requests after 30 seconds, the others after 30 or 60 seconds.
+        :param retries: the number of times a request of an idempotent operation (token, test, load, delete, process, status, queues) is retried after a connection error, a timeout or a 429, 502, 503 or 504 response. Saving data and submitting jobs are never retried. Default value is 3.
+        :param retry_backoff: the base delay of retries in seconds. The n-th retry waits a random time between 0 and retry_backoff * 2 ** n seconds (at most 30 seconds, or the Retry-After time of the response, if longer). Default value is 0.5.
+        :param circuit_breaker: a CircuitBreaker object, that is shared with other connectors of the same Server, or False to disable it. By default every connector has its own circuit breaker, that opens after 5 consecutive failed requests: requests then fail immediately with a ServerException for 30 seconds, instead of waiting for a degraded Server.
         """
         super(Server, self).__init__(**kwargs)
         # URL of the Rapidminer Server
@@ -120,6 +142,46 @@ class Server(Connector):
             self.__install = kwargs["install"]
         else:
             self.__install = True
+        if "poll_interval" in kwargs:
+            self.__poll_interval = kwargs["poll_interval"]
+        else:
+            self.__poll_interval = self.__POLL_INTERVAL_SECONDS
+        if "upload_chunk_rows" in kwargs:
+            self.__upload_chunk_rows = kwargs["upload_chunk_rows"]
+        else:
+            self.__upload_chunk_rows = self.__UPLOAD_CHUNK_ROWS
+        if "upload_progress" in kwargs:
+            self.__upload_progress = kwargs["upload_progress"]
+        else:
+            self.__upload_progress = None
+        if "input_cache_ttl" in kwargs:
+            self.__input_cache_ttl = kwargs["input_cache_ttl"]
+        else:
+            self.__input_cache_ttl = None
+        # maps the content hash of uploaded inputs to [repository path, time of last use, number of running processes using it]
+        self.__input_cache = {}
+        self.__input_cache_lock = threading.Lock()
+        self.__timeouts = dict(self.__TIMEOUTS)
+        if "timeout" in kwargs:
+            if isinstance(kwargs["timeout"], dict):
+                for operation in kwargs["timeout"]:
+                    if operation not in self.__TIMEOUTS:
+                        raise ValueError("Unknown operation '" + str(operation) + "' in timeout, use one of " + ", ".join(sorted(self.__TIMEOUTS)) + ".")
+                self.__timeouts.update(kwargs["timeout"])
+            else:
+                self.__timeouts = dict((operation, kwargs["timeout"]) for operation in self.__TIMEOUTS)
+        if "retries" in kwargs:
+            self.__retries = kwargs["retries"]
+        else:
+            self.__retries = self.__RETRIES
+        if "retry_backoff" in kwargs:
+            self.__retry_backoff = kwargs["retry_backoff"]
+        else:
+            self.__retry_backoff = self.__RETRY_BACKOFF_SECONDS
+        if "circuit_breaker" in kwargs and kwargs["circuit_breaker"] is not None:
+            self.__circuit_breaker = kwargs["circuit_breaker"] if kwargs["circuit_breaker"] is not False else None
+        else:
+            self.__circuit_breaker = CircuitBreaker()
         
         # Connect to the RM Server
         self.__connect()
@@ -132,12 +194,14 @@ class Server(Connector):
 # Public functions #
 ####################
 
-    def read_resource(self, input):
+    def read_resource(self, input, columns=None, filter=None):
         """
         Reads the resource from the specified Server repository location
 
         :param input: the path(s) to the resource(s) inside Server repository
-        :return: the resource(s) as a pandas DataFrame(s). If multiple inputs are specified, the same number of inputs will be returned, as tuple of DataFrame objects. Otherwise, the return value is a single DataFrame.
+        :param columns: optional list of columns to read. The other columns are dropped from the response before it is decoded.
+        :param filter: optional row filter, a list of (column, operator, value) tuples that must all hold, or a list of such lists, any of which must hold. Supported operators are ==, !=, <, <=, >, >=, in and not in. A function that takes a DataFrame and returns a boolean mask is accepted as well.
+        :return: the resource(s) as a pandas DataFrame(s). If multiple inputs are specified, the same number of inputs will be returned, as tuple of DataFrame objects. Otherwise, the return value is a single DataFrame. The data is requested in table layout, where the schema declares the column types, and the columns declared nominal are returned as pandas Categorical. Webservices that still respond column oriented send no column types, those responses are decoded without Categorical columns.
          """
         if not ((isinstance(input, tuple) or isinstance(input, list))):
             input = [input]
@@ -147,12 +211,29 @@ class Server(Connector):
         resources = []
         for inp in input:
             post_url = self.server_url + "/api/rest/process/" + self.webservice + "?"
-            r = requests.post(post_url, json={"command": "load", "path": inp}, headers=self.auth_header)
-            if r.status_code != 200:
-                raise ServerException("Failed to read input \"" + inp + "\", status: " + str(r.status_code))
-            response = check_for_error(r)
-            dataset = pd.read_json(json.dumps(response))
-            resources.append(dataset)
+            with self._instrumentation.span("server.download") as span:
+                r = self.__request("load", "POST", post_url, json={"command": "load", "path": inp, "format": "table"}, headers=self.auth_header)
+                if r.status_code != 200:
+                    raise ServerException("Failed to read input \"" + inp + "\", status: " + str(r.status_code))
+                response = check_for_error(r)
+                if self.__is_table_layout(response):
+                    # the column types are declared by the schema: nominal columns (with an enum constraint) are decoded as Categorical
+                    dataset = pd.read_json(io.StringIO(json.dumps(response)), orient="table")
+                else:
+                    if columns is not None and isinstance(response, dict):
+                        # the response is column oriented, the columns not needed are dropped before decoding
+                        read_columns = list(columns) + [name for name in self._filter_columns(filter) if name not in columns]
+                        response = dict((name, response[name]) for name in read_columns if name in response)
+                    dataset = pd.read_json(io.StringIO(json.dumps(response)))
+                if filter is not None:
+                    dataset = self._apply_filter(dataset, filter).reset_index(drop=True)
+                if columns is not None:
+                    dataset = dataset[list(columns)]
+                if self._schema_cache is not None and columns is None and filter is None:
+                    self._schema_cache.store(self.__schema_key(inp), None, dataset)
+                resources.append(dataset)
+                if span.enabled:
+                    span.set(bytes=len(r.content), **self._shape_attributes(dataset))
         if single_input:
             return resources[0]
         else:
@@ -173,11 +254,21 @@ class Server(Connector):
         if len(dataframe) != len(output):
             raise ValueError("dataframe and output must contain the same number of values")
         for i in range(len(dataframe)):
+            if self._schema_cache is not None:
+                self._schema_cache.invalidate(self.__schema_key(output[i]))
             post_url = self.server_url + "/api/rest/process/" + self.webservice + "?"
-            data = json.loads(dataframe[i].to_json(orient="table", index=False))
-            r = requests.post(post_url, json={"command": "save", "path": output[i], "data": data}, headers=self.auth_header)
-            if r.status_code != 200:
-                raise ServerException("Failed to save input no. " + str(i) + ", status: " + str(r.status_code))
+            with self._instrumentation.span("server.upload") as span:
+                sent = [0, 0]
+                body = self.__save_request_body(dataframe[i], output[i], sent)
+                if dataframe[i].shape[0] <= self.__upload_chunk_rows:
+                    body = b"".join(body)
+                headers = dict(self.auth_header)
+                headers["Content-Type"] = "application/json"
+                r = self.__request("save", "POST", post_url, data=body, headers=headers)
+                if r.status_code != 200:
+                    raise ServerException("Failed to save input no. " + str(i) + ", status: " + str(r.status_code))
+                if span.enabled:
+                    span.set(bytes=sent[1], chunks=sent[0], **self._shape_attributes(dataframe[i]))
             if len(r.content) > 0:
                 try:
                     check_for_error(r)
@@ -185,6 +276,19 @@ class Server(Connector):
                     # ignore, as there is not necessarily an output
                     return
 
+    def describe_resource(self, path):
+        """
+        Describes a data table in the Server repository. The Server does not report the modification time of the entries, so a cached schema is used for schema_cache_ttl seconds after the resource was read, or until it is written by this connector. Otherwise the resource is read, and its schema is cached.
+
+        :param path: the path to the resource inside Server repository.
+        :return: dict with the column names ('columns'), the pandas dtype of every column as a string ('dtypes'), the rm_metadata of the columns ('rm_metadata', None if not known) and the number of rows ('rows').
+        """
+        if self._schema_cache is not None:
+            schema = self._schema_cache.lookup(self.__schema_key(path), None)
+            if schema is not None:
+                return schema
+        return self._describe_data(self.__schema_key(path), None, self.read_resource(path))
+
     def run_process(self, path, inputs=None, **kwargs):
         """
         Runs a RapidMiner process.
@@ -197,7 +301,8 @@ class Server(Connector):
         :param queue: the name of the queue to submit the process to. Default is DEFAULT
         :param macros: optional dict that sets the macros in the process context according to the key-value pairs
         :param ignore_cleanup_errors: boolean. Determines if any error during temporary data cleanup should lead to an error. Default value is True
-        :return: the results of the RapidMiner process, as a list of pandas DataFrame objects.
+        :param lazy: boolean. If set to True, the results are not downloaded when the job finishes, but a ProcessResults object is returned instead, that downloads each result when it is first accessed. Default value is False.
+        :return: the results of the RapidMiner process, as a list of pandas DataFrame objects, or a ProcessResults object if lazy is True.
         """
         if inputs is not None and not ((isinstance(inputs, tuple) or isinstance(inputs, list))):
             inputs = [inputs]
@@ -213,53 +318,92 @@ class Server(Connector):
             ignore_cleanup_errors = kwargs["ignore_cleanup_errors"]
         else:
             ignore_cleanup_errors = True
+        if "lazy" in kwargs:
+            lazy = kwargs["lazy"]
+        else:
+            lazy = False
 
         process_xml = self.__read_process_xml(path)
-        root = et.fromstring(process_xml)
         temp_resources = []
-        context = {}
+        cached_keys = []
         try:
+            input_resources = None
             if inputs != None and len(inputs) > 0:
-                input_resources = [self.__tempfolder + next(tempfile._get_candidate_names()) for _ in inputs]
-                temp_resources += input_resources
-                self.write_resource(inputs, input_resources)
-                # add input locations in process xml
-                context["inputLocations"] = input_resources
-            # find connected output ports, add locations to process xml
-            output_resources = []
-            for wire in root.find('operator').find('process').findall('connect'):
-                if wire.attrib['to_port'].startswith('result '):
-                    output_resources.append(self.__tempfolder + next(tempfile._get_candidate_names()))
-            if len(output_resources) > 0:
-                context["outputLocations"] = output_resources
-            temp_resources += output_resources
-            # set macros in process xml
-            if macros != None:
-                macros_dict = {}
-                for key, value in macros.items():
-                    macros_dict[key] = value
-                context["macros"] = macros_dict
-            r = self.__submit_process_xml(queue, process_xml, path, context)
-            if r.status_code != 200:
-                raise ServerException("Failed to submit process, status: " + str(r.status_code))
-            jobid = r.json()["id"]
-            print("Submitted process with job id:", jobid)
-            self.__wait_for_job(jobid)
-            res = self.read_resource(output_resources)
-            if not isinstance(res, tuple):
-                return [res]
-            return list(res)
+                if self.__input_cache_ttl is None:
+                    input_resources = [self.__tempfolder + next(tempfile._get_candidate_names()) for _ in inputs]
+                    temp_resources += input_resources
+                    self.write_resource(inputs, input_resources)
+                else:
+                    (input_resources, cached_keys) = self.__upload_cached_inputs(inputs)
+            return self.__run_process_xml(path, process_xml, input_resources, queue, macros, ignore_cleanup_errors, lazy)
         finally:
-            if ignore_cleanup_errors:
-                try:
-                    self.__delete_resource(temp_resources)
-                except Exception as e:
-                    strfile = "file" if len(temp_resources) == 1 else "files"
-                    message = e.message if hasattr(e, 'message') else str(e)
-                    print("Could not delete the following temporary " + strfile + ", error: " + message)
-                    print("\n".join(t for t in temp_resources))
-            else:
-                self.__delete_resource(temp_resources)
+            self.__release_cached_inputs(cached_keys)
+            self.__cleanup_resources(temp_resources, ignore_cleanup_errors)
+
+    def run_process_grid(self, path, inputs=None, macro_grid=None, **kwargs):
+        """
+        Runs a RapidMiner process for every combination of macro values. The process is read and the inputs are uploaded only once, and shared by the jobs, which are submitted in parallel.
+
+        Arguments:
+        :param path: path to the RapidMiner process.
+        :param inputs: inputs used by the RapidMiner process, as a list of pandas DataFrame objects or a single pandas DataFrame.
+        :param macro_grid: dict of macro name to the list of its values, or a list of dicts, each defining the macros of one run.
+
+        Possible kwargs arguments:
+        :param queue: the name of the queue to submit the jobs to. Default is DEFAULT
+        :param ignore_cleanup_errors: boolean. Determines if any error during temporary data cleanup should lead to an error. Default value is True
+        :param workers: the number of jobs running in parallel. Default is 4.
+        :param resume: path of a local directory, where the results of the finished runs are stored. If the grid is run again with the same directory, the same process and the same inputs, the stored results are reused, and only the missing runs are submitted.
+        :return: dict of the tuple of macro values (in the order of the macro names in macro_grid) to the results of the run, as a list of pandas DataFrame objects.
+        """
+        if inputs is not None and not ((isinstance(inputs, tuple) or isinstance(inputs, list))):
+            inputs = [inputs]
+        if "queue" in kwargs:
+            queue = kwargs["queue"]
+        else:
+            queue = "DEFAULT"
+        if "ignore_cleanup_errors" in kwargs:
+            ignore_cleanup_errors = kwargs["ignore_cleanup_errors"]
+        else:
+            ignore_cleanup_errors = True
+        if "workers" in kwargs:
+            workers = kwargs["workers"]
+        else:
+            workers = 4
+        if "resume" in kwargs:
+            resume = kwargs["resume"]
+        else:
+            resume = None
+        (names, points) = self._grid_points(macro_grid)
+        temp_resources = []
+        cached_keys = []
+        # the process is read and the inputs are uploaded by the first run, so nothing is done, if all runs are resumed
+        prepared = []
+        prepare_lock = threading.Lock()
+        def run_point(macros):
+            with prepare_lock:
+                if len(prepared) == 0:
+                    input_resources = None
+                    if inputs is not None and len(inputs) > 0:
+                        if self.__input_cache_ttl is None:
+                            input_resources = [self.__tempfolder + next(tempfile._get_candidate_names()) for _ in inputs]
+                            temp_resources.extend(input_resources)
+                            self.write_resource(inputs, input_resources)
+                        else:
+                            (input_resources, keys) = self.__upload_cached_inputs(inputs)
+                            cached_keys.extend(keys)
+                    prepared.append((self.__read_process_xml(path), input_resources))
+            (process_xml, input_resources) = prepared[0]
+            return self.__run_process_xml(path, process_xml, input_resources, queue, macros, ignore_cleanup_errors, False)
+        # stored results are only reused for the same process and input content
+        context = None
+        if resume is not None:
+            context = [path, [self.__hash_dataframe(df) for df in inputs] if inputs is not None else []]
+        try:
+            return self._run_grid(names, points, run_point, workers, resume, context)
+        finally:
+            self.__release_cached_inputs(cached_keys)
+            self.__cleanup_resources(temp_resources, ignore_cleanup_errors)
 
     def getQueues(self):
         """
@@ -268,21 +412,87 @@ class Server(Connector):
         :return: a JSON array of objects representing each queue with its properties
         """
         get_url = self.server_url + "/executions/queues?"
-        r = requests.get(get_url, headers=self.auth_header)
+        r = self.__request("queues", "GET", get_url, headers=self.auth_header)
         if r.status_code != 200:
             raise ServerException("Failed to get queues, status: " + str(r.status_code))
         return r.json()
 
+    def clear_input_cache(self):
+        """
+        Deletes the inputs kept in the temporary folder for reuse by run_process (see input_cache_ttl parameter). Inputs of
+        processes still running are deleted when the last of these processes finishes.
+        """
+        with self.__input_cache_lock:
+            idle = [key for key, (_, _, users) in self.__input_cache.items() if users == 0]
+            paths = [self.__input_cache.pop(key)[0] for key in idle]
+            for entry in self.__input_cache.values():
+                # expired, deleted on release
+                entry[1] = None
+        self.__delete_resource(paths)
+
 #####################
 # Private functions #
 #####################
 
+    def __request(self, operation, method, url, **kwargs):
+        """
+        Sends a request with the timeout of the operation, through the circuit breaker. Requests of idempotent operations
+        are retried after connection errors, timeouts and transient server errors, with exponential backoff and jitter.
+
+        :param operation: name of the operation, a key of __TIMEOUTS.
+        :param method: the HTTP method.
+        :param url: the url of the request.
+        :return: the response. Connection errors and timeouts are raised, when no retries are left.
+        """
+        import requests # deferred to keep importing the package cheap
+        retries = self.__retries if operation in self.__IDEMPOTENT_OPERATIONS else 0
+        attempt = 0
+        while True:
+            if self.__circuit_breaker is not None:
+                self.__circuit_breaker.before_request(operation)
+            try:
+                r = requests.request(method, url, timeout=self.__timeouts[operation], **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if self.__circuit_breaker is not None:
+                    self.__circuit_breaker.record_failure()
+                if attempt >= retries:
+                    raise
+                delay = backoff_delay(attempt, self.__retry_backoff, self.__MAX_RETRY_DELAY_SECONDS)
+                reason = type(e).__name__
+            else:
+                transient = r.status_code in self.__TRANSIENT_STATUS
+                if self.__circuit_breaker is not None:
+                    # every server error counts for the breaker, also those that are not retried
+                    if transient or r.status_code >= 500:
+                        self.__circuit_breaker.record_failure()
+                    else:
+                        self.__circuit_breaker.record_success()
+                if not transient or attempt >= retries:
+                    return r
+                delay = max(backoff_delay(attempt, self.__retry_backoff, self.__MAX_RETRY_DELAY_SECONDS), self.__retry_after(r))
+                reason = "status " + str(r.status_code)
+                r.close()
+            attempt += 1
+            self.log("Retrying " + operation + " request (" + reason + "), attempt " + str(attempt) + " of " + str(retries)
+                     + " in " + "%.2f" % delay + " seconds", level=logging.WARNING)
+            with self._instrumentation.span("server.retry", operation=operation, attempt=attempt, reason=reason):
+                sleep(delay)
+
+    def __retry_after(self, response):
+        """
+        Returns the delay requested by the Retry-After header of the response in seconds (at most __MAX_RETRY_DELAY_SECONDS), 0 if not specified in seconds.
+        """
+        try:
+            return min(float(response.headers.get("Retry-After", 0)), self.__MAX_RETRY_DELAY_SECONDS)
+        except ValueError:
+            return 0
+
     def __connect(self):
         # Encode the basic Authorization header
         userAndPass = base64.b64encode(bytes(self.username + ":" + self.__password, 'utf-8')).decode("ascii")
         headers = { 'Authorization' : 'Basic %s' %  userAndPass }
 
-        r = requests.get(url=self.server_url + '/internal/jaxrest/tokenservice', headers=headers)
+        r = self.__request("token", "GET", self.server_url + '/internal/jaxrest/tokenservice', headers=headers)
         
         # JWT idToken for the RM Server
         self.idToken = r.json()['idToken']
@@ -291,7 +501,8 @@ class Server(Connector):
         self.auth_header = { 'Authorization' : 'Bearer %s' %  self.idToken }
         
         # RM Server Client Info
-        self.tokenDecoded = jwt.decode(self.idToken, verify=False)
+        import jwt # only needed here, deferred to keep importing the package cheap
+        self.tokenDecoded = jwt.decode(self.idToken, options={"verify_signature": False})
         if r.status_code == 200:
             print("Successfully connected to the Server")
         else:
@@ -300,7 +511,7 @@ class Server(Connector):
     def __test_and_install(self):
         # test if webservice exists
         post_url = self.server_url + "/api/rest/process/" + self.webservice + "?"
-        r = requests.post(post_url, json={"command": "test"}, headers=self.auth_header)
+        r = self.__request("test", "POST", post_url, json={"command": "test"}, headers=self.auth_header)
         if r.status_code == 404:
             print("Webservice is not installed, installing it with the name '" + self.webservice + "'...")
             default_webservice_path = "/home/" + self.username + "/" + self.webservice
@@ -309,19 +520,188 @@ class Server(Connector):
                 webservice_path = default_webservice_path
             self.__install_webservice(webservice_path)
             # Re-test installed service
-            r = requests.post(post_url, json={"command": "test"}, headers=self.auth_header)
+            r = self.__request("test", "POST", post_url, json={"command": "test"}, headers=self.auth_header)
             if r.status_code != 200:
-                raise ServerException("Test of installed webservice failed, status: " + r.status_code)
+                raise ServerException("Test of installed webservice failed, status: " + str(r.status_code))
             print("Webservice installed successfully")
         elif r.status_code == 200:
             check_for_error(r)   
         else:
-            raise ServerException("Webservice test failed with unexpected error, status: " + r.status_code \
+            raise ServerException("Webservice test failed with unexpected error, status: " + str(r.status_code) \
                                   + ". Make sure that the webservice with the name '" + self.webservice + ' is installed.')
     
+    def __schema_key(self, path):
+        return "server:" + self.server_url + ":" + path
+
+    def __cleanup_resources(self, temp_resources, ignore_cleanup_errors):
+        if ignore_cleanup_errors:
+            try:
+                self.__delete_resource(temp_resources)
+            except Exception as e:
+                strfile = "file" if len(temp_resources) == 1 else "files"
+                message = e.message if hasattr(e, 'message') else str(e)
+                print("Could not delete the following temporary " + strfile + ", error: " + message)
+                print("\n".join(t for t in temp_resources))
+        else:
+            self.__delete_resource(temp_resources)
+
+    def __hash_dataframe(self, df):
+        h = hashlib.sha1()
+        h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+        h.update(json.dumps([str(t) for t in df.dtypes]).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        return h.hexdigest()
+
+    def __upload_cached_inputs(self, inputs):
+        """
+        Uploads the inputs that are not yet in the input cache, and returns the repository locations of all inputs.
+        Expired cache entries, that are not used by a running process, are deleted from the repository first. The
+        returned cache keys must be released with __release_cached_inputs, when the process has finished.
+
+        :param inputs: list of pandas DataFrame objects.
+        :return: tuple of the list of repository locations, one for every input, and the list of the cache keys used.
+        """
+        input_keys = [self.__hash_dataframe(df) for df in inputs]
+        with self.__input_cache_lock:
+            now = time()
+            expired = [key for key, (_, used, users) in self.__input_cache.items()
+                       if users == 0 and (used is None or now - used > self.__input_cache_ttl)]
+            expired_paths = [self.__input_cache.pop(key)[0] for key in expired]
+            input_resources = []
+            new_keys = []
+            new_dataframes = []
+            new_resources = []
+            for (df, key) in zip(inputs, input_keys):
+                if key in self.__input_cache:
+                    input_resources.append(self.__input_cache[key][0])
+                elif key in new_keys:
+                    input_resources.append(new_resources[new_keys.index(key)])
+                else:
+                    path = self.__tempfolder + next(tempfile._get_candidate_names())
+                    input_resources.append(path)
+                    new_keys.append(key)
+                    new_dataframes.append(df)
+                    new_resources.append(path)
+            if len(new_dataframes) > 0:
+                # uploaded while holding the lock, so that concurrent calls with the same content upload it only once
+                self.write_resource(new_dataframes, new_resources)
+                for key, path in zip(new_keys, new_resources):
+                    self.__input_cache[key] = [path, now, 0]
+            used_keys = list(set(input_keys))
+            for key in used_keys:
+                entry = self.__input_cache[key]
+                if entry[1] is not None:
+                    entry[1] = now
+                entry[2] += 1
+        if len(expired_paths) > 0:
+            try:
+                self.__delete_resource(expired_paths)
+            except Exception as e:
+                print("Could not delete expired cached inputs, error: " + str(e))
+        return (input_resources, used_keys)
+
+    def __release_cached_inputs(self, keys):
+        """
+        Releases the cached inputs of a finished process, and refreshes their time of last use. Inputs removed by
+        clear_input_cache while in use are deleted, when they are not used anymore.
+        """
+        if len(keys) == 0:
+            return
+        now = time()
+        cleared_paths = []
+        with self.__input_cache_lock:
+            for key in keys:
+                entry = self.__input_cache[key]
+                entry[2] -= 1
+                if entry[1] is None:
+                    if entry[2] == 0:
+                        cleared_paths.append(self.__input_cache.pop(key)[0])
+                else:
+                    entry[1] = now
+        if len(cleared_paths) > 0:
+            try:
+                self.__delete_resource(cleared_paths)
+            except Exception as e:
+                print("Could not delete cleared cached inputs, error: " + str(e))
+
+    def __run_process_xml(self, path, process_xml, input_resources, queue, macros, ignore_cleanup_errors, lazy):
+        """
+        Submits the process to the queue with already uploaded inputs, waits for the job, and reads the results.
+        """
+        root = et.fromstring(process_xml)
+        temp_resources = []
+        context = {}
+        try:
+            if input_resources is not None:
+                # add input locations in process xml
+                context["inputLocations"] = input_resources
+            # find connected output ports, add locations to process xml
+            output_resources = []
+            output_names = []
+            for wire in root.find('operator').find('process').findall('connect'):
+                if wire.attrib['to_port'].startswith('result '):
+                    output_resources.append(self.__tempfolder + next(tempfile._get_candidate_names()))
+                    output_names.append([wire.attrib['to_port'], wire.attrib.get('from_op')])
+            if len(output_resources) > 0:
+                context["outputLocations"] = output_resources
+            temp_resources += output_resources
+            # set macros in process xml
+            if macros != None:
+                macros_dict = {}
+                for key, value in macros.items():
+                    macros_dict[key] = value
+                context["macros"] = macros_dict
+            with self._instrumentation.span("server.submit", queue=queue):
+                r = self.__submit_process_xml(queue, process_xml, path, context)
+                if r.status_code != 200:
+                    raise ServerException("Failed to submit process, status: " + str(r.status_code))
+            jobid = r.json()["id"]
+            print("Submitted process with job id:", jobid)
+            self.__wait_for_job(jobid)
+            if lazy:
+                results = ProcessResults(self.read_resource, output_resources, output_names,
+                                         lambda paths: self.__cleanup_resources(paths, ignore_cleanup_errors))
+                temp_resources = [t for t in temp_resources if t not in output_resources]
+                return results
+            res = self.read_resource(output_resources)
+            if not isinstance(res, tuple):
+                return [res]
+            return list(res)
+        finally:
+            self.__cleanup_resources(temp_resources, ignore_cleanup_errors)
+
+    def __save_request_body(self, df, path, sent):
+        """
+        Generates the body of the save request of the webservice, the same JSON as to_json(orient="table"), chunk by chunk.
+        Only one chunk of rows is encoded at a time.
+
+        :param df: the pandas DataFrame.
+        :param path: the repository path.
+        :param sent: list of the number of chunks and bytes generated so far, updated by the generator.
+        :return: generator of bytes.
+        """
+        start = perf_counter()
+        schema = json.loads(df.iloc[:0].to_json(orient="table", index=False))["schema"]
+        head = ('{"command": "save", "path": ' + json.dumps(path) + ', "data": {"schema": ' + json.dumps(schema) + ', "data": [').encode("utf-8")
+        sent[1] += len(head)
+        yield head
+        rows = df.shape[0]
+        for offset in range(0, rows, self.__upload_chunk_rows):
+            records = df.iloc[offset:offset + self.__upload_chunk_rows].to_json(orient="records", date_format="iso", date_unit="ms")
+            # strip the enclosing brackets, chunks are separated by commas
+            chunk = ((", " if offset > 0 else "") + records[1:-1]).encode("utf-8")
+            sent[0] += 1
+            sent[1] += len(chunk)
+            yield chunk
+            if self.__upload_progress is not None:
+                self.__upload_progress(path, min(offset + self.__upload_chunk_rows, rows), rows, sent[1], perf_counter() - start)
+        tail = b"]}}"
+        sent[1] += len(tail)
+        yield tail
+
     def __read_process_xml(self, path):
         get_url = self.server_url + "/api/rest/resources" + path
-        r = requests.get(get_url, headers=self.auth_header)
+        r = self.__request("process", "GET", get_url, headers=self.auth_header)
         if r.status_code != 200:
             raise ServerException("Failed to get process \"" + path + "\", status: " + str(r.status_code))
         return r.text
@@ -334,32 +714,52 @@ class Server(Connector):
             "location": location, 
             "context": context
         }
-        return requests.post(url=post_url, json=body, headers=self.auth_header)
+        return self.__request("submit", "POST", post_url, json=body, headers=self.auth_header)
 
     __JOB_STATE_ERROR = ("TIMED_OUT", "STOPPED", "ERROR")
     __JOB_STATE_SUCCESS = ("FINISHED")
     
+    __JOB_STATE_QUEUED = ("PENDING",)
+
     def __wait_for_job(self, jobid):
+        # queue wait and execution time are measured with the precision of the polling interval
+        submitted = perf_counter()
+        started = None
         while True:
-            sleep(self.__POLL_INTERVAL_SECONDS)
+            sleep(self.__poll_interval)
             get_url = self.server_url + "/executions/jobs/" + jobid
-            r = requests.get(get_url, headers=self.auth_header)
+            r = self.__request("status", "GET", get_url, headers=self.auth_header)
             if r.status_code != 200:
-                raise ServerException("Error during getting job status, job id: " + jobid + ", status: " + r.status_code)
+                raise ServerException("Error during getting job status, job id: " + jobid + ", status: " + str(r.status_code))
             r = r.json()
+            if started is None and r["state"] not in self.__JOB_STATE_QUEUED:
+                started = perf_counter()
+                self._instrumentation.record("server.queue_wait", started - submitted, {"job": jobid})
             if r["state"] in self.__JOB_STATE_ERROR:
+                self._instrumentation.record("server.execution", perf_counter() - started, {"job": jobid, "error": r["state"]})
                 raise ServerException("Job finished with error state: " + r["state"] + ", " + Server.__format_job_error(r))
             elif r["state"] in self.__JOB_STATE_SUCCESS:
+                self._instrumentation.record("server.execution", perf_counter() - started, {"job": jobid})
                 return
     
     def __format_job_error(response):
         # TODO: improve
         return "Unknown error" if "error" not in response else response["error"]["type"] + ": " + response["error"]["title"] + ": " + response["error"]["message"]
     
+    @staticmethod
+    def __is_table_layout(response):
+        """
+        Checks if a load response is in table layout (a JSON Table Schema with a list of records), and not column oriented. Column oriented data maps every column to an object of index and value, never to a list, so columns that happen to be named "schema" and "data" are not mistaken for a table layout.
+        """
+        if not isinstance(response, dict) or set(response.keys()) != {"schema", "data"}:
+            return False
+        schema = response["schema"]
+        return isinstance(schema, dict) and isinstance(schema.get("fields"), list) and isinstance(response["data"], list)
+
     def __delete_resource(self, resource_paths):
         post_url = self.server_url + "/api/rest/process/" + self.webservice + "?"
         for path in resource_paths:
-            r = requests.post(post_url, json={"command": "del", "path": path}, headers=self.auth_header)
+            r = self.__request("delete", "POST", post_url, json={"command": "del", "path": path}, headers=self.auth_header)
             if r.status_code != 200:
                 raise ServerException("Failed to delete path \"" + path + "\", status: " + str(r.status_code))
     
@@ -371,14 +771,89 @@ class Server(Connector):
         post_url = self.server_url + "/api/rest/resources" + path
         head = self.auth_header.copy()
         head['Content-Type'] = 'application/vnd.rapidminer.rmp+xml'
-        r = requests.post(post_url, headers=head, data=process)
+        r = self.__request("install", "POST", post_url, headers=head, data=process)
         if r.status_code != 201:
             raise ServerException("Failed to save process to repository path '" + path + "', status: " + str(r.status_code))
         return r
 
     def __postService(self, serviceName, descriptor):
         post_url = self.server_url + "/api/rest/service/" + serviceName
-        r = requests.post(post_url, auth=(self.username, self.__password), data=descriptor)
+        r = self.__request("install", "POST", post_url, auth=(self.username, self.__password), data=descriptor)
         if r.status_code != 200:
             raise ServerException("Failed to install webservice with the name '" + serviceName + "', status: " + str(r.status_code))
         return r
+
+
+class ProcessResults(object):
+    """
+    Results of a Server process run with lazy=True. Every result is downloaded from the Server repository and decoded
+    only when it is first accessed. Results can be selected by their position, by the name of the process output port
+    (e.g. "result 1") or by the name of the operator connected to that port. The temporary repository entry of a
+    result is deleted after it has been downloaded; call close() (or use the object as a context manager) to delete
+    the entries of results that were never accessed.
+    """
+
+    def __init__(self, loader, locations, names, cleanup):
+        """
+        :param loader: function that reads a single repository location into a pandas DataFrame.
+        :param locations: the repository locations of the results.
+        :param names: list of names for every result, used for selecting the results by name.
+        :param cleanup: function that deletes a list of repository locations.
+        """
+        self.__loader = loader
+        self.__locations = list(locations)
+        self.__names = [[n for n in result_names if n is not None] for result_names in names]
+        self.__cleanup = cleanup
+        self.__fetched = {}
+        self.__closed = False
+
+    def __len__(self):
+        return len(self.__locations)
+
+    def __iter__(self):
+        for i in range(len(self.__locations)):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(len(self.__locations))[key]]
+        index = self.__index(key)
+        if index not in self.__fetched:
+            if self.__closed:
+                raise ServerException("Result no. " + str(index) + " is not available, results are already closed.")
+            self.__fetched[index] = self.__loader(self.__locations[index])
+            self.__cleanup([self.__locations[index]])
+        return self.__fetched[index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def keys(self):
+        """
+        Returns the names of the results.
+
+        :return: list with the first name of every result (the output port name).
+        """
+        return [result_names[0] if len(result_names) > 0 else str(i) for i, result_names in enumerate(self.__names)]
+
+    def close(self):
+        """
+        Deletes the temporary repository entries of the results that were not accessed. These results are not available afterwards.
+        """
+        if not self.__closed:
+            self.__closed = True
+            remaining = [location for i, location in enumerate(self.__locations) if i not in self.__fetched]
+            if len(remaining) > 0:
+                self.__cleanup(remaining)
+
+    def __index(self, key):
+        if isinstance(key, str):
+            matches = [i for i, result_names in enumerate(self.__names) if key in result_names]
+            if len(matches) == 0:
+                raise KeyError(key)
+            return matches[0]
+        index = range(len(self.__locations))[key]
+        return index
@@ -0,0 +1,234 @@
+# 
+# This file is part of the RapidMiner Python package.
+# 
+# Copyright (C) 2018-2019 RapidMiner GmbH
+# 
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU Affero General Public License as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+# even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+# 
+# You should have received a copy of the GNU Affero General Public License along with this program.
+# If not, see https://www.gnu.org/licenses/.
+# 
+import contextlib
+import os
+import struct
+import sys
+import tempfile
+import weakref
+from .utilities import GeneralException
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# the block starts with the reference count, columns are aligned to cache lines
+_HEADER_SIZE = 64
+_ALIGNMENT = 64
+_COUNT_FORMAT = "q"
+# numpy dtype kinds stored in the block: bool, integers, floats, complex, timedeltas and datetimes
+_SHARED_KINDS = "biufcmM"
+
+def _shared_memory():
+    try:
+        from multiprocessing import shared_memory
+        return shared_memory
+    except ImportError:
+        raise GeneralException("Shared memory DataFrames require Python 3.8 or newer.")
+
+def _open_block(name=None, size=0):
+    """
+    Creates or attaches a shared memory block. The block is not tracked by the resource tracker of multiprocessing,
+    that would unlink it when the first process using it exits; its lifetime is defined by the reference count instead.
+    """
+    shared_memory = _shared_memory()
+
+    class _Block(shared_memory.SharedMemory):
+        def close(self):
+            try:
+                super(_Block, self).close()
+            except BufferError:
+                # DataFrames still use the mapping, it is unmapped when the last of their arrays is freed
+                if getattr(self, "_fd", -1) >= 0:
+                    os.close(self._fd)
+                    self._fd = -1
+
+    if sys.version_info >= (3, 13):
+        return _Block(name=name, create=name is None, size=size, track=False)
+    block = _Block(name=name, create=name is None, size=size)
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(getattr(block, "_name", block.name), "shared_memory")
+    return block
+
+def _unlink_block(block):
+    if sys.version_info < (3, 13) and os.name == "posix":
+        # unlink() unregisters the block from the resource tracker, that it was never registered with (see _open_block)
+        from multiprocessing import resource_tracker
+        resource_tracker.register(getattr(block, "_name", block.name), "shared_memory")
+    block.unlink()
+
+@contextlib.contextmanager
+def _count_lock(name):
+    """
+    Locks the reference count of a block across processes. Yields the name of the lock file.
+    """
+    path = os.path.join(tempfile.gettempdir(), "rapidminer-shm-" + name.lstrip("/") + ".lock")
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield path
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class _Reference(object):
+    """
+    One reference to a block, held by a SharedFrame. Released explicitly, or when the SharedFrame is garbage collected.
+    """
+    def __init__(self, name, block=None):
+        self.name = name
+        self.block = block
+        self.released = False
+
+    def open(self):
+        if self.block is None:
+            self.block = _open_block(self.name)
+        return self.block
+
+    def add(self, delta):
+        """
+        Changes the reference count of the block, and unlinks it when the count drops to zero.
+        """
+        if fcntl is None:
+            # Windows frees the block when the last process closes it, there is no count to maintain
+            return
+        block = self.open()
+        with _count_lock(self.name) as lock_file:
+            count = struct.unpack_from(_COUNT_FORMAT, block.buf, 0)[0] + delta
+            struct.pack_into(_COUNT_FORMAT, block.buf, 0, count)
+            if count <= 0:
+                _unlink_block(block)
+                os.remove(lock_file)
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        try:
+            self.add(-1)
+        finally:
+            if self.block is not None:
+                self.block.close()
+                self.block = None
+
+class SharedFrame(object):
+    """
+    Handle of a pandas DataFrame, whose numeric, boolean and datetime columns are stored in a shared memory block.
+    Pickling the handle, e.g. to return it from a worker process, only copies the layout and the remaining columns, not
+    the shared data, and to_dataframe() maps the block without copying it.
+
+    The block is reference counted: every handle holds one reference, including the ones sent to other processes, and
+    the block is freed when the last handle is released or garbage collected. DataFrames returned by to_dataframe() stay
+    valid after that. A handle that is pickled, but never loaded again, keeps its block alive until the next reboot.
+    """
+
+    def __init__(self, name, nbytes, layout, inline, columns, index, metadata, block=None):
+        self.name = name
+        self.nbytes = nbytes
+        self.__layout = layout
+        self.__inline = inline
+        self.__columns = columns
+        self.__index = index
+        self.__metadata = metadata
+        self.__reference = _Reference(name, block)
+        weakref.finalize(self, self.__reference.release)
+
+    @property
+    def shape(self):
+        return (len(self.__index), len(self.__columns))
+
+    def to_dataframe(self):
+        """
+        Returns the DataFrame. The shared columns use the memory of the block, changes of their values are visible to
+        every process that maps the same block.
+
+        :return: pandas DataFrame object, with the rm_metadata attribute of the original DataFrame.
+        """
+        import numpy
+        import pandas
+        if self.__reference.released:
+            raise GeneralException("The SharedFrame has been released.")
+        block = self.__reference.open()
+        data = {}
+        for position, entry in enumerate(self.__layout):
+            if entry[0] == "shared":
+                (_, offset, dtype) = entry
+                data[position] = numpy.frombuffer(block.buf, dtype=numpy.dtype(dtype), count=len(self.__index), offset=offset)
+            else:
+                data[position] = self.__inline.iloc[:, entry[1]].array
+        df = pandas.DataFrame(data, copy=False)
+        df.columns = self.__columns
+        df.index = self.__index
+        if self.__metadata is not None:
+            import warnings
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                df.rm_metadata = self.__metadata
+        return df
+
+    def release(self):
+        """
+        Releases the reference of this handle. The block is freed, when no other handle references it.
+        """
+        self.__reference.release()
+
+    def __reduce__(self):
+        if self.__reference.released:
+            raise GeneralException("The SharedFrame has been released.")
+        # the reference is taken over by the handle, that is created when the pickle is loaded
+        self.__reference.add(1)
+        return (SharedFrame, (self.name, self.nbytes, self.__layout, self.__inline, self.__columns, self.__index, self.__metadata))
+
+    def __repr__(self):
+        return "SharedFrame(name=%r, rows=%d, columns=%d, nbytes=%d)" % (self.name, self.shape[0], self.shape[1], self.nbytes)
+
+def share_dataframe(df):
+    """
+    Copies the numeric, boolean and datetime columns of a DataFrame to a new shared memory block. Other columns
+    (strings, categories, extension types) are pickled along with the handle.
+
+    :param df: the pandas DataFrame.
+    :return: a SharedFrame handle, holding the first reference of the block.
+    """
+    import numpy
+    layout = []
+    inline_positions = []
+    offset = _HEADER_SIZE
+    for position in range(df.shape[1]):
+        dtype = df.dtypes.iloc[position]
+        if isinstance(dtype, numpy.dtype) and dtype.kind in _SHARED_KINDS:
+            layout.append(("shared", offset, dtype.str))
+            offset += -(-len(df) * dtype.itemsize // _ALIGNMENT) * _ALIGNMENT
+        else:
+            layout.append(("inline", len(inline_positions)))
+            inline_positions.append(position)
+    block = _open_block(size=offset)
+    try:
+        struct.pack_into(_COUNT_FORMAT, block.buf, 0, 1)
+        for position, entry in enumerate(layout):
+            if entry[0] == "shared":
+                target = numpy.frombuffer(block.buf, dtype=numpy.dtype(entry[2]), count=len(df), offset=entry[1])
+                target[:] = df.iloc[:, position].to_numpy()
+                del target
+    except BaseException:
+        block.close()
+        _unlink_block(block)
+        raise
+    inline = df.iloc[:, inline_positions]
+    metadata = getattr(df, "rm_metadata", None)
+    return SharedFrame(block.name, offset, layout, inline, df.columns, df.index, metadata if isinstance(metadata, dict) else None, block)
@@ -17,20 +17,22 @@
 import shutil
 import os
 import subprocess
-import tempfile
 import glob
 import sys
 import logging
-from threading import Thread
 import threading
 import platform
 import io
+import collections
 import pandas
 import json
-try:
-    import cPickle as pickle
-except:
-    import pickle
+import hashlib
+import contextlib
+import xml.etree.ElementTree as et
+import asyncio
+import functools
+import signal
+import weakref
 from .utilities import __STDOUT_ENCODING__
 from .connector import Connector
 from .resources import Resource
@@ -39,6 +41,25 @@ from .resources import RepositoryLocation
 from .utilities import GeneralException
 from .utilities import __DEFAULT_ENCODING__
 from .utilities import __open__
+from .columnar import is_columnar_file
+from .columnar import read_columnar
+from .columnar import read_columnar_schema
+from .columnar import write_columnar
+from .pickling import dump_object
+from .pickling import load_object
+from .pickling import resolve_compression
+from .scratch import ScratchSpace
+from .partial import OperatorCache
+from .partial import result_files
+from .exchange import available_codecs
+from .exchange import choose_codec
+from .exchange import codec_of
+from .exchange import open_exchange_file
+from .exchange import strip_codec
+from .exchange import CODEC_SUFFIXES
+from .sharedframe import share_dataframe
+from .schemacache import describe_dataframe
+from .outputmux import default_multiplexer
 
 class StudioException(Exception):
     def __init__(self, msg=""):
@@ -49,12 +70,27 @@ class Studio(Connector):
     Class for using a locally installed RapidMiner Studio instance. You can read from and write to the repositories defined in Studio (and use even remote repositories this way) and you can execute processes.
     """
     __CSV_SUFFIX=".csv"
+    __DATE_FORMAT="%Y-%m-%d %H:%M:%S"
+    __FILTER_CHUNK_ROWS=100000
+    # read_csv engines with their options, in order of preference
+    __CSV_READERS=(("pyarrow", {}), ("c", {"date_format": __DATE_FORMAT}), ("c", {}))
+    # pandas dtypes of RapidMiner attribute types, types not listed here are inferred by the parser
+    __RM_DTYPES={"real": "float64", "numeric": "float64", "nominal": "category", "polynominal": "category", "polynomial": "category", "binominal": "category"}
     __MD_SUFFIX=".pmd"
-    __TMP_OUTPUT_DIR_PREFIX= "rapidminer-scripting-output-"
-    __TMP_INPUT_DIR_PREFIX="rapidminer-scripting-inputs-"
-    ___EXIT_CODE_MSG="EXIT_CODE="
-    __RAPIDMINER_ERROR_MSG="RAPIDMINER_ERROR_MSG="
-    __RAPIDMINER_ERROR_MSG_FIRST_LINE="RAPIDMINER_ERROR_MSG_FIRST_LINE="
+    # dtypes of previous reads, that are passed to the parser, if the resource has not changed since
+    __CACHED_DTYPES=("int64", "float64")
+    __REPOSITORY_PREFIX="repositorylocation:"
+    ___EXIT_CODE_MSG=b"EXIT_CODE="
+    __RAPIDMINER_ERROR_MSG=b"RAPIDMINER_ERROR_MSG="
+    __RAPIDMINER_ERROR_MSG_FIRST_LINE=b"RAPIDMINER_ERROR_MSG_FIRST_LINE="
+    __RAPIDMINER_COMPRESSION_MSG=b"RAPIDMINER_COMPRESSION="
+    __LOG_PREFIXES={b"FINEST": logging.DEBUG, b"FINER": logging.DEBUG, b"DEBUG": logging.DEBUG, b"CONFIG": logging.DEBUG,
+                    b"INFO": logging.INFO, b"WARNING": logging.WARNING, b"SEVERE": logging.ERROR}
+    __MAX_LOG_PREFIX_LENGTH=40
+    __READ_CHUNK_SIZE=65536
+    # maximum size of the output of a Studio launch, that is read ahead of the logger
+    __OUTPUT_BUFFER_BYTES=1048576
+    __rm_stdout_lock = threading.Lock()
 
     def __init__(self, studio_home=None, **kwargs):
         """Initializes a new connector to a local Rapidminer Studio instance. Every command will launch a new Studio instance, executing the required operations in batch mode.
@@ -65,8 +101,19 @@ class Studio(Connector):
         Possible kwargs arguments:
         :param logger: a Logger object to use. By default a very simple logger is used, with INFO level, logging to stdout.
         :param loglevel: the loglevel, as an int value. Common values are defined in the standard logging module. Only used, if logger is not defined.
-        :param rm_stdout: the output stream to redirect the output of underlying Studio launches. By default the output is directed to the logger associated with this connector. Log records from Studio are labeled with new element 'key'='studio', while the logs from python with 'key'='python'.
+        :param rm_stdout: the output stream to redirect the output of underlying Studio launches. By default the output is directed to the logger associated with this connector. Log records from Studio are labeled with new element 'key'='studio', while the logs from python with 'key'='python'. The output of concurrent launches is written in batches of whole lines, so lines of different launches are not mixed.
         :param password: password for a remote repository, if its password is not saved - DOES NOT YET WORK
+        :param pickle_protocol: the pickle protocol used for python objects other than DataFrames and file-like objects. With protocol 5 or higher (Python 3.8+), large buffers, like NumPy arrays in models, are stored out-of-band, and are memory-mapped when read back. Such objects can be read back by this package, but not by the Execute Python operator in Studio. Default is None, the default protocol of pickle.
+        :param pickle_compression: compression of python objects pickled with protocol 5 or higher, 'lz4', 'zstd' or 'auto' (whichever is installed). Default is None, no compression.
+        :param scratch_dir: the directory under which the temporary files exchanged with Studio are created. Default is the system temporary directory.
+        :param small_scratch_dir: the directory used instead of scratch_dir for payloads of at most small_scratch_limit bytes. Default is /dev/shm, if available. A payload only goes there, if it fits into the free space of the directory, next to the payloads of the running calls; otherwise scratch_dir is used. Set to False to use scratch_dir for all payloads.
+        :param small_scratch_limit: the payload size limit of small_scratch_dir in bytes, default is 64 MB.
+        :param operator_cache: path of a local directory, that caches the port outputs of the top level operators of processes run by run_process. Only used for processes specified as File objects (local .rmp files). Later runs only execute the operators, whose outputs are not cached for the same process XML upstream, inputs and macros. Default is None, no caching.
+        :param exchange_compression: compression of the csv and file-like object files exchanged with Studio, useful if scratch_dir is on network storage. 'auto' chooses the codec by the payload size (small payloads are not compressed), 'gzip', 'lz4' or 'zstd' selects a codec. Compression is only used, if the Studio launcher announces support for the codec, so the first launch is never compressed. Default is None, no compression.
+        :param shared_memory: boolean. If set to True, the DataFrames returned by read_resource, run_process and run_process_grid are SharedFrame handles: their numeric, boolean and datetime columns are stored in a shared memory block, and the handles can be passed to other processes (e.g. returned from multiprocessing workers) without copying the data. Call to_dataframe() on the handle to get the DataFrame. Requires Python 3.8 or newer. Default value is False.
+        :param rapidminer_user_home: the RapidMiner user directory, that contains the repositories.xml file. The entries of the local repositories defined there are checked for changes, in order to reuse their cached schema (see schema_cache). Default is the .RapidMiner directory in the home directory of the user.
+        :param max_async_launches: the maximum number of Studio instances launched at the same time by the coroutines read_resource_async, write_resource_async and run_process_async, per event loop. Default is 4.
+        :param rm_log_buffer: if set to an integer, the log lines of Studio are not sent to the logger, but kept in the log_buffer attribute, a ring buffer (collections.deque) of (loglevel, message) tuples with this maximum length.
         """
         super(Studio, self).__init__(**kwargs)
         if studio_home is not None:
@@ -81,23 +128,60 @@ class Studio(Connector):
             self.__rm_stdout__ = kwargs["rm_stdout"]
         else:
             self.__rm_stdout__ = None
+        if "rm_log_buffer" in kwargs and kwargs["rm_log_buffer"] is not None:
+            self.log_buffer = collections.deque(maxlen=kwargs["rm_log_buffer"])
+        else:
+            self.log_buffer = None
+        if "pickle_protocol" in kwargs:
+            self.__pickle_protocol = kwargs["pickle_protocol"]
+        else:
+            self.__pickle_protocol = None
+        if "pickle_compression" in kwargs:
+            self.__pickle_compression = resolve_compression(kwargs["pickle_compression"])
+        else:
+            self.__pickle_compression = None
+        self.__scratch = ScratchSpace(root=kwargs["scratch_dir"] if "scratch_dir" in kwargs else None,
+                                      small_root=kwargs["small_scratch_dir"] if "small_scratch_dir" in kwargs else None,
+                                      small_limit=kwargs["small_scratch_limit"] if "small_scratch_limit" in kwargs else None)
+        if "operator_cache" in kwargs and kwargs["operator_cache"] is not None:
+            self.__operator_cache = OperatorCache(kwargs["operator_cache"])
+        else:
+            self.__operator_cache = None
+        if "exchange_compression" in kwargs and kwargs["exchange_compression"] is not None:
+            if kwargs["exchange_compression"] != "auto" and kwargs["exchange_compression"] not in CODEC_SUFFIXES:
+                raise ValueError("exchange_compression must be None, 'auto', " + ", ".join("'" + codec + "'" for codec in sorted(CODEC_SUFFIXES)) + ".")
+            self.__exchange_compression = kwargs["exchange_compression"]
+        else:
+            self.__exchange_compression = None
+        self.__launcher_codecs = set() # codecs announced by the launcher, and also available here
+        self.__shared_memory = "shared_memory" in kwargs and kwargs["shared_memory"]
+        if "rapidminer_user_home" in kwargs:
+            self.__rapidminer_user_home = kwargs["rapidminer_user_home"]
+        else:
+            self.__rapidminer_user_home = os.path.join(os.path.expanduser("~"), ".RapidMiner")
+        self.__local_repositories = None
         if "password" in kwargs:
             self.__password = kwargs["password"]
         else:
             self.__password = None
         self.override_python_binary = "override_python_binary" in kwargs and kwargs["override_python_binary"]
-        self.__last_exception_msg__ = {} # ensures proper multithreading: this maps last exception message for every thread
-        self.__last_exit_code__ = {} # ensures proper multithreading: this maps last exit code for every thread
+        if "max_async_launches" in kwargs:
+            self.__max_async_launches = kwargs["max_async_launches"]
+        else:
+            self.__max_async_launches = 4
+        self.__async_launches = weakref.WeakKeyDictionary() # event loop -> asyncio.Semaphore
 
 ####################
 # Public functions #
 ####################
 
-    def read_resource(self, input):
+    def read_resource(self, input, columns=None, filter=None):
         """
         Reads the resource(s) from the given repository location(s) / file(s)
 
         :param input: the path(s) to the resource(s). If no extension is specified, the path is treated as a repository location. If file extension is specified, it is treated as a file.
+        :param columns: optional list of columns to read. Parquet, Feather and Arrow files are read with column projection, other data is projected while parsing.
+        :param filter: optional row filter, a list of (column, operator, value) tuples that must all hold, or a list of such lists, any of which must hold. Supported operators are ==, !=, <, <=, >, >=, in and not in. A function that takes a DataFrame and returns a boolean mask is accepted as well. The filter is pushed down to the reader of Parquet, Feather and Arrow files, other data is filtered in chunks while parsing.
         :return: the resource(s) as pandas DataFrame(s), a pickle-able python object(s) or a file-like object(s). If multiple inputs are specified, the same number of inputs will be returned, as a tuple of objects.
          """
         if not ((isinstance(input, tuple) or isinstance(input, list))):
@@ -105,24 +189,21 @@ class Studio(Connector):
             single_input = True
         else:
             single_input = False
-        output_dirs = [tempfile.mkdtemp(prefix=self.__TMP_OUTPUT_DIR_PREFIX) for _ in input]
+        direct_files = [self.__columnar_file(inp) for inp in input]
+        launched_input = [inp for (inp, direct_file) in zip(input, direct_files) if direct_file is None]
+        (stamps, schemas) = self.__cached_schemas(launched_input)
+        output_dirs = [self.__scratch.acquire() for _ in launched_input]
         try:
-            self.__run_rapidminer(input_files=list(input), output_files=[File(output_dir) for output_dir in output_dirs])
-            output_files = []
-            for output_dir in output_dirs:
-                csv_files = glob.glob(output_dir + "/*.csv")
-                if (len(csv_files) == 1):
-                    output_files.append(csv_files[0])
-                else:
-                    output_files.append(glob.glob(output_dir + "/*")[0])
-            result = tuple(self.__deserialize_from_file(output_file) for output_file in output_files)
+            if len(launched_input) > 0:
+                self.__run_rapidminer(input_files=launched_input, output_files=[File(output_dir) for output_dir in output_dirs])
+            result = self.__read_results(direct_files, launched_input, output_dirs, stamps, schemas, columns, filter)
             if single_input:
                 return result[0]
             else:
                 return result
         finally:
             for dir in output_dirs:
-                shutil.rmtree(dir, ignore_errors=True)
+                self.__scratch.release(dir)
 
     def write_resource(self, object, output):
         """
@@ -136,15 +217,37 @@ class Studio(Connector):
         if not ((isinstance(output, tuple) or isinstance(output, list))):
             output = [output]
 
-        if len(object) != len(output):
-            raise ValueError("Object and output must contain the same number of values.")
-        input_dirs = [tempfile.mkdtemp(prefix=self.__TMP_INPUT_DIR_PREFIX) for _ in object]
+        launched = self.__write_direct(object, output)
+        input_dirs = [self.__scratch.acquire(self.__payload_size([obj])) for (obj, _) in launched]
         try:
-            input_files = [self.__serialize_to_file(obj, os.path.join(dir, "input0")) for (dir, obj) in zip(input_dirs, object)]
-            self.__run_rapidminer(input_files=[File(f) for f in input_files], output_files=output)
+            if len(launched) > 0:
+                input_files = self.__serialize_launched(launched, input_dirs)
+                self.__run_rapidminer(input_files=input_files, output_files=[out for (_, out) in launched])
         finally:
             for input_dir in input_dirs:
-                shutil.rmtree(input_dir, ignore_errors=True)
+                self.__scratch.release(input_dir)
+
+    def describe_resource(self, path):
+        """
+        Describes a data table, without reading its data, if its schema is cached and the resource has not changed since. Changes are detected for files and the entries of local repositories. Entries of other repositories are cached for schema_cache_ttl seconds. Parquet, Feather and Arrow files are described by their own metadata.
+
+        :param path: the path to the resource. If no extension is specified, the path is treated as a repository location. If file extension is specified, it is treated as a file.
+        :return: dict with the column names ('columns'), the pandas dtype of every column as a string ('dtypes'), the rm_metadata of the columns ('rm_metadata', None if not known) and the number of rows ('rows').
+        """
+        direct_file = self.__columnar_file(path)
+        if direct_file is not None:
+            (data, metadata, rows) = read_columnar_schema(direct_file.filename)
+            self._suppress_pandas_warning(lambda: self._set_metadata(data, metadata))
+            schema = describe_dataframe(data)
+            schema["rows"] = rows
+            return schema
+        key = self.__schema_key(path)
+        stamp = self.__resource_stamp(path)
+        if self._schema_cache is not None:
+            schema = self._schema_cache.lookup(key, stamp)
+            if schema is not None:
+                return schema
+        return self._describe_data(key, stamp, self.read_resource(path))
 
     def run_process(self, path, inputs=None, **kwargs):
         """
@@ -154,8 +257,153 @@ class Studio(Connector):
         :param path: path to the *.rmp RapidMiner process file.
         :param inputs: inputs used by the RapidMiner process, can be a pandas DataFrame, a pickle-able python object or a file-like object.
 
+        Possible kwargs arguments:
+        :param operator: the name of the RapidMiner operator to execute. If None (default) the whole process is executed. With operator_cache, it must be a top level operator, and its connected outputs are returned.
+        :param macros: optional dict that sets the macros of the process.
+        :param use_cache: boolean. If set to False, operator_cache is not used for this call. Default value is True.
+        :return: the results of the RapidMiner process, as a list of pandas DataFrame objects.
+        """
+        if inputs is not None and not (isinstance(inputs, tuple) or isinstance(inputs, list)):
+            inputs = [inputs]
+        if "operator" in kwargs:
+            operator = kwargs["operator"]
+        else:
+            operator = None
+        if "macros" in kwargs:
+            macros = kwargs["macros"]
+        else:
+            macros = {}
+        use_cache = self.__operator_cache is not None and isinstance(path, File) and ("use_cache" not in kwargs or kwargs["use_cache"])
+        output_dir = self.__scratch.acquire()
+        release_dirs = [output_dir]
+        try:
+            input_files = []
+            input_dir = None
+            if inputs is not None and len(inputs) > 0:
+                input_dir = self.__scratch.acquire(self.__payload_size(inputs))
+                release_dirs.append(input_dir)
+                input_files = self.__serialize_inputs(inputs, input_dir)
+            if use_cache:
+                if input_dir is None:
+                    input_dir = self.__scratch.acquire()
+                    release_dirs.append(input_dir)
+                return list(self.__share(self.__run_process_with_cache(path, input_files, operator, output_dir, input_dir, macros)))
+            return list(self.__share(self.__run_process_with_output_dir(path, input_files, operator, output_dir, macros)))
+        finally:
+            for dir in release_dirs:
+                self.__scratch.release(dir)
+
+    def run_process_grid(self, path, inputs=None, macro_grid=None, **kwargs):
+        """
+        Runs a RapidMiner process for every combination of macro values. The inputs are serialized only once, and shared by the Studio instances, which are launched in parallel.
+
+        Arguments:
+        :param path: path to the *.rmp RapidMiner process file.
+        :param inputs: inputs used by the RapidMiner process, can be a pandas DataFrame, a pickle-able python object or a file-like object.
+        :param macro_grid: dict of macro name to the list of its values, or a list of dicts, each defining the macros of one run.
+
         Possible kwargs arguments:
         :param operator: the name of the RapidMiner operator to execute. If None (default) the whole process is executed.
+        :param workers: the number of Studio instances launched in parallel. Default is 4.
+        :param resume: path of a local directory, where the results of the finished runs are stored. If the grid is run again with the same directory, the same process and the same inputs, the stored results are reused, and only the missing runs are executed.
+        :return: dict of the tuple of macro values (in the order of the macro names in macro_grid) to the results of the run, as a list of pandas DataFrame objects.
+        """
+        if inputs is not None and not (isinstance(inputs, tuple) or isinstance(inputs, list)):
+            inputs = [inputs]
+        if "operator" in kwargs:
+            operator = kwargs["operator"]
+        else:
+            operator = None
+        if "workers" in kwargs:
+            workers = kwargs["workers"]
+        else:
+            workers = 4
+        if "resume" in kwargs:
+            resume = kwargs["resume"]
+        else:
+            resume = None
+        (names, points) = self._grid_points(macro_grid)
+        input_dir = None
+        try:
+            input_files = []
+            if inputs is not None and len(inputs) > 0:
+                input_dir = self.__scratch.acquire(self.__payload_size(inputs))
+                input_files = self.__serialize_inputs(inputs, input_dir)
+            def run_point(macros):
+                output_dir = self.__scratch.acquire()
+                try:
+                    return self.__run_process_with_output_dir(path, input_files, operator, output_dir, macros)
+                finally:
+                    self.__scratch.release(output_dir)
+            results = self._run_grid(names, points, run_point, workers, resume, self.__grid_context(path, input_files, operator) if resume is not None else None)
+            return dict((point, list(self.__share(result))) for point, result in results.items())
+        finally:
+            if input_dir is not None:
+                self.__scratch.release(input_dir)
+
+    async def read_resource_async(self, input, columns=None, filter=None):
+        """
+        Coroutine version of read_resource: the Studio launch is awaited without blocking the event loop, and the files are read in the default executor of the loop. If the calling task is cancelled, the Studio launch is killed, and its temporary files are removed.
+
+        :param input: the path(s) to the resource(s), see read_resource.
+        :param columns: optional list of columns to read, see read_resource.
+        :param filter: optional row filter, see read_resource.
+        :return: the resource(s), see read_resource.
+        """
+        if not ((isinstance(input, tuple) or isinstance(input, list))):
+            input = [input]
+            single_input = True
+        else:
+            single_input = False
+        direct_files = [self.__columnar_file(inp) for inp in input]
+        launched_input = [inp for (inp, direct_file) in zip(input, direct_files) if direct_file is None]
+        (stamps, schemas) = self.__cached_schemas(launched_input)
+        output_dirs = [self.__scratch.acquire() for _ in launched_input]
+        try:
+            if len(launched_input) > 0:
+                await self.__run_rapidminer_async(input_files=launched_input, output_files=[File(output_dir) for output_dir in output_dirs])
+            result = await self.__in_executor(self.__read_results, direct_files, launched_input, output_dirs, stamps, schemas, columns, filter)
+            if single_input:
+                return result[0]
+            else:
+                return result
+        finally:
+            for dir in output_dirs:
+                self.__scratch.release(dir)
+
+    async def write_resource_async(self, object, output):
+        """
+        Coroutine version of write_resource: the objects are serialized in the default executor of the event loop, and the Studio launch is awaited without blocking the loop. If the calling task is cancelled, the Studio launch is killed, and its temporary files are removed.
+
+        :param object: the object(s) to write, see write_resource.
+        :param output: the path(s) to the resource(s), see write_resource.
+        """
+        if not ((isinstance(object, tuple) or isinstance(object, list))):
+            object = [object]
+        if not ((isinstance(output, tuple) or isinstance(output, list))):
+            output = [output]
+
+        launched = await self.__in_executor(self.__write_direct, object, output)
+        input_dirs = [self.__scratch.acquire(self.__payload_size([obj])) for (obj, _) in launched]
+        try:
+            if len(launched) > 0:
+                input_files = await self.__in_executor(self.__serialize_launched, launched, input_dirs)
+                await self.__run_rapidminer_async(input_files=input_files, output_files=[out for (_, out) in launched])
+        finally:
+            for input_dir in input_dirs:
+                self.__scratch.release(input_dir)
+
+    async def run_process_async(self, path, inputs=None, **kwargs):
+        """
+        Coroutine version of run_process: the inputs are serialized and the results are read in the default executor of the event loop, and the Studio launch is awaited without blocking the loop. At most max_async_launches processes run at the same time. If the calling task is cancelled, the Studio launch is killed, and its temporary files are removed. The operator_cache is not used.
+
+        Arguments:
+        :param path: path to the *.rmp RapidMiner process file.
+        :param inputs: inputs used by the RapidMiner process, can be a pandas DataFrame, a pickle-able python object or a file-like object.
+
+        Possible kwargs arguments:
+        :param operator: the name of the RapidMiner operator to execute. If None (default) the whole process is executed.
+        :param macros: optional dict that sets the macros of the process.
         :return: the results of the RapidMiner process, as a list of pandas DataFrame objects.
         """
         if inputs is not None and not (isinstance(inputs, tuple) or isinstance(inputs, list)):
@@ -168,82 +416,295 @@ class Studio(Connector):
             macros = kwargs["macros"]
         else:
             macros = {}
-        output_dir = tempfile.mkdtemp(prefix=self.__TMP_OUTPUT_DIR_PREFIX)
-        remove_dirs = [output_dir]
+        output_dir = self.__scratch.acquire()
+        release_dirs = [output_dir]
         try:
             input_files = []
             if inputs is not None and len(inputs) > 0:
-                input_dir = tempfile.mkdtemp(prefix=self.__TMP_INPUT_DIR_PREFIX)
-                remove_dirs.append(input_dir)
-                for i in range(len(inputs)):
-                    input_files.append(File(self.__serialize_to_file(inputs[i], os.path.join(input_dir, "input" + str(i)))))
-            return self.__run_process_with_output_dir(path, input_files, operator, output_dir, macros)
+                input_dir = self.__scratch.acquire(self.__payload_size(inputs))
+                release_dirs.append(input_dir)
+                input_files = await self.__in_executor(self.__serialize_inputs, inputs, input_dir)
+            await self.__run_rapidminer_async(process=path, input_files=input_files, output_dir=output_dir, macros=macros, operator=operator)
+            return list(await self.__in_executor(lambda: self.__share(self.__read_process_outputs(output_dir))))
         finally:
-            for dir in remove_dirs:
-                shutil.rmtree(dir, ignore_errors=True)
+            for dir in release_dirs:
+                self.__scratch.release(dir)
 
 #####################
 # Private functions #
 #####################
 
-    def __extract_log_level(self, msg, threadid):
+    def __extract_log_level(self, line, launch):
+        """
+        Determines the log level of a raw (not yet decoded) output line of Studio, and handles the special exit code
+        and error message lines.
+
+        :param line: the output line as bytes, without line separator.
+        :param launch: dict of the state of the Studio launch, the exit code and error message are stored there.
+        :return: tuple of log level and the offset of the message in the line. The log level is -1 for lines that should not be logged.
+        """
         # LogLevels: https://docs.python.org/2/library/logging.html#logging-levels
-        if msg.startswith("FINEST: "):
-            lglevel = logging.DEBUG
-            msg = msg[8:]
-        elif msg.startswith("FINER: "):
-            lglevel = logging.DEBUG
-            msg = msg[7:]
-        elif msg.startswith("DEBUG: "):
-            lglevel = logging.DEBUG
-            msg = msg[7:]
-        elif msg.startswith("CONFIG: "):
-            lglevel = logging.DEBUG
-            msg = msg[8:]
-        elif msg.startswith("INFO: "):
-            lglevel = logging.INFO
-            msg = msg[6:]
-        elif msg.startswith("WARNING: "):
-            lglevel = logging.WARNING
-            msg = msg[9:]
-        elif msg.startswith("SEVERE: "):
-            lglevel = logging.ERROR
-            msg = msg[8:]
-        elif msg.startswith(self.__RAPIDMINER_ERROR_MSG_FIRST_LINE):
-            lglevel = logging.ERROR
-            msg = msg[len(self.__RAPIDMINER_ERROR_MSG_FIRST_LINE):]
-            self.__last_exception_msg__[threadid] = msg
-        elif msg.startswith(self.__RAPIDMINER_ERROR_MSG):
-            lglevel = logging.ERROR
-            msg = msg[len(self.__RAPIDMINER_ERROR_MSG):]
-        elif msg.startswith(self.___EXIT_CODE_MSG):
-            lglevel = -1
-            try:
-                self.__last_exit_code__[threadid] = int(msg[10:])
-            except ValueError:
-                self.__last_exit_code__[threadid] = 0
+        sep = line.find(b": ", 0, self.__MAX_LOG_PREFIX_LENGTH)
+        if sep > 0:
+            lglevel = self.__LOG_PREFIXES.get(line[:sep])
+            if lglevel is not None:
+                return (lglevel, sep + 2)
+        sep = line.find(b"=", 0, self.__MAX_LOG_PREFIX_LENGTH)
+        if sep > 0:
+            marker = line[:sep + 1]
+            if marker == self.__RAPIDMINER_ERROR_MSG_FIRST_LINE:
+                launch["error"] = self.__decode_line(line[sep + 1:])
+                return (logging.ERROR, sep + 1)
+            elif marker == self.__RAPIDMINER_ERROR_MSG:
+                return (logging.ERROR, sep + 1)
+            elif marker == self.__RAPIDMINER_COMPRESSION_MSG:
+                announced = set(codec.strip() for codec in self.__decode_line(line[sep + 1:]).split(","))
+                self.__launcher_codecs = announced & available_codecs()
+                return (-1, 0)
+            elif marker == self.___EXIT_CODE_MSG:
+                try:
+                    launch["exit_code"] = int(line[sep + 1:])
+                except ValueError:
+                    launch["exit_code"] = 0
+                return (-1, 0)
+        return (logging.INFO, 0)
+
+    def __decode_line(self, line):
+        return line.decode(encoding=__STDOUT_ENCODING__, errors='ignore').rstrip("\r")
+
+    def __emit_lines(self, lines, lglevel):
+        if self.log_buffer is not None:
+            self.log_buffer.extend((lglevel, msg) for msg in lines)
+        else:
+            self.log("\n".join(lines), level=lglevel, source="studio")
+
+    def __handle_lines(self, lines, launch):
+        """
+        Handles a batch of output lines of Studio. Lines are dispatched by their log level prefix, lines below the
+        level of the logger are dropped without decoding them, and consecutive lines with the same level are emitted
+        as a single log record. With rm_stdout, the whole batch is written at once, so that the output of concurrent
+        launches is not interleaved within a batch.
+
+        :param lines: list of output lines as bytes, without line separators.
+        :param launch: dict of the state of the Studio launch.
+        """
+        if self.__rm_stdout__ is not None:
+            for line in lines:
+                self.__extract_log_level(line, launch)
+            with Studio.__rm_stdout_lock:
+                self.__rm_stdout__.write("".join(self.__decode_line(line) + "\n" for line in lines))
+            return
+        batch = []
+        batch_level = None
+        for line in lines:
+            (lglevel, offset) = self.__extract_log_level(line, launch)
+            if lglevel < 0 or (self.log_buffer is None and not self.logger.isEnabledFor(lglevel)):
+                continue
+            if lglevel != batch_level and len(batch) > 0:
+                self.__emit_lines(batch, batch_level)
+                batch = []
+            batch_level = lglevel
+            batch.append(self.__decode_line(line[offset:]))
+        if len(batch) > 0:
+            self.__emit_lines(batch, batch_level)
+
+    def __consume_output(self, process, launch):
+        """
+        Handles the output of a Studio launch until it ends, in the calling thread. The pipe is read by the multiplexer
+        shared by all launches, that buffers at most __OUTPUT_BUFFER_BYTES ahead of this thread.
+
+        :param process: the subprocess.Popen object.
+        :param launch: dict of the state of the Studio launch.
+        """
+        multiplexer = default_multiplexer()
+        if multiplexer is None:
+            # pipes can not be multiplexed on this platform, the calling thread reads the pipe itself
+            read = process.stdout.read1 if hasattr(process.stdout, "read1") else process.stdout.readline
+            pending = b""
+            for chunk in iter(lambda: read(self.__READ_CHUNK_SIZE), b''):
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                self.__handle_lines(lines, launch)
+            if len(pending) > 0:
+                self.__handle_lines([pending], launch)
+            return
+        buffer = multiplexer.register(process.stdout, self.__OUTPUT_BUFFER_BYTES)
+        try:
+            for lines in iter(buffer.get, None):
+                self.__handle_lines(lines, launch)
+        finally:
+            buffer.discard()
+
+    def __payload_size(self, objects):
+        """
+        Estimates the size of the serialized objects, in order to select the scratch directory.
+
+        :param objects: list of python objects.
+        :return: the estimated size in bytes, or None, if it is not known for some object.
+        """
+        size = 0
+        for object in objects:
+            if isinstance(object, pandas.DataFrame):
+                # the csv representation is typically larger than the values in memory
+                size += 2 * int(object.memory_usage(index=False, deep=True).sum())
+            elif isinstance(object, (bytes, bytearray)):
+                size += len(object)
+            else:
+                return None
+        return size
+
+    def __cached_schemas(self, launched_input):
+        """
+        Looks up the cached schemas of the resources read by a Studio launch.
+
+        :return: tuple of the list of stamps and the list of cached schemas (None, if not cached), per resource.
+        """
+        # stamps are taken before reading, so that a change while reading invalidates the cached schema
+        stamps = [self.__resource_stamp(inp) if self._schema_cache is not None else None for inp in launched_input]
+        schemas = [self._schema_cache.lookup(self.__schema_key(inp), stamp) if stamp is not None else None
+                   for (inp, stamp) in zip(launched_input, stamps)]
+        return (stamps, schemas)
+
+    def __read_results(self, direct_files, launched_input, output_dirs, stamps, schemas, columns, filter):
+        """
+        Reads the resources requested by read_resource: Parquet, Feather and Arrow files directly, other resources from the output directories of the Studio launch.
+
+        :return: tuple of the resources, in the order of direct_files.
+        """
+        output_files = []
+        for output_dir in output_dirs:
+            csv_files = [f for f in glob.glob(output_dir + "/*") if strip_codec(f).endswith(self.__CSV_SUFFIX)]
+            if (len(csv_files) == 1):
+                output_files.append(csv_files[0])
+            else:
+                output_files.append(glob.glob(output_dir + "/*")[0])
+        launched_result = iter([self.__read_launched_output(output_file, inp, stamp, schema, columns, filter)
+                                for (output_file, inp, stamp, schema) in zip(output_files, launched_input, stamps, schemas)])
+        return self.__share(next(launched_result) if direct_file is None else
+                            self.__deserialize_from_file(direct_file.filename,
+                                                         columns if columns is not None else direct_file.columns,
+                                                         filter if filter is not None else direct_file.filters)
+                            for direct_file in direct_files)
+
+    def __write_direct(self, object, output):
+        """
+        Writes the objects to be stored in Parquet, Feather and Arrow files, and invalidates the cached schemas of the other outputs.
+
+        :return: list of (object, output) tuples, that have to be written by a Studio launch.
+        """
+        if len(object) != len(output):
+            raise ValueError("Object and output must contain the same number of values.")
+        direct_files = [self.__columnar_file(out) for out in output]
+        for (obj, direct_file) in zip(object, direct_files):
+            if direct_file is not None:
+                self.__write_columnar_file(obj, direct_file.filename)
+        launched = [(obj, out) for (obj, out, direct_file) in zip(object, output, direct_files) if direct_file is None]
+        if self._schema_cache is not None:
+            for (_, out) in launched:
+                self._schema_cache.invalidate(self.__schema_key(out))
+        return launched
+
+    def __serialize_launched(self, launched, input_dirs):
+        return [File(self.__serialize_to_file(obj, os.path.join(dir, "input0"))) for (dir, (obj, _)) in zip(input_dirs, launched)]
+
+    def __serialize_inputs(self, inputs, input_dir):
+        """
+        Serializes the inputs of a process run to the input directory.
+
+        :return: list of File objects of the serialized inputs.
+        """
+        return [File(self.__serialize_to_file(inputs[i], os.path.join(input_dir, "input" + str(i)))) for i in range(len(inputs))]
+
+    def __read_launched_output(self, output_file, resource, stamp, schema, columns, filter):
+        """
+        Reads a resource written by Studio, and caches its schema.
+        """
+        result = self.__deserialize_from_file(output_file, columns, filter, schema)
+        if self._schema_cache is not None and columns is None and filter is None and isinstance(result, pandas.DataFrame):
+            self._schema_cache.store(self.__schema_key(resource), stamp, result)
+        return result
+
+    def __schema_key(self, resource):
+        if not isinstance(resource, Resource):
+            resource = RepositoryLocation(name=resource)
+        return "studio:" + resource.to_string()
+
+    def __resource_stamp(self, resource):
+        """
+        Returns the modification stamp of a file or of an entry of a local repository: the names, modification times and sizes of its files.
+
+        :param resource: a Resource object or a repository location string.
+        :return: the stamp as a list, or None, if it can not be determined (e.g. for entries of remote repositories).
+        """
+        if isinstance(resource, File):
+            filenames = [resource.filename]
         else:
-            lglevel = logging.INFO
-        return (msg, lglevel)
+            if not isinstance(resource, Resource):
+                resource = RepositoryLocation(name=resource)
+            filenames = self.__local_entry_files(resource.to_string()[len(self.__REPOSITORY_PREFIX):])
+        stamp = []
+        for filename in sorted(filenames):
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                return None
+            stamp.append([os.path.basename(filename), stat.st_mtime_ns, stat.st_size])
+        return stamp if len(stamp) > 0 else None
 
-    def __print_to_console(self, process, close_process_stdout=False, threadid = -1):
-        for line in iter(process.stdout.readline, b''):
+    def __local_entry_files(self, location):
+        """
+        Returns the files of an absolute repository location (//repository/path), if the repository is a local one.
+        """
+        if not location.startswith("//"):
+            return []
+        (alias, _, path) = location[2:].partition("/")
+        root = self.__local_repository_roots().get(alias)
+        if root is None or path == "":
+            return []
+        base = os.path.join(root, *path.split("/"))
+        name = os.path.basename(base)
+        return [f for f in glob.glob(glob.escape(base) + ".*") if os.path.splitext(os.path.basename(f))[0] == name]
+
+    def __local_repository_roots(self):
+        """
+        Returns the dict of alias to the directory of the local repositories, as defined in repositories.xml.
+        """
+        if self.__local_repositories is None:
+            roots = {}
             try:
-                msg = line.decode(encoding=__STDOUT_ENCODING__, errors='ignore')
-                if self.__rm_stdout__ is not None:
-                    self.__rm_stdout__.write(msg)
-                else:
-                    (msg, lglevel) = self.__extract_log_level(msg, threadid)
-                    self.log(msg, level=lglevel, source="studio")
-            except UnicodeEncodeError:
-                self.log("<could not decode row>", level=logging.DEBUG, source="studio")
-        if close_process_stdout:
-            process.stdout.close()
-
-    def __start_printer_thread(self, process):
-        t = Thread(target = self.__print_to_console, args=(process, False, threading.currentThread().ident))
-        t.daemon = True
-        t.start()
+                for entry in et.parse(os.path.join(self.__rapidminer_user_home, "repositories.xml")).getroot():
+                    if entry.findtext("alias") is not None and entry.findtext("file") is not None:
+                        roots[entry.findtext("alias")] = entry.findtext("file")
+            except (IOError, OSError, et.ParseError):
+                pass
+            if "Local Repository" not in roots:
+                default_root = os.path.join(self.__rapidminer_user_home, "repositories", "Local Repository")
+                if os.path.isdir(default_root):
+                    roots["Local Repository"] = default_root
+            self.__local_repositories = roots
+        return self.__local_repositories
+
+    def __share(self, objects):
+        """
+        Converts the DataFrames among the results to SharedFrame handles, if shared_memory is set.
+
+        :param objects: iterable of python objects.
+        :return: tuple of the objects.
+        """
+        if not self.__shared_memory:
+            return tuple(objects)
+        return tuple(share_dataframe(object) if isinstance(object, pandas.DataFrame) else object for object in objects)
+
+    def __exchange_codec(self, size):
+        """
+        Chooses the codec of an exchange file, among the codecs supported by both this environment and the launcher.
+
+        :param size: the estimated size of the payload in bytes, None if unknown.
+        :return: the codec name, or None for no compression.
+        """
+        if self.__exchange_compression is None or len(self.__launcher_codecs) == 0:
+            return None
+        return choose_codec(size, self.__launcher_codecs, None if self.__exchange_compression == "auto" else self.__exchange_compression)
 
     def __quote_params(self, param, prefix=""):
         if platform.system() == "Windows":
@@ -266,13 +727,14 @@ class Studio(Connector):
         '''
         if isinstance(input_file, Resource):
             input_file = input_file.to_string()
-        return input_file.endswith(".fo")
+        return strip_codec(input_file).endswith(".fo")
 
-    # TODO refactor this method to reduce its cognitive complexity from 26 to the allowed 15...
-    def __run_rapidminer(self, process=None, input_files=[], output_files=[], output_dir=None, macros={}, operator=None):
-        kwargs = {"stdout": subprocess.PIPE,
-                  "stderr": subprocess.STDOUT,
-                  "bufsize": 10}
+    def __launch_params(self, process=None, input_files=[], output_files=[], output_dir=None, macros={}, operator=None):
+        """
+        Builds the command line of a Studio launch.
+
+        :return: tuple of the list of parameters and the scratch directory acquired for the temporary files of Studio (None, if not needed). The directory must be released after the launch.
+        """
         params = []
         params.append(self.studio_home + "scripts" + os.path.sep + "rapidminer-batch" + self.__get_script_extension())
         params.append(self.__quote_params("rmx_python_scripting:com.rapidminer.extension.pythonscripting.launcher.ExtendedCmdLauncher", prefix="-C"))
@@ -298,35 +760,123 @@ class Studio(Connector):
             for key in macros:
                 params.append(self.__quote_params(str(key) + "=" + str(macros[key]), prefix="-M"))
         if any(self.__needs_temp_dir(input) for input in input_files):
-            temp_dir = tempfile.mkdtemp(prefix=self.__TMP_OUTPUT_DIR_PREFIX)
+            temp_dir = self.__scratch.acquire()
             params.append(self.__quote_params(temp_dir, prefix="-T"))
         else:
             temp_dir = None
+        output_codec = self.__exchange_codec(None)
+        if output_codec is not None:
+            params.append(self.__quote_params(output_codec, prefix="-Z"))
         if self.override_python_binary:
             params.append(self.__quote_params(sys.executable, prefix="-B"))
-        threadid = threading.currentThread().ident
-        if threadid in self.__last_exit_code__:
-            del self.__last_exit_code__[threadid]
-        if threadid in self.__last_exception_msg__:
-            del self.__last_exception_msg__[threadid]
+        return (params, temp_dir)
+
+    def __check_launch(self, launch):
+        if launch["exit_code"] is not None and launch["exit_code"] != 0:
+            if launch["error"] is not None:
+                raise StudioException("Error while executing studio: " + launch["error"])
+            else:
+                raise StudioException("Error while executing studio - unkown error.")
+
+    def __run_rapidminer(self, process=None, input_files=[], output_files=[], output_dir=None, macros={}, operator=None):
+        kwargs = {"stdout": subprocess.PIPE,
+                  "stderr": subprocess.STDOUT,
+                  "bufsize": -1}
+        (params, temp_dir) = self.__launch_params(process, input_files, output_files, output_dir, macros, operator)
+        launch = {"exit_code": None, "error": None}
         try:
-            p = subprocess.Popen(params, **kwargs)
+            with self._instrumentation.span("studio.spawn"):
+                p = subprocess.Popen(params, **kwargs)
             try:
-                self.__start_printer_thread(p)
-                p.wait()
-                if threadid in self.__last_exit_code__ and self.__last_exit_code__[threadid] != 0:
-                    if threadid in self.__last_exception_msg__:
-                        raise StudioException("Error while executing studio: " + self.__last_exception_msg__[threadid])
-                    else:
-                        raise StudioException("Error while executing studio - unkown error.")
+                with self._instrumentation.span("studio.run"):
+                    self.__consume_output(p, launch)
+                    p.wait()
+                self.__check_launch(launch)
             finally:
                 p.stdout.close()
         finally:
             if temp_dir is not None:
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                self.__scratch.release(temp_dir)
+
+    async def __run_rapidminer_async(self, process=None, input_files=[], output_files=[], output_dir=None, macros={}, operator=None):
+        """
+        Launches Studio like __run_rapidminer, but waits for the launch without blocking the event loop. At most max_async_launches launches run at the same time per event loop. If the calling task is cancelled, the launch is killed, together with the JVM started by the launcher script.
+        """
+        async with self.__async_launch_limit():
+            (params, temp_dir) = self.__launch_params(process, input_files, output_files, output_dir, macros, operator)
+            launch = {"exit_code": None, "error": None}
+            try:
+                with self._instrumentation.span("studio.spawn"):
+                    # in a new session, so that the launcher script and the JVM can be killed as a process group
+                    p = await asyncio.create_subprocess_exec(*params, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                                                             start_new_session=os.name == "posix")
+                try:
+                    with self._instrumentation.span("studio.run"):
+                        pending = b""
+                        while True:
+                            chunk = await p.stdout.read(self.__READ_CHUNK_SIZE)
+                            if chunk == b"":
+                                break
+                            lines = (pending + chunk).split(b"\n")
+                            pending = lines.pop()
+                            self.__handle_lines(lines, launch)
+                        if len(pending) > 0:
+                            self.__handle_lines([pending], launch)
+                        await p.wait()
+                except BaseException:
+                    self.__kill_launch(p)
+                    await asyncio.shield(p.wait())
+                    raise
+                self.__check_launch(launch)
+            finally:
+                if temp_dir is not None:
+                    self.__scratch.release(temp_dir)
+
+    def __async_launch_limit(self):
+        """
+        Returns the semaphore of the running event loop, that limits the number of concurrent launches.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self.__async_launches.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.__max_async_launches)
+            self.__async_launches[loop] = semaphore
+        return semaphore
+
+    def __kill_launch(self, process):
+        """
+        Kills a Studio launch. On POSIX systems, the whole process group of the launch is killed.
+
+        :param process: the asyncio.subprocess.Process object of the launch.
+        """
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+
+    async def __in_executor(self, function, *args):
+        """
+        Runs a blocking function in the default executor of the running event loop. If the calling task is cancelled,
+        the function is still waited for, as it may use scratch directories, that are released by the caller.
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *args))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
 
     def __run_process_with_output_dir(self, path, input_files, operator, output_dir, macros):
         self.__run_rapidminer(process=path, input_files=input_files, output_dir=output_dir, macros=macros, operator=operator)
+        return self.__read_process_outputs(output_dir)
+
+    def __read_process_outputs(self, output_dir):
+        """
+        Reads the results written by a process run to the output directory, in the order of the result ports.
+        """
         outputs = glob.glob(os.path.join(output_dir, "*.*"))
         outputs.sort()
         result = []
@@ -335,6 +885,55 @@ class Studio(Connector):
                 result.append(self.__deserialize_from_file(output))
         return result
 
+    def __run_process_with_cache(self, path, input_files, operator, output_dir, work_dir, macros):
+        """
+        Runs the process with the operator cache: only the operators, whose outputs are not cached, are executed, in a rewritten process written to work_dir.
+        """
+        with open(path.filename, "rb") as f:
+            process_xml = f.read().decode("utf-8")
+        plan = self.__operator_cache.plan(process_xml, [self.__file_hash(f.filename) for f in input_files], macros, operator)
+        outputs = []
+        if plan.process_xml is not None:
+            rewritten = os.path.join(work_dir, "process.rmp")
+            with open(rewritten, "wb") as f:
+                f.write(plan.process_xml.encode("utf-8"))
+            self.__run_rapidminer(process=File(rewritten), input_files=input_files + [File(f) for f in plan.cached_inputs],
+                                  output_dir=output_dir, macros=macros)
+            outputs = result_files(output_dir)
+            for (index, key) in plan.captures.items():
+                if index < len(outputs):
+                    self.__operator_cache.store(key, outputs[index])
+        result = []
+        for entry in plan.results:
+            if isinstance(entry, int):
+                if entry >= len(outputs):
+                    raise StudioException("Result " + str(entry + 1) + " of the process was not delivered.")
+                result.append(self.__deserialize_from_file(outputs[entry]))
+            else:
+                result.append(self.__deserialize_from_file(entry))
+        return result
+
+    def __grid_context(self, path, input_files, operator):
+        """
+        Identifies a grid run for its resume directory: by the process, the content of the process file (for File objects), the content of the serialized inputs and the operator.
+        """
+        if not isinstance(path, Resource):
+            path = RepositoryLocation(name=path)
+        process_hash = self.__file_hash(path.filename) if isinstance(path, File) else None
+        return [path.to_string(), process_hash, [self.__file_hash(f.filename) for f in input_files], operator]
+
+    def __file_hash(self, filename):
+        """
+        Hashes the content of a serialized input, together with its metadata file, if any.
+        """
+        digest = hashlib.sha1()
+        for name in (filename, os.path.splitext(strip_codec(filename))[0] + self.__MD_SUFFIX):
+            if os.path.exists(name):
+                with open(name, "rb") as f:
+                    for chunk in iter(lambda: f.read(self.__READ_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
     def __serialize_dataframe(self, df, streams):
         """
         Serializes a pandas DataFrame to CSV, using the format reuqired by RapidMiner Read CSV operator.
@@ -348,55 +947,145 @@ class Studio(Connector):
         dfc.to_csv(streams[0], index=False, encoding=__DEFAULT_ENCODING__)
         self._write_metadata(dfc, streams[1])
 
-    def __serialize_dataframe_to_file(self, df, basename):
+    def __serialize_dataframe_to_file(self, df, basename, codec=None):
         """
         Serializes a pandas DataFrame to CSV, using the format reuqired by RapidMiner Read CSV operator.
 
         :param df: the pandas DataFrame.
         :param basename: the base filename, without extension.
+        :param codec: the codec of the csv file, None for no compression. The metadata file is never compressed.
         :return:
         """
-        with __open__(basename + ".csv", "w") as csv_file:
-            with __open__(basename + ".pmd", "w") as meta_file:
+        csv_filename = basename + self.__CSV_SUFFIX + (CODEC_SUFFIXES[codec] if codec is not None else "")
+        with open_exchange_file(csv_filename, "w", encoding=__DEFAULT_ENCODING__) as csv_file:
+            with __open__(basename + self.__MD_SUFFIX, "w") as meta_file:
                 self.__serialize_dataframe(df, [csv_file, meta_file])
-        return basename + ".csv"
+        return csv_filename
 
     def __serialize_to_file(self, object, basename):
+        """
+        Serializes a python object to the appropriate file, and records the studio.serialize phase.
+
+        :param object, a python object.
+        :param basename: the base filename, without extension.
+        :return: the name of the written file.
+        """
+        with self._instrumentation.span("studio.serialize") as span:
+            filename = self.__write_object_file(object, basename, self.__exchange_codec(self.__payload_size([object])))
+            if span.enabled:
+                span.set(bytes=os.path.getsize(filename), **self._shape_attributes(object))
+            return filename
+
+    def __write_object_file(self, object, basename, codec=None):
         """
         Serializes a python object to the appropriate file.
 
         :param object, a python object.
         :param basename: the base filename, without extension.
+        :param codec: the codec of csv and file-like object files, None for no compression. Pickled objects are compressed by pickle_compression instead.
         :return:
         """
         if isinstance(object, pandas.DataFrame):
-            return self.__serialize_dataframe_to_file(object, basename)
+            return self.__serialize_dataframe_to_file(object, basename, codec)
         else:
+            fo_filename = basename + ".fo" + (CODEC_SUFFIXES[codec] if codec is not None else "")
             # try to write out as a file like object first
             try:
-                with open(basename + ".fo", "w", encoding=object.encoding) as outf:
+                with open_exchange_file(fo_filename, "w", encoding=object.encoding) as outf:
                     shutil.copyfileobj(object, outf)
-                return basename + ".fo"
+                return fo_filename
             except AttributeError:
                 try:
-                    with open(basename + ".fo", "wb") as outf:
+                    with open_exchange_file(fo_filename, "wb") as outf:
                         shutil.copyfileobj(object, outf)
-                    return basename + ".fo"
+                    return fo_filename
                 except AttributeError:
-                    shutil.rmtree(basename + ".fo", ignore_errors=True)
-                    with open(basename + ".bin", 'wb') as dump_file:
-                        pickle.dump(object, dump_file)
+                    shutil.rmtree(fo_filename, ignore_errors=True)
+                    dump_object(object, basename + ".bin", protocol=self.__pickle_protocol, compression=self.__pickle_compression)
                     return basename + ".bin"
 
-    def __deserialize_dataframe_from_file(self, csv_file, md_file):
+    def __read_csv(self, csv_file, dtype=None, parse_dates=None, usecols=None, filter=None):
+        """
+        Reads a csv file written by Studio, using the fastest parser engine available (pyarrow, if installed).
+
+        :param csv_file: the csv file to read from.
+        :param dtype: optional dict of column name to pandas dtype.
+        :param parse_dates: optional list of date columns.
+        :param usecols: optional list of columns to read.
+        :param filter: optional row filter (see read_resource). If defined, the file is read in chunks, and the filter is applied to every chunk, so that the rows not matching are never held in memory all at once.
+        :return: pandas DataFrame object.
+        """
+        if usecols is not None:
+            dtype = dict((key, value) for key, value in (dtype or {}).items() if key in usecols)
+            parse_dates = [key for key in (parse_dates or []) if key in usecols]
+        for i, (engine, options) in enumerate(self.__CSV_READERS):
+            try:
+                with self.__csv_source(csv_file) as source:
+                    if filter is None:
+                        data = pandas.read_csv(source, index_col=None, encoding=__DEFAULT_ENCODING__, dtype=dtype, parse_dates=parse_dates, usecols=usecols, engine=engine, **options)
+                    else:
+                        reader = pandas.read_csv(source, index_col=None, encoding=__DEFAULT_ENCODING__, dtype=dtype, parse_dates=parse_dates, usecols=usecols, engine=engine,
+                                                 chunksize=self.__FILTER_CHUNK_ROWS, **options)
+                        chunks = [self._apply_filter(chunk, filter) for chunk in reader]
+                if filter is not None:
+                    if len(chunks) > 0:
+                        data = pandas.concat(chunks, ignore_index=True)
+                        # every chunk has its own categories, so concat falls back to plain values for those columns
+                        for key, value in (dtype or {}).items():
+                            if value == "category" and key in data.columns and not isinstance(data[key].dtype, pandas.CategoricalDtype):
+                                data[key] = data[key].astype("category")
+                    else:
+                        with self.__csv_source(csv_file) as source:
+                            data = pandas.read_csv(source, index_col=None, encoding=__DEFAULT_ENCODING__, dtype=dtype, usecols=usecols, nrows=0)
+                break
+            except (ImportError, ValueError, TypeError):
+                if i == len(self.__CSV_READERS) - 1:
+                    raise
+        # date columns that could not be parsed by the engine
+        for key in parse_dates or []:
+            if data[key].dtype.kind != "M":
+                data[key] = self.__parse_dates(data[key])
+        return data
+
+    @contextlib.contextmanager
+    def __csv_source(self, csv_file):
+        """
+        Yields the csv file name, or for compressed exchange files, a new binary stream, that decompresses the file while it is parsed.
+        """
+        if codec_of(csv_file) is None:
+            yield csv_file
+        else:
+            with open_exchange_file(csv_file, "rb") as stream:
+                yield stream
+
+    def __parse_dates(self, column):
+        """
+        Parses a date column with the date format used by Studio, falls back to format inference if the values do not match.
+
+        :param column: pandas Series of strings.
+        :return: pandas Series of datetime64 values.
+        """
+        try:
+            return pandas.to_datetime(column, format=self.__DATE_FORMAT)
+        except (ValueError, TypeError):
+            return pandas.to_datetime(column)
+
+    def __deserialize_dataframe_from_file(self, csv_file, md_file, columns=None, filter=None, schema=None):
         """
         Reads a csv file into a pandas Dataframe. Code --with slight modifications -- taken from wrapper.py (readExampleSet).
 
         :param csv_file: the csv file to read from. Must have special format (which is created by the corresponding Java
                 code in the Studio part.
         :param md_file: metadata file, containing additional column type infos created by Studio.
+        :param columns: optional list of columns to read.
+        :param filter: optional row filter (see read_resource).
+        :param schema: optional cached schema of the data. The numeric dtypes inferred by the last read are passed to the parser.
         :return: pandas DataFrame object, with special rm_metadata attribute present (this stores the metadata).
         """
+        usecols = None
+        if columns is not None:
+            # the columns used by the filter are read as well, and dropped after filtering
+            usecols = list(columns) + [name for name in self._filter_columns(filter) if name not in columns]
         try:
             with __open__(md_file,'r') as md_stream:
                 metadata = json.load(md_stream)
@@ -405,51 +1094,103 @@ class Studio(Connector):
             meta_dict={}
             #different iteration methods for python 2 and 3
             try:
-                items = metadata.iteritems()
+                items_list = list(metadata.iteritems())
             except AttributeError:
-                items = metadata.items()
-            for key, value in items:
+                items_list = list(metadata.items())
+            for key, value in items_list:
                 #convert to tuple
                 meta_dict[key]=(value[0],None if value[1]=="attribute" else value[1])
                 #store date columns for parsing
                 if value[0] in date_set:
                     date_columns.append(key)
-            #read example set from csv
-            try:
-                with __open__(csv_file,'r') as csv_stream:
-                    data = pandas.read_csv(csv_stream,index_col=None,encoding=__DEFAULT_ENCODING__,parse_dates=date_columns,infer_datetime_format=True)
-            except TypeError:
-                #if the argument inter_datetime_format is not allowed in the current version do without
-                with __open__(csv_file,'r') as csv_stream:
-                    data = pandas.read_csv(csv_stream,index_col=None,encoding=__DEFAULT_ENCODING__,parse_dates=date_columns)
+            #read example set from csv, with the column types defined by the metadata
+            dtypes = dict((key, self.__RM_DTYPES[value[0]]) for key, value in items_list if value[0] in self.__RM_DTYPES)
+            if schema is not None:
+                dtypes.update((key, dtype) for key, dtype in schema["dtypes"].items()
+                              if key in meta_dict and key not in dtypes and key not in date_columns and dtype in self.__CACHED_DTYPES)
+            data = self.__read_csv(csv_file, dtype=dtypes, parse_dates=date_columns, usecols=usecols, filter=filter)
+            if columns is not None:
+                data = data[list(columns)]
+                meta_dict = dict((key, value) for key, value in meta_dict.items() if key in columns)
             self._suppress_pandas_warning(lambda: self._set_metadata(data, meta_dict))
         except:
             #no metadata found or reading with meta data failed
             self.log("Failed to use the meta data.", level=logging.WARNING)
-            with __open__(csv_file,'r') as csv_stream:
-                data = pandas.read_csv(csv_stream,index_col=None,encoding=__DEFAULT_ENCODING__)
+            data = self.__read_csv(csv_file, usecols=usecols, filter=filter)
+            if columns is not None:
+                data = data[list(columns)]
             self._suppress_pandas_warning(lambda: self._set_metadata(data, None))
         return data
 
-    def __deserialize_from_file(self, filename):
+    def __deserialize_from_file(self, filename, columns=None, filters=None, schema=None):
+        """
+        Reads the given file, and records the studio.deserialize phase.
+
+        :param filename: name of the file
+        :param columns: optional list of columns to read, only used for Parquet, Feather and Arrow files.
+        :param filters: optional row filter, only used for Parquet, Feather and Arrow files.
+        :param schema: optional cached schema of the data, from an earlier read of the unchanged resource, only used for csv files.
+        :return: an arbitrary python object (DataFrame, file object or any other python type pickled out)
+        """
+        with self._instrumentation.span("studio.deserialize") as span:
+            if is_columnar_file(filename):
+                result = self.__read_columnar_file(filename, columns, filters)
+            elif strip_codec(filename).endswith(self.__CSV_SUFFIX) and (columns is not None or filters is not None or schema is not None):
+                result = self.__deserialize_dataframe_from_file(filename, os.path.splitext(strip_codec(filename))[0] + self.__MD_SUFFIX, columns, filters, schema)
+            else:
+                result = self.__read_object_file(filename)
+            if span.enabled:
+                span.set(bytes=os.path.getsize(filename), **self._shape_attributes(result))
+            return result
+
+    def __columnar_file(self, resource):
+        """
+        Returns the resource as a File object, if it is a Parquet, Feather or Arrow file. These files are read and written directly, without launching Studio.
+
+        :param resource: a Resource object or a string.
+        :return: a File object or None.
+        """
+        if isinstance(resource, File) and is_columnar_file(resource.filename):
+            return resource
+        elif isinstance(resource, str) and is_columnar_file(resource):
+            return File(resource)
+        return None
+
+    def __read_columnar_file(self, filename, columns=None, filters=None):
+        if callable(filters):
+            # functions can not be pushed down to the reader
+            read_columns = None if columns is None else list(columns)
+            (data, metadata) = read_columnar(filename, columns=read_columns)
+            data = self._apply_filter(data, filters)
+        else:
+            (data, metadata) = read_columnar(filename, columns=columns, filters=self._normalize_filter(filters))
+        self._suppress_pandas_warning(lambda: self._set_metadata(data, metadata))
+        return data
+
+    def __write_columnar_file(self, df, filename):
+        if not isinstance(df, pandas.DataFrame):
+            raise ValueError("Only pandas DataFrames can be written to '" + filename + "'.")
+        metadata = getattr(df, "rm_metadata", None)
+        write_columnar(df, filename, metadata=metadata if isinstance(metadata, dict) else None)
+
+    def __read_object_file(self, filename):
         """
         Reads the given file. The acual method depends on the file extension
 
         :param filename: name of the file
         :return: an arbitrary python object (DataFrame, file object or any other python type pickled out)
         """
-        extension = os.path.splitext(filename)[1]
+        (base, extension) = os.path.splitext(strip_codec(filename))
         if(extension=='.csv'):
-            md_file = os.path.splitext(filename)[0] + ".pmd"
+            md_file = base + ".pmd"
             return self.__deserialize_dataframe_from_file(filename, md_file)
         elif extension=='.bin':
-            with open(filename, 'rb') as f:
-                try:
-                    return pickle.load(f)
-                except Exception as exc:
-                    raise GeneralException("Error while trying to load pickled object:" + str(exc))
+            try:
+                return load_object(filename)
+            except Exception as exc:
+                raise GeneralException("Error while trying to load pickled object:" + str(exc))
         elif extension=='.fo':
-            with open(filename, 'rb') as f:
+            with open_exchange_file(filename, 'rb') as f:
                 return io.BytesIO(f.read()) # reads the file to memory
         else:
             raise ValueError("Cannot handle files with '" + str(extension) + "' extension.")
@@ -15,6 +15,7 @@
 # If not, see https://www.gnu.org/licenses/.
 # 
 import os
+import re
 import sys
 
 __DEFAULT_ENCODING__ = "utf-8"
@@ -34,6 +35,20 @@ __STDOUT_ENCODING__ = os.getenv("PYTHONIOENCODING") # encoding in python should
 if __STDOUT_ENCODING__ is None or __STDOUT_ENCODING__ == "":
     __STDOUT_ENCODING__ = __DEFAULT_ENCODING__
 
+def check_version(module, minimum):
+    """
+    Checks the version of an already imported module. Cheap replacement of pkg_resources.require, that does not scan the installed distributions.
+
+    :param module: the module object, e.g. pandas.
+    :param minimum: the minimum required version as a string, e.g. "0.23.0".
+    :raises ImportError: if the version of the module is lower than the required one.
+    """
+    def parse(version):
+        return tuple(int(part) for part in re.match(r"\d+(\.\d+)*", version).group(0).split("."))
+    version = getattr(module, "__version__", None)
+    if version is not None and parse(version) < parse(minimum):
+        raise ImportError(module.__name__ + ">=" + minimum + " is required, but version " + version + " is installed.")
+
 class GeneralException(Exception):
     """
     General exception class to errors related to the rapidminer package.
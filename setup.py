@@ -26,4 +26,5 @@ setup(name='rapidminer',
       license='AGPL',
       packages=find_packages(),
       zip_safe=False,
-      install_requires=requirements)
+      install_requires=requirements,
+      entry_points={"console_scripts": ["rapidminer=rapidminer.core.cli:main"]})